@@ -9,7 +9,7 @@ import uvicorn
 from pathlib import Path
 from typing import Optional
 
-from api.routes import router
+from api.routes import jobs, router
 from api.auth import get_api_key, get_api_key_optional
 from utils.logging import get_logger
 from config.config import get_config
@@ -48,6 +48,12 @@ templates = Jinja2Templates(directory="api/templates")
 app.include_router(router, prefix="/api")
 
 
+@app.on_event("startup")
+async def resume_jobs():
+    """Resume processing jobs a previous run of the server left unfinished"""
+    jobs.recover()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     """Render the dashboard homepage"""
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 
@@ -14,6 +15,25 @@ class ProcessingResponse(BaseModel):
     processed_ids: List[Dict[str, Any]] = Field(..., description="Details for each processed ID")
 
 
+class JobSubmittedResponse(BaseModel):
+    """Response model for a queued processing job"""
+    job_id: str = Field(..., description="ID to poll with GET /api/jobs/{job_id}")
+    status: str = Field(..., description="Job status (queued)")
+    total: int = Field(..., description="Number of paper IDs in the job")
+
+
+class JobResponse(ProcessingResponse):
+    """Response model for a processing job's status, progress and results so far"""
+    job_id: str = Field(..., description="Job ID")
+    status: str = Field(..., description="queued, running, completed or failed")
+    total: int = Field(..., description="Number of paper IDs in the job")
+    processed: int = Field(..., description="Number of paper IDs processed so far")
+    error: Optional[str] = Field(None, description="Why the job failed")
+    created_at: Optional[datetime] = Field(None, description="When the job was submitted")
+    started_at: Optional[datetime] = Field(None, description="When the job started running")
+    finished_at: Optional[datetime] = Field(None, description="When the job completed or failed")
+
+
 class EntityModel(BaseModel):
     """Entity model for paper figures"""
     text: str = Field(..., description="Entity text")
@@ -37,6 +57,15 @@ class PaperResponse(BaseModel):
     figures: List[FigureModel] = Field(..., description="Figures in the paper")
 
 
+class PaperRecordResponse(BaseModel):
+    """A paper projected onto the requested fields; fields not asked for are left out"""
+    paper_id: Optional[str] = Field(None, description="Paper ID (PMC ID or PMID)")
+    title: Optional[str] = Field(None, description="Paper title")
+    abstract: Optional[str] = Field(None, description="Paper abstract")
+    figure_count: Optional[int] = Field(None, description="Number of figures in the paper")
+    figures: Optional[List[FigureModel]] = Field(None, description="Figures in the paper")
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str = Field("ok", description="API status")
@@ -51,9 +80,11 @@ class PaperQueryParams(BaseModel):
     abstract_contains: Optional[str] = Field(None, description="Filter by abstract containing text")
     caption_contains: Optional[str] = Field(None, description="Filter by caption containing text")
     entity_text: Optional[str] = Field(None, description="Filter by entity text")
+    entity_similarity: Optional[float] = Field(None, gt=0, le=1, description="Also match entity names this similar to entity_text")
     entity_type: Optional[str] = Field(None, description="Filter by entity type")
     limit: int = Field(10, description="Maximum number of results to return")
     offset: int = Field(0, description="Number of results to skip")
+    cursor: Optional[str] = Field(None, description="Cursor from page_info.next_cursor of the previous page")
 
 
 class SearchResponse(BaseModel):
@@ -61,4 +92,27 @@ class SearchResponse(BaseModel):
     total_results: int = Field(..., description="Total number of matching papers")
     results: List[PaperResponse] = Field(..., description="Search results")
     query: Dict[str, Any] = Field(..., description="Query parameters used")
-    page_info: Dict[str, Any] = Field(..., description="Pagination information") 
\ No newline at end of file
+    page_info: Dict[str, Any] = Field(..., description="Pagination information") 
+
+class ScoredPaperResponse(PaperResponse):
+    """Paper matched by full-text search"""
+    score: float = Field(..., description="BM25 relevance score of the title and abstract")
+
+
+class ScoredFigureResponse(BaseModel):
+    """Figure matched by full-text search"""
+    paper_id: str = Field(..., description="Paper the figure belongs to")
+    label: str = Field(..., description="Figure label")
+    caption: str = Field(..., description="Figure caption")
+    url: Optional[str] = Field(None, description="URL to the figure image")
+    score: float = Field(..., description="BM25 relevance score of the caption")
+
+
+class TextSearchResponse(BaseModel):
+    """Response model for ranked full-text search results"""
+    query: str = Field(..., description="Full-text query")
+    total_papers: int = Field(..., description="Number of papers whose title or abstract matches")
+    total_figures: int = Field(..., description="Number of figures whose caption matches")
+    papers: List[ScoredPaperResponse] = Field(..., description="Matching papers, best first")
+    figures: List[ScoredFigureResponse] = Field(..., description="Matching figures, best first")
+    page_info: Dict[str, Any] = Field(..., description="Pagination information")
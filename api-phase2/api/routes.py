@@ -1,34 +1,89 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, BackgroundTasks, Query, Security
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, BackgroundTasks, Query, Request, Security
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import itertools
 import os
-import tempfile
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Union
 import io
 import csv
 import json
 from datetime import datetime
 
-from api.models import IDListRequest, ProcessingResponse, PaperResponse, HealthResponse, PaperQueryParams, SearchResponse
+from api.models import IDListRequest, JobResponse, JobSubmittedResponse, PaperRecordResponse, PaperResponse, HealthResponse, PaperQueryParams, SearchResponse, TextSearchResponse
 from api.auth import get_api_key, get_api_key_optional
+from ingestion.jobs import JobQueue
 from ingestion.paper_processor import PaperProcessor
-from storage.duckdb_backend import DuckDBStorage
+from ingestion.pipeline import IngestionPipeline
+from models.paper import Figure, Paper
+from storage.duckdb_backend import PAPER_FIELDS, get_paper_cache, get_storage, search_terms
+from utils.cache import LRUCache
 from utils.export import BatchResultExporter
 from utils.logging import get_logger
 from config.config import get_config
-from ingestion.id_converter import normalize_paper_id
+from ingestion.id_converter import normalize_paper_id, resolve_paper_ids
 
 # Create router
 router = APIRouter()
 logger = get_logger("api.routes")
 
-# Initialize processor and storage
-processor = PaperProcessor()
+# Initialize storage and the processor sharing it
 config = get_config()
-storage = DuckDBStorage(config.storage.db_path)
+storage = get_storage()
+processor = PaperProcessor(storage)
+pipeline = IngestionPipeline(processor)
 
 # Store the most recently processed paper IDs for export
 recently_processed_ids = []
 
+# Search responses by write generation and normalized query
+search_cache = LRUCache(config.api.search_cache_size, config.api.search_cache_ttl)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Streamed exports are written to the client in pieces of about this many characters
+EXPORT_WRITE_SIZE = 64 * 1024
+
+# Filters matched case-insensitively, so their case doesn't split the cache
+CASE_INSENSITIVE_FILTERS = ("title_contains", "abstract_contains", "caption_contains", "entity_text", "entity_type")
+
+
+def _search_cache_key(query_params: Dict[str, Any]) -> tuple:
+    """
+    Cache key for a search: the storage write generation (so no entry
+    outlives a write) plus the normalized query parameters
+    """
+    normalized = []
+    for name, value in sorted(query_params.items()):
+        if name == "q":
+            value = tuple(dict.fromkeys(search_terms(value)))
+        elif name == "paper_ids":
+            value = tuple(sorted(set(value)))
+        elif name in CASE_INSENSITIVE_FILTERS:
+            value = value.strip().lower()
+        normalized.append((name, value))
+    return (storage.write_generation, tuple(normalized))
+
+
+def _remember_processed(job: Dict[str, Any]) -> None:
+    """Remember the successfully processed IDs of a finished job for later export"""
+    global recently_processed_ids
+    recently_processed_ids = [
+        result["paper_id"] for result in job["processed_ids"] if result["status"] == "success"
+    ]
+
+
+# Processing jobs run in the background through the pipeline, which overlaps
+# fetching, parsing, annotating and storing across papers
+jobs = JobQueue(
+    pipeline, storage, config.api.job_workers,
+    on_complete=_remember_processed, event_buffer=config.api.job_event_buffer
+)
+
+
+async def _submit_job(paper_ids: List[str]) -> JobSubmittedResponse:
+    job_id = await run_in_threadpool(jobs.submit, paper_ids)
+    return JobSubmittedResponse(job_id=job_id, status="queued", total=len(paper_ids))
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -36,80 +91,130 @@ async def health_check():
     return HealthResponse()
 
 
-@router.post("/process", response_model=ProcessingResponse)
+def _load_papers(paper_ids: List[str]) -> List[Paper]:
+    """
+    Load stored papers for a list of PMC IDs/PMIDs in request order,
+    resolving all IDs and fetching all papers in one pass each
+    """
+    resolved = resolve_paper_ids(paper_ids, storage)
+    return storage.get_papers_by_ids([resolved[pid][1] or pid for pid in paper_ids])
+
+
+def _figure_response(fig: Figure) -> Dict[str, Any]:
+    return {
+        "label": fig.label,
+        "caption": fig.caption,
+        "url": fig.url,
+        "entities": [{"text": e.text, "type": e.type} for e in fig.entities]
+    }
+
+
+def _paper_response(paper: Paper) -> Dict[str, Any]:
+    """A stored paper in the PaperResponse format"""
+    return {
+        "paper_id": paper.paper_id,
+        "title": paper.title,
+        "abstract": paper.abstract,
+        "figure_count": len(paper.figures),
+        "figures": [_figure_response(fig) for fig in paper.figures]
+    }
+
+
+def _paper_record(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """A projected paper from DuckDBStorage.get_papers_page in the PaperResponse format"""
+    if "figures" in paper:
+        paper["figures"] = [_figure_response(fig) for fig in paper["figures"]]
+    return paper
+
+
+def _iter_paper_records(fields: Optional[List[str]], limit: Optional[int],
+                        cursor: Optional[str]) -> Iterator[List[Dict[str, Any]]]:
+    """Projected papers a page of `api.stream_chunk_size` at a time, at most `limit` if given"""
+    while limit is None or limit > 0:
+        size = config.api.stream_chunk_size if limit is None else min(config.api.stream_chunk_size, limit)
+        papers, cursor = storage.get_papers_page(fields, size, cursor)
+        yield [_paper_record(paper) for paper in papers]
+        if cursor is None:
+            return
+        if limit is not None:
+            limit -= len(papers)
+
+
+def _wants_ndjson(request: Request, stream: bool) -> bool:
+    """Whether the client asked for a streamed NDJSON response"""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def _ndjson_response(chunks: Iterator[List[Dict[str, Any]]]) -> StreamingResponse:
+    """
+    Stream records as NDJSON, one record per line and one write per chunk.
+    The first chunk is read up front so a failing query still gets an
+    error status instead of an empty stream.
+    """
+    chunks = iter(chunks)
+    first = await run_in_threadpool(next, chunks, [])
+
+    def lines() -> Iterator[str]:
+        try:
+            for chunk in itertools.chain([first], chunks):
+                if chunk:
+                    yield "".join(json.dumps(record, default=str) + "\n" for record in chunk)
+        except Exception as e:
+            # Headers are already sent: end the stream early
+            logger.error(f"Error streaming results: {e}")
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _iter_search_text(q: str, limit: Optional[int], offset: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Full-text search results as `paper` and `figure` records, best first,
+    fetched `api.stream_chunk_size` at a time; every match unless `limit`
+    is given
+    """
+    chunk_size = config.api.stream_chunk_size
+    papers_left = figures_left = True
+    while papers_left or figures_left:
+        size = chunk_size if limit is None else min(chunk_size, limit)
+        found = storage.search_text(q, size, offset)
+        chunk = []
+        if papers_left:
+            chunk += [dict(_paper_response(paper), type="paper", score=score) for paper, score in found["papers"]]
+            papers_left = len(found["papers"]) == size
+        if figures_left:
+            chunk += [dict(figure, type="figure") for figure in found["figures"]]
+            figures_left = len(found["figures"]) == size
+        yield chunk
+        offset += size
+        if limit is not None:
+            limit -= size
+            if limit <= 0:
+                return
+
+
+@router.post("/process", response_model=JobSubmittedResponse, status_code=202)
 async def process_ids(
     request: IDListRequest,
     api_key: str = Security(get_api_key)
 ):
     """
-    Process a list of paper IDs (PMC IDs or PMIDs)
+    Queue a job processing a list of paper IDs (PMC IDs or PMIDs)
     """
-    global recently_processed_ids
-    
     if not request.ids:
         raise HTTPException(status_code=400, detail="No paper IDs provided")
 
-    results = []
-    success_count = 0
-    failed_count = 0
-    successful_ids = []
-
-    for paper_id in request.ids:
-        try:
-            # Normalize the paper ID to get both PMC ID and PMID
-            original_id, pmc_id, pmid = normalize_paper_id(paper_id)
-            
-            # Log the ID conversion for debugging
-            if pmid and pmc_id:
-                logger.info(f"Converted ID: Original={original_id}, PMC={pmc_id}, PMID={pmid}")
-            elif pmid:
-                logger.info(f"Using PMID: {pmid} (no PMC ID found)")
-            elif pmc_id:
-                logger.info(f"Using PMC ID: {pmc_id} (no PMID found)")
-            else:
-                logger.warning(f"Could not resolve ID: {original_id}")
-            
-            # Use the process_with_details method which handles both PMC IDs and PMIDs
-            result = processor.process_with_details(paper_id)
-            results.append(result)
-            
-            if result["status"] == "success":
-                success_count += 1
-                successful_ids.append(paper_id)
-                logger.info(f"Successfully processed paper: {paper_id}")
-            else:
-                failed_count += 1
-                logger.error(f"Failed to process paper: {paper_id}, Error: {result.get('error', 'Unknown error')}")
-        except Exception as e:
-            failed_count += 1
-            logger.error(f"Error processing paper {paper_id}: {e}")
-            results.append({
-                "paper_id": paper_id,
-                "status": "error",
-                "message": str(e)
-            })
-
-    # Store the successfully processed IDs for later export
-    recently_processed_ids = successful_ids
-
-    return ProcessingResponse(
-        success_count=success_count,
-        failed_count=failed_count,
-        processed_ids=results
-    )
+    return await _submit_job(request.ids)
 
 
-@router.post("/upload", response_model=ProcessingResponse)
+@router.post("/upload", response_model=JobSubmittedResponse, status_code=202)
 async def upload_id_file(
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = None,
     api_key: str = Security(get_api_key)
 ):
     """
-    Upload a file containing paper IDs (one per line) and process them
+    Upload a file containing paper IDs (one per line) and queue a job processing them
     """
-    global recently_processed_ids
-    
     if not file.filename.endswith(('.txt', '.csv')):
         raise HTTPException(status_code=400, detail="Only .txt or .csv files are supported")
 
@@ -131,87 +236,77 @@ async def upload_id_file(
     if not paper_ids:
         raise HTTPException(status_code=400, detail="No paper IDs found in the uploaded file")
 
-    # Process the paper IDs
-    results = []
-    success_count = 0
-    failed_count = 0
-    successful_ids = []
+    return await _submit_job(paper_ids)
 
-    for paper_id in paper_ids:
-        try:
-            # Normalize the paper ID to get both PMC ID and PMID
-            original_id, pmc_id, pmid = normalize_paper_id(paper_id)
-            
-            # Log the ID conversion for debugging
-            if pmid and pmc_id:
-                logger.info(f"Converted ID: Original={original_id}, PMC={pmc_id}, PMID={pmid}")
-            elif pmid:
-                logger.info(f"Using PMID: {pmid} (no PMC ID found)")
-            elif pmc_id:
-                logger.info(f"Using PMC ID: {pmc_id} (no PMID found)")
-            else:
-                logger.warning(f"Could not resolve ID: {original_id}")
-            
-            # Use the process_with_details method which handles both PMC IDs and PMIDs
-            result = processor.process_with_details(paper_id)
-            results.append(result)
-            
-            if result["status"] == "success":
-                success_count += 1
-                successful_ids.append(paper_id)
-                logger.info(f"Successfully processed paper: {paper_id}")
-            else:
-                failed_count += 1
-                logger.error(f"Failed to process paper: {paper_id}, Error: {result.get('error', 'Unknown error')}")
-        except Exception as e:
-            failed_count += 1
-            logger.error(f"Error processing paper {paper_id}: {e}")
-            results.append({
-                "paper_id": paper_id,
-                "status": "error",
-                "message": str(e)
-            })
 
-    # Store the successfully processed IDs for later export
-    recently_processed_ids = successful_ids
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    api_key: str = Security(get_api_key)
+):
+    """
+    Get the status, progress and per-ID results so far of a processing job
+    """
+    job = await run_in_threadpool(jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 
-    return ProcessingResponse(
-        success_count=success_count,
-        failed_count=failed_count,
-        processed_ids=results
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    api_key: str = Security(get_api_key)
+):
+    """
+    Stream a processing job's progress as Server-Sent Events: a `progress`
+    snapshot, then a `paper` event per finished paper with the updated
+    counts, throughput and ETA, ending with `done`
+    """
+    if await run_in_threadpool(jobs.summary, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def stream():
+        async for event, payload in jobs.events(job_id):
+            if event is None:
+                # Comment line that keeps idle connections (and proxies) open
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
-@router.get("/papers", response_model=List[PaperResponse])
+@router.get("/papers", response_model=List[PaperRecordResponse])
 async def get_papers(
+    request: Request,
+    fields: Optional[str] = Query(None, description=f"Comma-separated fields to return ({','.join(PAPER_FIELDS)}; default all)"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of papers to return (default all)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    stream: bool = Query(False, description="Stream one JSON paper per line (NDJSON), same as Accept: application/x-ndjson"),
     api_key: str = Security(get_api_key)
 ):
     """
-    Get all papers from the database
+    Get papers from the database in table order, optionally a page at a
+    time and projected onto some of their fields. When another page
+    follows, its cursor is returned in the X-Next-Cursor header.
     """
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
     try:
-        papers = storage.get_papers()
-        response = []
-        
-        for paper in papers:
-            figures_data = []
-            for fig in paper.figures:
-                figures_data.append({
-                    "label": fig.label,
-                    "caption": fig.caption,
-                    "url": fig.url,
-                    "entities": [{"text": e.text, "type": e.type} for e in fig.entities]
-                })
-                
-            response.append({
-                "paper_id": paper.paper_id,
-                "title": paper.title,
-                "abstract": paper.abstract,
-                "figure_count": len(paper.figures),
-                "figures": figures_data
-            })
-            
-        return response
+        if _wants_ndjson(request, stream):
+            return await _ndjson_response(_iter_paper_records(field_list, limit, cursor))
+
+        papers, next_cursor = await run_in_threadpool(storage.get_papers_page, field_list, limit, cursor)
+        return JSONResponse(
+            content=[_paper_record(paper) for paper in papers],
+            headers={"X-Next-Cursor": next_cursor} if next_cursor else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting papers: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting papers: {str(e)}")
@@ -227,7 +322,7 @@ async def get_paper(
     """
     try:
         # Normalize the paper ID to get PMC ID
-        original_id, pmc_id, pmid = normalize_paper_id(paper_id)
+        original_id, pmc_id, pmid = normalize_paper_id(paper_id, storage)
         
         if not pmc_id and pmid:
             # If we have a PMID but no PMC ID, try to convert it
@@ -240,22 +335,7 @@ async def get_paper(
         if not paper:
             raise HTTPException(status_code=404, detail=f"Paper with ID {paper_id} not found")
         
-        figures_data = []
-        for fig in paper.figures:
-            figures_data.append({
-                "label": fig.label,
-                "caption": fig.caption,
-                "url": fig.url,
-                "entities": [{"text": e.text, "type": e.type} for e in fig.entities]
-            })
-            
-        return {
-            "paper_id": paper.paper_id,
-            "title": paper.title,
-            "abstract": paper.abstract,
-            "figure_count": len(paper.figures),
-            "figures": figures_data
-        }
+        return _paper_response(paper)
     except HTTPException:
         raise
     except Exception as e:
@@ -263,6 +343,41 @@ async def get_paper(
         raise HTTPException(status_code=500, detail=f"Error getting paper: {str(e)}")
 
 
+def _export_result(paper_id: str, title: str, abstract: str, figures: List[Figure]) -> Dict[str, Any]:
+    """A stored paper in the format expected by BatchResultExporter"""
+    return {
+        "paper_id": paper_id,
+        "status": "success",
+        "title": title,
+        "abstract": abstract,
+        "figures": [_figure_response(fig) for fig in figures]
+    }
+
+
+def _iter_export_results(paper_ids: Optional[List[str]]) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Papers to export, read `api.stream_chunk_size` at a time: the given PMC
+    IDs/PMIDs in request order, or every stored paper. Empty chunks are
+    skipped, so the first chunk is empty only if nothing is found.
+    """
+    chunk_size = config.api.stream_chunk_size
+    if paper_ids is None:
+        cursor = None
+        while True:
+            papers, cursor = storage.get_papers_page(["paper_id", "title", "abstract", "figures"], chunk_size, cursor)
+            if papers:
+                yield [_export_result(**paper) for paper in papers]
+            if cursor is None:
+                return
+
+    resolved = resolve_paper_ids(paper_ids, storage)
+    stored_ids = [resolved[pid][1] or pid for pid in paper_ids]
+    for start in range(0, len(stored_ids), chunk_size):
+        papers = storage.get_papers_by_ids(stored_ids[start:start + chunk_size])
+        if papers:
+            yield [_export_result(paper.paper_id, paper.title, paper.abstract, paper.figures) for paper in papers]
+
+
 @router.get("/export")
 async def export_data(
     format: str = Query("json", description="Export format (json or csv)"),
@@ -271,78 +386,59 @@ async def export_data(
     api_key: str = Security(get_api_key)
 ):
     """
-    Export papers data in JSON or CSV format
+    Export papers data in JSON or CSV format, streamed as a download while
+    the papers are read
     """
     global recently_processed_ids
     
     try:
-        # Determine which papers to export
+        # Determine which papers to export: specific IDs, the recently
+        # processed ones, or all papers
         if paper_ids:
-            # If specific IDs are provided, use those
-            papers = []
-            for pid in paper_ids:
-                # Normalize the paper ID to get PMC ID
-                original_id, pmc_id, pmid = normalize_paper_id(pid)
-                paper = storage.get_paper_with_details(pmc_id or pid)
-                if paper:
-                    papers.append(paper)
+            export_ids = paper_ids
         elif use_recent and recently_processed_ids:
-            # If use_recent is True and we have recently processed IDs, use those
-            papers = []
-            for pid in recently_processed_ids:
-                # Normalize the paper ID to get PMC ID
-                original_id, pmc_id, pmid = normalize_paper_id(pid)
-                paper = storage.get_paper_with_details(pmc_id or pid)
-                if paper:
-                    papers.append(paper)
+            export_ids = list(recently_processed_ids)
         else:
-            # Otherwise, get all papers
-            papers = storage.get_papers()
-        
-        if not papers:
-            raise HTTPException(status_code=404, detail="No papers found to export")
-        
-        # Create exporter
+            export_ids = None
+
         exporter = BatchResultExporter()
-        exporter.start_timing()  # Start timing to avoid the error
-        
-        # Prepare results in the format expected by the exporter
-        results = []
-        for paper in papers:
-            figures_data = []
-            for fig in paper.figures:
-                figures_data.append({
-                    "label": fig.label,
-                    "caption": fig.caption,
-                    "url": fig.url,
-                    "entities": [{"text": e.text, "type": e.type} for e in fig.entities]
-                })
-                
-            results.append({
-                "paper_id": paper.paper_id,
-                "status": "success",
-                "title": paper.title,
-                "abstract": paper.abstract,
-                "figures": figures_data
-            })
-        
-        # Format results
-        formatted_output = exporter.format_results(results, format)
-        
-        # Create a temporary file
+        exporter.start_timing()
+        # Reject an unsupported format before reading anything from the database
+        try:
+            format = exporter.check_stream_format(format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Read the first chunk up front so an empty export is still a 404
+        chunks = _iter_export_results(export_ids)
+        first = await run_in_threadpool(next, chunks, [])
+        if not first:
+            raise HTTPException(status_code=404, detail="No papers found to export")
+
+        results = itertools.chain.from_iterable(itertools.chain([first], chunks))
+        formatted = exporter.iter_results(results, format)
+
+        def body() -> Iterator[str]:
+            # Batch the formatter's output into writes of about EXPORT_WRITE_SIZE
+            buffered, size = [], 0
+            try:
+                for text in formatted:
+                    buffered.append(text)
+                    size += len(text)
+                    if size >= EXPORT_WRITE_SIZE:
+                        yield "".join(buffered)
+                        buffered, size = [], 0
+                yield "".join(buffered)
+            except Exception as e:
+                # Headers are already sent: end the download early
+                logger.error(f"Error streaming export: {e}")
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = "json" if format == "json" else "csv"
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}")
-        
-        # Write data to the file
-        with open(temp_file.name, "w") as f:
-            f.write(formatted_output)
-        
-        # Return the file as a download
-        return FileResponse(
-            path=temp_file.name,
-            filename=f"figurex_export_{timestamp}.{file_extension}",
-            media_type=f"application/{file_extension}"
+        file_extension = format
+        return StreamingResponse(
+            body(),
+            media_type=f"application/{file_extension}",
+            headers={"Content-Disposition": f'attachment; filename="figurex_export_{timestamp}.{file_extension}"'}
         )
     except HTTPException:
         raise
@@ -367,22 +463,10 @@ async def get_metadata(
         # Determine which papers to get metadata for
         if paper_ids:
             # If specific IDs are provided, use those
-            papers = []
-            for pid in paper_ids:
-                # Normalize the paper ID to get PMC ID
-                original_id, pmc_id, pmid = normalize_paper_id(pid)
-                paper = storage.get_paper_with_details(pmc_id or pid)
-                if paper:
-                    papers.append(paper)
+            papers = _load_papers(paper_ids)
         elif use_recent and recently_processed_ids:
             # If use_recent is True and we have recently processed IDs, use those
-            papers = []
-            for pid in recently_processed_ids:
-                # Normalize the paper ID to get PMC ID
-                original_id, pmc_id, pmid = normalize_paper_id(pid)
-                paper = storage.get_paper_with_details(pmc_id or pid)
-                if paper:
-                    papers.append(paper)
+            papers = _load_papers(recently_processed_ids)
         else:
             # Otherwise, get all papers
             papers = storage.get_papers()
@@ -447,22 +531,57 @@ async def get_metadata(
 
 
 # New search endpoints
-@router.get("/search", response_model=SearchResponse)
+@router.get("/search", response_model=Union[SearchResponse, TextSearchResponse])
 async def search_papers(
+    request: Request,
+    q: Optional[str] = Query(None, description="Full-text query; returns papers and figures ranked by BM25"),
     paper_ids: Optional[List[str]] = Query(None, description="Filter by paper IDs"),
     title_contains: Optional[str] = Query(None, description="Filter by title containing text"),
     abstract_contains: Optional[str] = Query(None, description="Filter by abstract containing text"),
     caption_contains: Optional[str] = Query(None, description="Filter by caption containing text"),
     entity_text: Optional[str] = Query(None, description="Filter by entity text"),
+    entity_similarity: Optional[float] = Query(None, gt=0, le=1, description="Also match entity names at least this similar (0-1, Levenshtein) to entity_text"),
     entity_type: Optional[str] = Query(None, description="Filter by entity type"),
-    limit: int = Query(10, description="Maximum number of results to return"),
+    limit: Optional[int] = Query(None, description="Maximum number of results to return (default 10, or every match when streaming)"),
     offset: int = Query(0, description="Number of results to skip"),
+    cursor: Optional[str] = Query(None, description="page_info.next_cursor of the previous page (replaces offset)"),
+    stream: bool = Query(False, description="Stream one JSON result per line (NDJSON), same as Accept: application/x-ndjson"),
     api_key: str = Security(get_api_key)
 ):
     """
-    Search papers based on query parameters
+    Search papers based on query parameters, or rank papers and figures
+    against a full-text query when `q` is given
     """
     try:
+        if _wants_ndjson(request, stream):
+            if q is not None:
+                return await _ndjson_response(_iter_search_text(q, limit, offset))
+            query_params = {
+                "paper_ids": paper_ids,
+                "title_contains": title_contains,
+                "abstract_contains": abstract_contains,
+                "caption_contains": caption_contains,
+                "entity_text": entity_text,
+                "entity_similarity": entity_similarity,
+                "entity_type": entity_type,
+                "limit": limit,
+                "offset": offset,
+                "cursor": cursor
+            }
+            query_params = {k: v for k, v in query_params.items() if v is not None}
+            try:
+                return await _ndjson_response(
+                    [_paper_response(paper) for paper in chunk]
+                    for chunk in storage.iter_search_papers(query_params, config.api.stream_chunk_size)
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        if limit is None:
+            limit = 10
+        if q is not None:
+            return await run_in_threadpool(_search_text, q, limit, offset)
+
         # Build query params dictionary
         query_params = {
             "paper_ids": paper_ids,
@@ -470,43 +589,37 @@ async def search_papers(
             "abstract_contains": abstract_contains,
             "caption_contains": caption_contains,
             "entity_text": entity_text,
+            "entity_similarity": entity_similarity,
             "entity_type": entity_type,
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "cursor": cursor
         }
         
         # Remove None values
         query_params = {k: v for k, v in query_params.items() if v is not None}
         
-        # Execute search
-        total_count, papers = storage.search_papers(query_params)
+        # Execute search, or reuse the result of the same search since the last write
+        key = _search_cache_key(query_params)
+        found = search_cache.get(key)
+        if found is None:
+            try:
+                found = await run_in_threadpool(storage.search_papers_page, query_params)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            search_cache.put(key, found)
+        total_count, papers, next_cursor = found
         
         # Format results
-        results = []
-        for paper in papers:
-            figures_data = []
-            for fig in paper.figures:
-                figures_data.append({
-                    "label": fig.label,
-                    "caption": fig.caption,
-                    "url": fig.url,
-                    "entities": [{"text": e.text, "type": e.type} for e in fig.entities]
-                })
-                
-            results.append({
-                "paper_id": paper.paper_id,
-                "title": paper.title,
-                "abstract": paper.abstract,
-                "figure_count": len(paper.figures),
-                "figures": figures_data
-            })
-        
+        results = [_paper_response(paper) for paper in papers]
+
         # Create page info
         page_info = {
             "total_results": total_count,
             "limit": limit,
             "offset": offset,
-            "has_more": offset + len(results) < total_count
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
         }
         
         return SearchResponse(
@@ -515,11 +628,65 @@ async def search_papers(
             query=query_params,
             page_info=page_info
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching papers: {e}")
         raise HTTPException(status_code=500, detail=f"Error searching papers: {str(e)}")
 
 
+def _search_text(q: str, limit: int, offset: int) -> TextSearchResponse:
+    """Run a BM25-ranked full-text search over titles, abstracts and captions"""
+    key = _search_cache_key({"q": q, "limit": limit, "offset": offset})
+    found = search_cache.get(key)
+    if found is None:
+        found = storage.search_text(q, limit, offset)
+        search_cache.put(key, found)
+
+    papers = [dict(_paper_response(paper), score=score) for paper, score in found["papers"]]
+
+    page_info = {
+        "limit": limit,
+        "offset": offset,
+        "has_more": (offset + len(papers) < found["total_papers"]
+                     or offset + len(found["figures"]) < found["total_figures"])
+    }
+
+    return TextSearchResponse(
+        query=q,
+        total_papers=found["total_papers"],
+        total_figures=found["total_figures"],
+        papers=papers,
+        figures=found["figures"],
+        page_info=page_info
+    )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    api_key: str = Security(get_api_key)
+):
+    """
+    Get size and hit/miss counters of the in-process search and paper caches
+    """
+    paper_cache = get_paper_cache()
+    return {
+        "write_generation": storage.write_generation,
+        "search": search_cache.stats(),
+        "papers": paper_cache.stats() if paper_cache is not None else None
+    }
+
+
+@router.get("/pipeline/stats")
+async def get_pipeline_stats(
+    api_key: str = Security(get_api_key)
+):
+    """
+    Get per-stage throughput and queue depth of the ingestion pipeline
+    """
+    return pipeline.stats()
+
+
 @router.get("/entity-types")
 async def get_entity_types(
     api_key: str = Security(get_api_key)
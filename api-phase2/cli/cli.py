@@ -1,9 +1,11 @@
 # cli/cli.py
+import asyncio
 import typer
 import os
 import time
 from typing import List, Optional
 from ingestion.paper_processor import PaperProcessor
+from ingestion.pipeline import IngestionPipeline
 from utils.file_utils import (
     read_ids_from_file,
     process_file,
@@ -14,7 +16,7 @@ from utils.file_utils import (
 from utils.logging import get_logger
 from utils.export import BatchResultExporter
 from enum import Enum
-from storage.duckdb_backend import DuckDBStorage
+from storage.duckdb_backend import get_storage
 from config.config import get_config
 
 class OutputFormat(str, Enum):
@@ -24,8 +26,18 @@ class OutputFormat(str, Enum):
 cli = typer.Typer()
 logger = get_logger()
 
-# Create a processor instance for reuse
-processor = PaperProcessor()
+# The processor and pipeline are created on first use rather than on import:
+# the pipeline's worker processes are spawned and re-import this module, and
+# must not open the database the CLI process holds
+_pipeline: Optional[IngestionPipeline] = None
+
+
+def get_pipeline() -> IngestionPipeline:
+    """The shared ingestion pipeline, with its processor on the process-wide storage service"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = IngestionPipeline(PaperProcessor(get_storage()))
+    return _pipeline
 
 
 # Keep this function for backward compatibility with test_batch_ingest.py
@@ -36,7 +48,18 @@ def process_paper(paper_id: str) -> bool:
 
     This function is kept for backward compatibility.
     """
-    return processor.process(paper_id)
+    return get_pipeline().processor.process(paper_id)
+
+
+def process_papers(paper_ids: List[str]) -> List[dict]:
+    """
+    Process papers through the ingestion pipeline, or with the async client
+    when `processing.parallel_processing` is enabled.
+    """
+    pipeline = get_pipeline()
+    if get_config().processing.parallel_processing:
+        return asyncio.run(pipeline.processor.process_many(paper_ids))
+    return pipeline.run(paper_ids)
 
 
 @cli.command()
@@ -54,8 +77,7 @@ def reset(
             raise typer.Exit()
 
     try:
-        config = get_config()
-        storage = DuckDBStorage(config.storage.db_path)
+        storage = get_storage()
         storage.reset_db()
         logger.info("Database has been reset successfully")
     except Exception as e:
@@ -63,6 +85,28 @@ def reset(
         raise typer.Exit(1)
 
 
+@cli.command("import-ids")
+def import_ids(
+    mapping_file: str = typer.Argument(..., help="Path to the NCBI PMC-ids.csv or PMC-ids.csv.gz mapping file")
+):
+    """
+    Import PMID to PMC ID mappings from the NCBI PMC-ids.csv(.gz) dump.
+    Imported IDs are resolved locally without calling the NCBI ID converter.
+    """
+    if not os.path.exists(mapping_file):
+        logger.error(f"Mapping file not found: {mapping_file}")
+        raise typer.Exit(1)
+
+    try:
+        storage = get_storage()
+        start = time.time()
+        added = storage.import_id_aliases_csv(mapping_file)
+        logger.info(f"Imported {added} new ID mappings in {time.time() - start:.1f}s")
+    except Exception as e:
+        logger.error(f"Error importing ID mappings: {e}")
+        raise typer.Exit(1)
+
+
 @cli.command()
 def batch(
     paper_ids: List[str] = typer.Argument(..., help="One or more PMC IDs or PMIDs to process"),
@@ -75,16 +119,13 @@ def batch(
     """
     exporter = BatchResultExporter()
     exporter.start_timing()
-    results = []
 
     logger.info(f"Processing {len(paper_ids)} paper(s)...")
 
-    for paper_id in paper_ids:
-        logger.info(f"Processing paper ID: {paper_id}")
-        # Process paper and collect results
-        result = processor.process_with_details(paper_id)
-        results.append(result)
-        
+    # Process papers in batches and collect results
+    results = process_papers(paper_ids)
+
+    for paper_id, result in zip(paper_ids, results):
         if result["status"] == "success":
             logger.info(f"Successfully processed paper: {paper_id}")
         else:
@@ -126,16 +167,13 @@ def ingest(
 
     exporter = BatchResultExporter()
     exporter.start_timing()
-    results = []
 
     logger.info(f"Processing {len(paper_ids)} paper(s) from {input_file}...")
 
-    for paper_id in paper_ids:
-        logger.info(f"Processing paper ID: {paper_id}")
-        # Process paper and collect results
-        result = processor.process_with_details(paper_id)
-        results.append(result)
-        
+    # Process papers in batches and collect results
+    results = process_papers(paper_ids)
+
+    for paper_id, result in zip(paper_ids, results):
         if result["status"] == "success":
             logger.info(f"Successfully processed paper: {paper_id}")
         else:
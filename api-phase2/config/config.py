@@ -5,20 +5,44 @@ from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+# The ncbi.api_key value shipped in settings.yaml, which is not a real key
+PLACEHOLDER_NCBI_API_KEY = "your_ncbi_api_key_here"
+
 
 class NCBIConfig(BaseModel):
     """NCBI-specific configuration"""
     api_key: Optional[str] = Field(default=None)
     pmc_base_url: str = Field(default="https://www.ncbi.nlm.nih.gov/research/bionlp/RESTful/pmcoa.cgi")
     pubtator_base_url: str = Field(default="https://www.ncbi.nlm.nih.gov/research/pubtator3-api/publications/export/pubtator")
+    pubtator_batch_size: int = Field(default=100)  # Max IDs per PubTator export request
+    idconv_base_url: str = Field(default="https://pmc.ncbi.nlm.nih.gov/tools/idconv/api/v1/articles/")
+    idconv_batch_size: int = Field(default=200)  # Max IDs per ID converter request
+    id_alias_negative_ttl: int = Field(default=86400)  # Seconds an "ID has no counterpart" answer is trusted
+    offline_id_conversion: bool = Field(default=False)  # Only use stored/imported ID mappings
     request_timeout: int = Field(default=30)
     retry_attempts: int = Field(default=3)
     retry_delay: int = Field(default=1)
+    max_concurrent_requests: int = Field(default=5)  # Concurrency limit for async/pooled HTTP
+    max_retry_delay: float = Field(default=60.0)  # Cap in seconds on a retry's backoff, Retry-After included
+    rate_limit: Optional[float] = Field(default=None)  # Requests/second; defaults to 10 for requests sent with api_key, 3 without
+    endpoint_rate_limits: Dict[str, float] = Field(default_factory=dict)  # Per-endpoint overrides (pmc, pubtator, idconv), each then limited separately
+    rate_limit_dir: str = Field(default="data/ratelimit")  # Shared bucket state for all local processes
+
+    def usable_api_key(self) -> Optional[str]:
+        """The configured API key, or None when it is unset or still the settings.yaml placeholder"""
+        if not self.api_key or self.api_key == PLACEHOLDER_NCBI_API_KEY:
+            return None
+        return self.api_key
 
 
 class ApiConfig(BaseModel):
     """API configuration"""
     api_key: str = Field(default="changeme123")
+    job_event_buffer: int = Field(default=256)  # Job events buffered per /api/jobs/{id}/events listener
+    job_workers: int = Field(default=1)  # Threads taking queued /api/process and /api/upload jobs; the pipeline still runs one job at a time
+    search_cache_size: int = Field(default=256)  # Cached /api/search responses, 0 disables the cache
+    search_cache_ttl: int = Field(default=300)  # Seconds a cached search response is served
+    stream_chunk_size: int = Field(default=500)  # Papers read from DuckDB per chunk of a streamed (NDJSON) response or export
 
 
 class StorageConfig(BaseModel):
@@ -27,7 +51,10 @@ class StorageConfig(BaseModel):
     db_path: str = Field(default="data/figurex.db")
     cache_enabled: bool = Field(default=True)
     cache_ttl: int = Field(default=86400)  # 24 hours in seconds
+    cache_dir: str = Field(default="data/cache")
+    cache_max_size_mb: int = Field(default=512)
     auto_update_schema: bool = Field(default=True)
+    paper_cache_mb: int = Field(default=64)  # Memory for hydrated papers shared in-process, 0 disables
 
 
 class ProcessingConfig(BaseModel):
@@ -40,6 +67,18 @@ class ProcessingConfig(BaseModel):
     batch_size: int = Field(default=10)
 
 
+class PipelineConfig(BaseModel):
+    """Ingestion pipeline configuration"""
+    fetch_workers: int = Field(default=4)  # Threads downloading PMC articles
+    parse_workers: int = Field(default=2)  # Processes parsing BioC XML
+    clean_workers: int = Field(default=2)  # Processes cleaning captions
+    annotate_workers: int = Field(default=2)  # Threads fetching PubTator annotations
+    annotate_batch_wait: float = Field(default=0.5)  # Seconds to wait to fill a PubTator batch
+    store_batch_size: int = Field(default=50)  # Max papers saved per DuckDB batch write
+    queue_size: int = Field(default=32)  # Max papers waiting in front of each stage
+    use_process_pool: bool = Field(default=True)  # False runs parse/clean on threads
+
+
 class OutputConfig(BaseModel):
     """Output configuration"""
     formats: list = Field(default=["json", "csv"])
@@ -65,6 +104,7 @@ class Config(BaseModel):
     ncbi: NCBIConfig = Field(default_factory=NCBIConfig)
     storage: StorageConfig = Field(default_factory=StorageConfig)
     processing: ProcessingConfig = Field(default_factory=ProcessingConfig)
+    pipeline: PipelineConfig = Field(default_factory=PipelineConfig)
     output: OutputConfig = Field(default_factory=OutputConfig)
     logging: LoggingConfig = Field(default_factory=LoggingConfig)
     api: ApiConfig = Field(default_factory=ApiConfig)
@@ -87,6 +127,7 @@ class Config(BaseModel):
         """Update configuration from environment variables"""
         env_mapping = {
             'NCBI_API_KEY': ('ncbi', 'api_key'),
+            'OFFLINE_ID_CONVERSION': ('ncbi', 'offline_id_conversion'),
             'LOG_LEVEL': ('logging', 'level'),
             'DB_PATH': ('storage', 'db_path'),
             'OUTPUT_DIR': ('output', 'output_dir'),
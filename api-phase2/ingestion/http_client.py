@@ -0,0 +1,200 @@
+# ingestion/http_client.py
+import asyncio
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from config.config import get_config
+from ingestion.rate_limiter import get_rate_limiter
+from storage.response_cache import get_response_cache
+from utils.logging import get_logger
+
+logger = get_logger("figurex.http")
+
+# Responses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Credentials sent as query parameters, masked wherever a URL is logged
+_CREDENTIAL_PARAMS = re.compile(r"\b(api_key)=[^&\s]+")
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide requests session shared by all NCBI clients, so
+    connections (and TLS handshakes) are reused across requests.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = max(1, get_config().ncbi.max_concurrent_requests)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def redact_url(text: str) -> str:
+    """Mask credentials (the NCBI api_key) in a URL, or in a message quoting one"""
+    return _CREDENTIAL_PARAMS.sub(r"\1=***", text)
+
+
+def _timeout(timeout: Optional[float]) -> float:
+    return timeout if timeout is not None else get_config().ncbi.request_timeout
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff with full jitter based on `ncbi.retry_delay`,
+    never shorter than what the server asked for via Retry-After, and
+    never longer than `ncbi.max_retry_delay`.
+    """
+    ncbi = get_config().ncbi
+    delay = random.uniform(0, min(ncbi.retry_delay * (2 ** attempt), ncbi.max_retry_delay))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return min(delay, ncbi.max_retry_delay)
+
+
+def _log_retry(url: str, reason: str, attempt: int, attempts: int, delay: float) -> None:
+    logger.warning(f"Request to {redact_url(url)} failed ({reason}), retry {attempt + 1}/{attempts - 1} in {delay:.1f}s")
+
+
+def _cached(url: str, cache: bool, validate: Optional[Callable[[str], bool]]):
+    """
+    The response cache to use for a request (None when bypassed) and the
+    valid body already cached for `url`, if any
+    """
+    response_cache = get_response_cache() if cache else None
+    if response_cache is None:
+        return None, None
+    cached = response_cache.get(url)
+    if cached is not None and validate is not None and not validate(cached):
+        cached = None
+    if cached is not None:
+        logger.debug(f"Response cache hit for {redact_url(url)}")
+    return response_cache, cached
+
+
+def _store(response_cache, url: str, text: str, validate: Optional[Callable[[str], bool]]) -> None:
+    """Cache a response body, unless `validate` rejects it"""
+    if response_cache is None:
+        return
+    if validate is not None and not validate(text):
+        logger.debug(f"Not caching rejected response for {redact_url(url)}")
+        return
+    response_cache.put(url, text)
+
+
+def fetch_text(url: str, endpoint: Optional[str] = None, timeout: Optional[float] = None,
+               cache: bool = True, validate: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    GET a URL over the shared session and return the response body.
+
+    Successful responses are kept in the on-disk response cache (when
+    `storage.cache_enabled`) and served from it without touching the
+    network or the rate limiter; pass `cache=False` to bypass it. When
+    `validate` is given, only bodies it accepts are cached or served from
+    the cache (e.g. not an error message sent with a 200). When
+    `endpoint` is given every attempt is paced by that endpoint's
+    host-wide rate limiter. Transient failures (429, 5xx, connection errors
+    and timeouts) are retried `ncbi.retry_attempts` times with exponential
+    backoff and jitter, honoring Retry-After up to `ncbi.max_retry_delay`.
+    `timeout` defaults to `ncbi.request_timeout`.
+    """
+    response_cache, cached = _cached(url, cache, validate)
+    if cached is not None:
+        return cached
+
+    attempts = get_config().ncbi.retry_attempts + 1
+    for attempt in range(attempts):
+        if endpoint:
+            get_rate_limiter(endpoint).acquire()
+        try:
+            response = get_session().get(url, timeout=_timeout(timeout))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt + 1 >= attempts:
+                raise
+            delay = _backoff(attempt)
+            _log_retry(url, type(e).__name__, attempt, attempts, delay)
+            time.sleep(delay)
+            continue
+
+        if response.status_code in RETRYABLE_STATUS and attempt + 1 < attempts:
+            delay = _backoff(attempt, _retry_after(response.headers.get("Retry-After")))
+            _log_retry(url, f"HTTP {response.status_code}", attempt, attempts, delay)
+            time.sleep(delay)
+            continue
+
+        response.raise_for_status()
+        _store(response_cache, url, response.text, validate)
+        return response.text
+
+
+def create_async_client(max_connections: Optional[int] = None) -> httpx.AsyncClient:
+    """
+    Create a pooled async HTTP client. The caller owns the client and should
+    close it (e.g. `async with create_async_client() as client:`).
+    """
+    if max_connections is None:
+        max_connections = get_config().ncbi.max_concurrent_requests
+    max_connections = max(1, max_connections)
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return httpx.AsyncClient(limits=limits, timeout=None, follow_redirects=True)
+
+
+async def fetch_text_async(client: httpx.AsyncClient, url: str, endpoint: Optional[str] = None,
+                           timeout: Optional[float] = None, cache: bool = True,
+                           validate: Optional[Callable[[str], bool]] = None) -> str:
+    """GET a URL with an async client and return the response body (see `fetch_text`)"""
+    response_cache, cached = _cached(url, cache, validate)
+    if cached is not None:
+        return cached
+
+    attempts = get_config().ncbi.retry_attempts + 1
+    for attempt in range(attempts):
+        if endpoint:
+            await get_rate_limiter(endpoint).acquire_async()
+        try:
+            response = await client.get(url, timeout=_timeout(timeout))
+        except httpx.TransportError as e:
+            if attempt + 1 >= attempts:
+                raise
+            delay = _backoff(attempt)
+            _log_retry(url, type(e).__name__, attempt, attempts, delay)
+            await asyncio.sleep(delay)
+            continue
+
+        if response.status_code in RETRYABLE_STATUS and attempt + 1 < attempts:
+            delay = _backoff(attempt, _retry_after(response.headers.get("Retry-After")))
+            _log_retry(url, f"HTTP {response.status_code}", attempt, attempts, delay)
+            await asyncio.sleep(delay)
+            continue
+
+        response.raise_for_status()
+        _store(response_cache, url, response.text, validate)
+        return response.text
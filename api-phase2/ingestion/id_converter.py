@@ -1,8 +1,11 @@
 # ingestion/id_converter.py
 
-import requests
+import json
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, List, Tuple
+from config.config import get_config
+from ingestion.http_client import fetch_text, redact_url
+from storage.duckdb_backend import get_storage
 from utils.logging import get_logger
 
 logger = get_logger()
@@ -14,83 +17,145 @@ def is_pmid(paper_id: str) -> bool:
     return paper_id.isdigit()
 
 
-@lru_cache(maxsize=128)
-def convert_pmid_to_pmc(pmid: str) -> str:
-    """Convert a PMID to a PMC ID using NCBI E-utilities"""
-    try:
-        # Use the E-utilities API to convert PMID to PMC ID
-        url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi?db=pubmed&id={pmid}&retmode=json"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        # Check if the article has a PMC ID
-        result = data.get('result', {})
-        article = result.get(pmid, {})
-
-        # Look for PMC ID in the article data
-        article_ids = article.get('articleids', [])
-        for id_obj in article_ids:
-            if id_obj.get('idtype') == 'pmc':
-                pmc_id = id_obj.get('value', '')
-                if pmc_id:
-                    if not pmc_id.startswith("PMC"):
-                        pmc_id = f"PMC{pmc_id}"
-                    return pmc_id
-
-        logger.warning(f"No PMC ID found for PMID {pmid}")
-        return ""
-    except Exception as e:
-        logger.error(f"Failed to convert PMID to PMC: {e}")
-        return ""
+def _with_pmc_prefix(paper_id: str) -> str:
+    """Ensure PMC ID has the PMC prefix"""
+    return paper_id if paper_id.startswith("PMC") else f"PMC{paper_id}"
 
 
-@lru_cache(maxsize=128)
-def convert_pmc_to_pmid(pmc_id: str) -> str:
-    """Convert a PMC ID to a PMID using NCBI E-utilities"""
-    # Remove 'PMC' prefix if present for the API call
-    pmc_numeric_id = pmc_id.replace("PMC", "")
-
-    try:
-        # Use the E-utilities API to convert PMC ID to PMID
-        url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi?db=pubmed&term={pmc_id}[pmcid]&retmode=json"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        # Extract the PMID
-        id_list = data.get('esearchresult', {}).get('idlist', [])
-        if id_list:
-            return id_list[0]
-
-        logger.warning(f"No PMID found for PMC ID {pmc_id}")
-        return ""
-    except Exception as e:
-        logger.error(f"Failed to convert PMC to PMID: {e}")
-        return ""
-
-
-def normalize_paper_id(paper_id: str) -> tuple[str, str, str]:
+def _fetch_id_conversions(ids: List[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
     """
-    Normalize a paper ID to get both PMC ID and PMID formats.
+    Resolve PMIDs and PMC IDs through the NCBI PMC ID converter, sending up to
+    `ncbi.idconv_batch_size` IDs per request.
 
     Returns:
-        tuple: (original_id, pmc_id, pmid)
+        Tuple[Dict[str, str], Dict[str, str]]: (pmid_to_pmc, pmc_to_pmid) for
+        every requested ID that the converter answered for. IDs without a
+        counterpart map to an empty string; IDs from failed requests are absent.
     """
-    original_id = paper_id
-    pmc_id = ""
-    pmid = ""
-
-    if is_pmid(paper_id):
-        pmid = paper_id
-        pmc_id = convert_pmid_to_pmc(paper_id)
-    else:
-        # Ensure PMC ID has the PMC prefix
-        if not paper_id.startswith("PMC"):
-            pmc_id = f"PMC{paper_id}"
+    config = get_config()
+    batch_size = max(1, config.ncbi.idconv_batch_size)
+    pmid_to_pmc: Dict[str, str] = {}
+    pmc_to_pmid: Dict[str, str] = {}
+
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i + batch_size]
+        url = f"{config.ncbi.idconv_base_url}?ids={','.join(chunk)}&format=json&tool=figurex"
+        api_key = config.ncbi.usable_api_key()
+        if api_key:
+            # The key is what entitles us to the higher NCBI rate limit
+            url += f"&api_key={api_key}"
+        logger.info(f"Resolving {len(chunk)} ID(s) via the NCBI ID converter")
+        try:
+            data = json.loads(fetch_text(url, endpoint="idconv"))
+        except Exception as e:
+            logger.error(f"Failed to convert IDs: {redact_url(str(e))}")
+            continue
+
+        for record in data.get('records', []):
+            requested = str(record.get('requested-id', ''))
+            pmid = str(record.get('pmid') or '')
+            pmc_id = record.get('pmcid') or ''
+            if pmc_id:
+                pmc_id = _with_pmc_prefix(pmc_id)
+
+            if is_pmid(requested):
+                pmid_to_pmc[requested] = pmc_id
+            elif requested:
+                pmc_to_pmid[_with_pmc_prefix(requested)] = pmid
+
+            # The converter answers both directions at once
+            if pmid and pmc_id:
+                pmid_to_pmc[pmid] = pmc_id
+                pmc_to_pmid[pmc_id] = pmid
+
+        # Anything the converter skipped in a successful response is unknown to it
+        for requested in chunk:
+            if is_pmid(requested):
+                pmid_to_pmc.setdefault(requested, "")
+            else:
+                pmc_to_pmid.setdefault(requested, "")
+
+    return pmid_to_pmc, pmc_to_pmid
+
+
+def resolve_paper_ids(paper_ids: List[str], storage=None) -> Dict[str, Tuple[str, str, str]]:
+    """
+    Normalize many paper IDs at once.
+
+    Mappings already stored in the `id_aliases` table of `storage` (including
+    ones imported from the PMC-ids.csv dump) are used first; the rest are
+    resolved in bulk through the NCBI ID converter and saved back to
+    `storage` so they are never requested again. IDs the converter had no
+    counterpart for are only trusted for `ncbi.id_alias_negative_ttl`
+    seconds, then looked up again. With `ncbi.offline_id_conversion` set,
+    no network calls are made at all.
+
+    Returns:
+        Dict mapping each input ID to (original_id, pmc_id, pmid)
+    """
+    pmids = list(dict.fromkeys(pid for pid in paper_ids if is_pmid(pid)))
+    pmc_ids = list(dict.fromkeys(_with_pmc_prefix(pid) for pid in paper_ids if not is_pmid(pid)))
+
+    pmid_to_pmc: Dict[str, str] = {}
+    pmc_to_pmid: Dict[str, str] = {}
+    if storage is not None:
+        pmid_to_pmc, pmc_to_pmid = storage.get_id_aliases(
+            pmids, pmc_ids, negative_ttl=get_config().ncbi.id_alias_negative_ttl
+        )
+
+    missing = [pid for pid in pmids if pid not in pmid_to_pmc]
+    missing += [pid for pid in pmc_ids if pid not in pmc_to_pmid]
+    if missing and get_config().ncbi.offline_id_conversion:
+        logger.info(f"Offline ID conversion enabled, leaving {len(missing)} unmapped ID(s) unresolved")
+    elif missing:
+        fetched_pmid_to_pmc, fetched_pmc_to_pmid = _fetch_id_conversions(missing)
+        if storage is not None:
+            aliases = list(fetched_pmid_to_pmc.items())
+            aliases += [(pmid, pmc_id) for pmc_id, pmid in fetched_pmc_to_pmid.items()]
+            storage.save_id_aliases(aliases)
+        for pid, pmc_id in fetched_pmid_to_pmc.items():
+            pmid_to_pmc.setdefault(pid, pmc_id)
+        for pid, pmid in fetched_pmc_to_pmid.items():
+            pmc_to_pmid.setdefault(pid, pmid)
+
+    resolved = {}
+    for paper_id in paper_ids:
+        if is_pmid(paper_id):
+            pmc_id = pmid_to_pmc.get(paper_id, "")
+            if not pmc_id:
+                logger.warning(f"No PMC ID found for PMID {paper_id}")
+            resolved[paper_id] = (paper_id, pmc_id, paper_id)
         else:
-            pmc_id = paper_id
+            pmc_id = _with_pmc_prefix(paper_id)
+            pmid = pmc_to_pmid.get(pmc_id, "")
+            if not pmid:
+                logger.warning(f"No PMID found for PMC ID {pmc_id}")
+            resolved[paper_id] = (paper_id, pmc_id, pmid)
+    return resolved
+
 
-        pmid = convert_pmc_to_pmid(pmc_id)
+def convert_pmid_to_pmc(pmid: str, storage=None) -> str:
+    """
+    Convert a PMID to a PMC ID using the NCBI ID converter, through the
+    stored mappings of `storage` (the process-wide storage service by default)
+    """
+    return resolve_paper_ids([pmid], storage or get_storage())[pmid][1]
 
-    return original_id, pmc_id, pmid
\ No newline at end of file
+
+def convert_pmc_to_pmid(pmc_id: str, storage=None) -> str:
+    """
+    Convert a PMC ID to a PMID using the NCBI ID converter, through the
+    stored mappings of `storage` (the process-wide storage service by default)
+    """
+    return resolve_paper_ids([pmc_id], storage or get_storage())[pmc_id][2]
+
+
+def normalize_paper_id(paper_id: str, storage=None) -> tuple[str, str, str]:
+    """
+    Normalize a paper ID to get both PMC ID and PMID formats, through the
+    stored mappings of `storage` (the process-wide storage service by default).
+
+    Returns:
+        tuple: (original_id, pmc_id, pmid)
+    """
+    return resolve_paper_ids([paper_id], storage or get_storage())[paper_id]
@@ -0,0 +1,338 @@
+# ingestion/jobs.py
+import asyncio
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from ingestion.pipeline import IngestionPipeline
+from storage.duckdb_backend import DuckDBStorage
+from utils.logging import get_logger
+
+logger = get_logger("figurex.jobs")
+
+# Per-ID results are written to DuckDB once this many have piled up, or this
+# many seconds after the last write
+RESULT_FLUSH_SIZE = 100
+RESULT_FLUSH_INTERVAL = 1.0
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class _Subscriber:
+    """
+    One listener's bounded buffer of (event, JSON data) pairs, filled on its
+    event loop. When the listener falls behind the oldest events are dropped
+    rather than holding up the workers.
+    """
+
+    def __init__(self, max_events: int):
+        self.events: deque = deque(maxlen=max(1, max_events))
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, event: str, payload: str) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append((event, payload))
+        self.ready.set()
+
+
+def _deliver(subscribers: List[_Subscriber], event: str, payload: str) -> None:
+    for subscriber in subscribers:
+        subscriber.push(event, payload)
+
+
+class JobQueue:
+    """
+    Background processing jobs. submit() records a job in DuckDB and returns
+    its ID right away; `workers` threads take queued jobs and run their
+    paper IDs through the ingestion pipeline. Per-ID results are stored as
+    papers finish, so get() reports progress while a job runs, and recover()
+    resumes jobs an earlier process left unfinished with the IDs that have
+    no result yet.
+
+    events() streams a job's progress to any number of listeners: every
+    event is encoded once and handed to each listening event loop in one
+    call, where it lands in each listener's buffer of at most `event_buffer`
+    events.
+    """
+
+    def __init__(self, pipeline: IngestionPipeline, storage: DuckDBStorage, workers: int = 1,
+                 on_complete: Optional[Callable[[Dict[str, Any]], None]] = None, event_buffer: int = 256):
+        self.pipeline = pipeline
+        self.storage = storage
+        self.workers = max(1, workers)
+        self.on_complete = on_complete
+        self.event_buffer = event_buffer
+        self._queue: queue.Queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        # Results of running jobs not yet written to DuckDB, and when each
+        # job's results were last written
+        self._pending: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        self._flushed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Live counters of running jobs, and the listeners of each job
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, _Subscriber]]] = {}
+        self._subscribers_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the worker threads (once)"""
+        with self._start_lock:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, paper_ids: List[str]) -> str:
+        """Queue a job processing `paper_ids` and return its ID"""
+        job_id = uuid.uuid4().hex
+        self.storage.create_job(job_id, paper_ids)
+        self.start()
+        self._queue.put(job_id)
+        logger.info(f"Queued job {job_id} for {len(paper_ids)} paper(s)")
+        return job_id
+
+    def recover(self) -> int:
+        """Re-queue the jobs left queued or running by a previous process"""
+        job_ids = self.storage.get_unfinished_job_ids()
+        for job_id in job_ids:
+            self.storage.update_job_status(job_id, "queued")
+            self._queue.put(job_id)
+        if job_ids:
+            self.start()
+            logger.info(f"Resumed {len(job_ids)} unfinished job(s)")
+        return len(job_ids)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        A job's status, progress counters and the per-ID results so far
+        (`processed_ids`, in request order), or None if there is no such job
+        """
+        with self._lock:
+            job = self.storage.get_job(job_id)
+            pending = list(self._pending.get(job_id, ()))
+        if job is None:
+            return None
+
+        results = job.pop("results")
+        results.update(pending)
+        processed = [results[position] for position in sorted(results)]
+        success_count = sum(1 for result in processed if result.get("status") == "success")
+        job.update(
+            total=len(job.pop("paper_ids")),
+            processed=len(processed),
+            success_count=success_count,
+            failed_count=len(processed) - success_count,
+            processed_ids=processed,
+        )
+        return job
+
+    def summary(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        A job's status and progress counters, with throughput and ETA while
+        it runs, without loading its results; None if there is no such job
+        """
+        with self._lock:
+            summary = self.storage.get_job_summary(job_id)
+            if summary is None:
+                return None
+            pending = self._pending.get(job_id, ())
+            summary["processed"] += len(pending)
+            summary["success_count"] += sum(1 for _, result in pending if result.get("status") == "success")
+            progress = self._progress.get(job_id)
+            rates = self._rates(progress) if progress is not None else {
+                "throughput_per_second": None, "eta_seconds": None
+            }
+        summary["failed_count"] = summary["processed"] - summary["success_count"]
+        summary.update(rates)
+        return summary
+
+    async def events(self, job_id: str, keepalive: float = 15.0) -> AsyncIterator[Tuple[Optional[str], str]]:
+        """
+        Stream a job's events as (event, JSON data) pairs: a `progress`
+        snapshot, a `status` event when it starts running, a `paper` event
+        per finished paper (with the updated counters, throughput and ETA)
+        and a final `done`. Yields a `dropped` event with the number of
+        events lost after falling behind, and (None, "") after `keepalive`
+        seconds without events. Ends right after the snapshot for unknown
+        or finished jobs.
+        """
+        loop = asyncio.get_running_loop()
+        subscriber = _Subscriber(self.event_buffer)
+        entry = (loop, subscriber)
+        # Subscribe before taking the snapshot so no event falls in between
+        with self._subscribers_lock:
+            self._subscribers.setdefault(job_id, set()).add(entry)
+        try:
+            snapshot = await loop.run_in_executor(None, self.summary, job_id)
+            if snapshot is None:
+                return
+            yield "progress", json.dumps(snapshot, default=str)
+            if snapshot["status"] in FINISHED_STATUSES:
+                return
+
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None, ""
+                    continue
+                subscriber.ready.clear()
+                if subscriber.dropped:
+                    yield "dropped", json.dumps({"events": subscriber.dropped})
+                    subscriber.dropped = 0
+                while subscriber.events:
+                    event, payload = subscriber.events.popleft()
+                    yield event, payload
+                    if event == "done":
+                        return
+        finally:
+            with self._subscribers_lock:
+                listeners = self._subscribers.get(job_id)
+                listeners.discard(entry)
+                if not listeners:
+                    del self._subscribers[job_id]
+
+    def _publish(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        """Hand an event to every listener of a job"""
+        with self._subscribers_lock:
+            listeners = list(self._subscribers.get(job_id, ()))
+        if not listeners:
+            return
+        payload = json.dumps(data, default=str)
+        by_loop: Dict[asyncio.AbstractEventLoop, List[_Subscriber]] = {}
+        for loop, subscriber in listeners:
+            by_loop.setdefault(loop, []).append(subscriber)
+        for loop, subscribers in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, subscribers, event, payload)
+            except RuntimeError:
+                # The listener's event loop has been closed
+                pass
+
+    @staticmethod
+    def _rates(progress: Dict[str, Any]) -> Dict[str, Any]:
+        """Throughput of the current run and the time left at that rate"""
+        elapsed = time.perf_counter() - progress["started"]
+        throughput = progress["run_processed"] / elapsed if elapsed > 0 else 0.0
+        remaining = progress["total"] - progress["processed"]
+        return {
+            "throughput_per_second": round(throughput, 3),
+            "eta_seconds": round(remaining / throughput, 1) if throughput > 0 else None,
+        }
+
+    def _progress_event(self, job_id: str, status: str) -> Dict[str, Any]:
+        """Counters, throughput and ETA of a running job (called with the lock held)"""
+        progress = self._progress[job_id]
+        return {
+            "job_id": job_id,
+            "status": status,
+            "total": progress["total"],
+            "processed": progress["processed"],
+            "success_count": progress["success_count"],
+            "failed_count": progress["processed"] - progress["success_count"],
+            **self._rates(progress),
+        }
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                try:
+                    self.storage.update_job_status(job_id, "failed", str(e))
+                except Exception as e:
+                    logger.error(f"Error marking job {job_id} as failed: {e}")
+                summary = self.summary(job_id)
+                if summary is not None:
+                    self._publish(job_id, "done", summary)
+            finally:
+                with self._lock:
+                    self._progress.pop(job_id, None)
+                self._queue.task_done()
+
+    def _run(self, job_id: str) -> None:
+        job = self.storage.get_job(job_id)
+        if job is None:
+            return
+        paper_ids = job["paper_ids"]
+        positions = [position for position in range(len(paper_ids)) if position not in job["results"]]
+
+        self.storage.update_job_status(job_id, "running")
+        success_count = sum(1 for result in job["results"].values() if result.get("status") == "success")
+        with self._lock:
+            self._pending[job_id] = []
+            self._flushed_at[job_id] = time.monotonic()
+            self._progress[job_id] = {
+                "total": len(paper_ids),
+                "processed": len(job["results"]),
+                "success_count": success_count,
+                "run_processed": 0,
+                "started": time.perf_counter(),
+            }
+            event = self._progress_event(job_id, "running")
+        self._publish(job_id, "status", event)
+        start = time.perf_counter()
+        try:
+            self.pipeline.run(
+                [paper_ids[position] for position in positions],
+                on_result=lambda index, result: self._add_result(job_id, positions[index], result)
+            )
+        finally:
+            with self._lock:
+                self._flush(job_id)
+                del self._pending[job_id]
+                del self._flushed_at[job_id]
+
+        self.storage.update_job_status(job_id, "completed")
+        logger.info(f"Job {job_id} completed {len(positions)} paper(s) in {time.perf_counter() - start:.2f}s")
+        with self._lock:
+            event = self._progress_event(job_id, "completed")
+        self._publish(job_id, "done", event)
+        if self.on_complete is not None:
+            self.on_complete(self.get(job_id))
+
+    def _add_result(self, job_id: str, position: int, result: Dict[str, Any]) -> None:
+        """
+        Buffer a finished paper's result, writing the buffer out when due,
+        and tell the job's listeners
+        """
+        with self._lock:
+            progress = self._progress[job_id]
+            progress["processed"] += 1
+            progress["run_processed"] += 1
+            if result.get("status") == "success":
+                progress["success_count"] += 1
+            event = self._progress_event(job_id, "running")
+
+            pending = self._pending[job_id]
+            pending.append((position, result))
+            if (len(pending) >= RESULT_FLUSH_SIZE
+                    or time.monotonic() - self._flushed_at[job_id] >= RESULT_FLUSH_INTERVAL):
+                self._flush(job_id)
+
+        event.update(
+            position=position,
+            paper_id=result.get("paper_id"),
+            paper_status=result.get("status"),
+            error=result.get("error"),
+            figure_count=len(result.get("figures") or ()),
+        )
+        self._publish(job_id, "paper", event)
+
+    def _flush(self, job_id: str) -> None:
+        """Write a job's buffered results (called with the lock held)"""
+        pending = self._pending[job_id]
+        if pending:
+            self.storage.save_job_results(job_id, pending)
+            pending.clear()
+        self._flushed_at[job_id] = time.monotonic()
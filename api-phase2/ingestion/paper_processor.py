@@ -1,14 +1,18 @@
 # ingestion/paper_processor.py
 
-from ingestion.pmc_ingestor import PMCIngestor
-from ingestion.pubtator_client import PubTatorClient
-from ingestion.id_converter import normalize_paper_id
-from storage.duckdb_backend import DuckDBStorage
+from ingestion.pmc_ingestor import PMCIngestor, AsyncPMCIngestor
+from ingestion.pubtator_client import PubTatorClient, AsyncPubTatorClient
+from ingestion.http_client import create_async_client
+from ingestion.id_converter import resolve_paper_ids
+from storage.duckdb_backend import DuckDBStorage, get_storage
 from processing.caption_cleaner import CaptionCleaner
 from processing.entity_mapper import EntityMapper
 from utils.logging import get_logger
-from typing import Dict, Any, List
-from models.paper import Paper
+from config.config import get_config
+from typing import Dict, Any, List, Optional, Tuple, Union
+from models.paper import Paper, Entity
+import asyncio
+import time
 
 logger = get_logger()
 
@@ -16,74 +20,148 @@ logger = get_logger()
 class PaperProcessor:
     """Class to handle paper processing workflow"""
 
-    def __init__(self):
+    def __init__(self, storage: Optional[DuckDBStorage] = None):
         self.pmc_ingestor = PMCIngestor()
         self.pubtator_client = PubTatorClient()
-        self.storage = DuckDBStorage()
+        # The process-wide storage service unless one is injected
+        self.storage = storage or get_storage()
         self.caption_cleaner = CaptionCleaner()
         self.entity_mapper = EntityMapper()
+        # Running counters for PubTator usage across all processed papers
+        self.stats = {
+            "pubtator_calls": 0,
+            "pubtator_calls_saved": 0,
+        }
 
-    def _process_paper_from_api(self, original_id: str, pmc_id: str, pmid: str) -> Dict[str, Any]:
+    def _fetch_paper(self, original_id: str, pmc_id: str) -> Union[Paper, Dict[str, Any]]:
         """
-        Process a paper by fetching data from external APIs.
-        This is an internal method used when the paper is not in the database
-        or needs to be refreshed.
+        Fetch the paper content from PMC.
+        Returns the Paper, or an error result if PMC returned nothing.
         """
-        # Fetch the paper content from PMC
         logger.info(f"Fetching paper with PMC ID: {pmc_id}")
         paper = self.pmc_ingestor.fetch(pmc_id)
 
         if not paper:
-            return {
-                "paper_id": original_id,
-                "source": "PMC",
-                "status": "error",
-                "error": f"Failed to fetch paper with PMC ID: {pmc_id}"
-            }
+            return self._fetch_failed_result(original_id, pmc_id)
+        return paper
 
-        # Use PMID for PubTator if available, otherwise use PMC ID without prefix
-        pubtator_id = pmid if pmid else pmc_id.replace("PMC", "")
+    @staticmethod
+    def _fetch_failed_result(original_id: str, pmc_id: str) -> Dict[str, Any]:
+        """Build the error result for a paper PMC returned nothing for."""
+        return {
+            "paper_id": original_id,
+            "source": "PMC",
+            "status": "error",
+            "error": f"Failed to fetch paper with PMC ID: {pmc_id}"
+        }
+
+    @staticmethod
+    def _pubtator_id(pmc_id: str, pmid: str) -> str:
+        """Use PMID for PubTator if available, otherwise use PMC ID without prefix"""
+        return pmid if pmid else pmc_id.replace("PMC", "")
 
-        # Process each figure
-        processed_figures = []
+    def _clean_captions(self, paper: Paper) -> Paper:
+        """Clean the caption of every figure in place"""
         for fig in paper.figures:
-            # Clean the caption
             self.caption_cleaner.process_figure(fig)
+        return paper
 
-            # Fetch entities
+    def _annotate(self, paper: Paper, paper_entities: List[Entity]) -> Paper:
+        """Attach the paper's entities to each figure, recording where each one appears in its caption"""
+        for fig in paper.figures:
             logger.info(f"Annotating figure: {fig.label}")
-            fig.entities = self.pubtator_client.fetch_entities(pubtator_id)
-
-            # Process entities
-            fig.entities = self.entity_mapper.process_entities(fig.entities)
+            fig.entities = self.entity_mapper.process_entities(paper_entities)
             fig.entities = self.entity_mapper.map_entities_to_caption(fig.caption, fig.entities)
+        return paper
 
-            # Convert figure to dict format
-            processed_figures.append({
-                "figure_id": fig.label,
-                "caption": fig.caption,
-                "figure_url": fig.url,
-                "entities": [
-                    {
-                        "entity": entity.text,
-                        "type": entity.type
-                    }
-                    for entity in fig.entities
-                ]
-            })
-
+    def _save(self, original_id: str, paper: Paper) -> Dict[str, Any]:
+        """Save an annotated paper and build its success result"""
         # Save to database
         self.storage.save_paper(paper)
 
         # Return success result with paper details
-        return {
-            "paper_id": original_id,
-            "source": "PMC",
-            "status": "success",
-            "title": paper.title,
-            "abstract": paper.abstract,
-            "figures": processed_figures
-        }
+        return self._success_result(original_id, paper)
+
+    def _success_result(self, original_id: str, paper: Paper) -> Dict[str, Any]:
+        result = self._convert_paper_to_dict(paper)
+        result["paper_id"] = original_id
+        return result
+
+    def _save_many(self, annotated: List[Tuple[Any, str, Paper]]) -> Dict[Any, Dict[str, Any]]:
+        """
+        Save annotated (key, original_id, paper) entries in one batch write and
+        return their results by key. If the batch write fails, papers are
+        saved one by one so a single bad paper only fails itself.
+        """
+        if not annotated:
+            return {}
+        try:
+            self.storage.save_papers([paper for _, _, paper in annotated])
+            return {key: self._success_result(original_id, paper) for key, original_id, paper in annotated}
+        except Exception as e:
+            logger.warning(f"Batch save of {len(annotated)} paper(s) failed, saving individually: {e}")
+
+        results = {}
+        for key, original_id, paper in annotated:
+            try:
+                results[key] = self._save(original_id, paper)
+            except Exception as e:
+                logger.error(f"Error processing paper {original_id}: {e}")
+                results[key] = self._error_result(original_id, str(e))
+        return results
+
+    def _pubtator_ids_for(self, fetched: List[Tuple[int, str, str, str, Paper]]) -> List[str]:
+        """Unique PubTator IDs of the fetched papers that have figures to annotate"""
+        return list(dict.fromkeys(
+            self._pubtator_id(pmc_id, pmid)
+            for _, _, pmc_id, pmid, paper in fetched
+            if paper.figures
+        ))
+
+    def _record_pubtator_stats(self, fetched: List[Tuple[int, str, str, str, Paper]],
+                               fetch_stats: Dict[str, Any], elapsed: float) -> None:
+        """
+        Update the PubTator counters after annotating a set of papers.
+
+        `fetch_stats` holds what the client actually did: the number of
+        requests sent and the documents served from the response cache.
+        Without sharing, every figure used to cost its own PubTator request.
+        """
+        calls = fetch_stats.get("requests", 0)
+        cached = fetch_stats.get("cached", set())
+        figure_count = 0
+        papers = 0
+        for _, _, pmc_id, pmid, paper in fetched:
+            if not paper.figures:
+                continue
+            papers += 1
+            figure_count += len(paper.figures)
+            source = "response cache" if self._pubtator_id(pmc_id, pmid) in cached else "batched request"
+            logger.info(f"PubTator annotations for {pmc_id}: {len(paper.figures)} figure(s) from {source}")
+
+        saved = figure_count - calls
+        self.stats["pubtator_calls"] += calls
+        self.stats["pubtator_calls_saved"] += saved
+        logger.info(
+            f"Fetched PubTator annotations for {papers} paper(s) in {elapsed:.2f}s "
+            f"({calls} request(s) for {figure_count} figures, {len(cached)} paper(s) cached, "
+            f"{saved} calls saved)"
+        )
+
+    def _fetch_entities_for(self, fetched: List[Tuple[int, str, str, str, Paper]]) -> Dict[str, List[Entity]]:
+        """
+        Fetch PubTator annotations for a set of fetched papers in as few
+        requests as the client's batch size allows.
+        """
+        pubtator_ids = self._pubtator_ids_for(fetched)
+        if not pubtator_ids:
+            return {}
+
+        start = time.perf_counter()
+        fetch_stats: Dict[str, Any] = {}
+        entities_by_id = self.pubtator_client.fetch_entities_many(pubtator_ids, stats=fetch_stats)
+        self._record_pubtator_stats(fetched, fetch_stats, time.perf_counter() - start)
+        return entities_by_id
 
     def _convert_paper_to_dict(self, paper: Paper) -> Dict[str, Any]:
         """Convert a Paper object to the standard dictionary format."""
@@ -110,6 +188,224 @@ class PaperProcessor:
             ]
         }
 
+    @staticmethod
+    def _error_result(paper_id: str, error: str) -> Dict[str, Any]:
+        """Build the error result for a paper that raised during processing."""
+        return {
+            "paper_id": paper_id,
+            "source": "PMC" if paper_id.startswith("PMC") else "PMID",
+            "status": "error",
+            "error": error
+        }
+
+    def _lookup(self, original_id: str, pmc_id: str, pmid: str) -> Optional[Dict[str, Any]]:
+        """
+        Check the database for existing complete data for a resolved paper ID.
+
+        Returns:
+            The result when no API calls are needed (stored paper or
+            unresolvable ID), else None.
+        """
+        if not pmc_id:
+            return {
+                "paper_id": original_id,
+                "source": "PMID" if pmid else "PMC",
+                "status": "error",
+                "error": f"Could not resolve a PMC ID for {original_id}"
+            }
+
+        # Check if paper exists in database and is complete
+        is_complete, reason = self.storage.check_paper_completeness(pmc_id)
+
+        if is_complete:
+            # If paper is complete in database, return it
+            logger.info(f"Found complete paper in database: {pmc_id}")
+            paper = self.storage.get_paper_with_details(pmc_id)
+            if paper:
+                return self._convert_paper_to_dict(paper)
+            else:
+                logger.warning(f"Paper marked as complete but retrieval failed: {pmc_id}")
+        else:
+            logger.info(f"Paper {pmc_id} needs to be processed: {reason}")
+
+        return None
+
+    def process_batch(self, paper_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Process several papers and return one detailed result per ID, in the
+        same order as `paper_ids` (see `process_with_details` for the format).
+
+        All IDs are resolved up front in one bulk lookup. Papers are then
+        handled in chunks of the PubTator batch size so that the annotations
+        for a whole chunk are fetched in a single PubTator request.
+        """
+        try:
+            resolved = self.resolve_ids(paper_ids)
+        except Exception as e:
+            logger.error(f"Error resolving paper IDs: {e}")
+            return [self._error_result(paper_id, str(e)) for paper_id in paper_ids]
+
+        results = []
+        chunk_size = self.pubtator_client.batch_size
+        for i in range(0, len(paper_ids), chunk_size):
+            results.extend(self._process_chunk(paper_ids[i:i + chunk_size], resolved))
+        return results
+
+    def resolve_ids(self, paper_ids: List[str]) -> Dict[str, Tuple[str, str, str]]:
+        """
+        Normalize paper IDs to (original_id, pmc_id, pmid) in one bulk lookup
+        backed by the stored ID aliases.
+        """
+        resolved = resolve_paper_ids(paper_ids, self.storage)
+        for original_id, pmc_id, pmid in resolved.values():
+            # Log the ID conversion for debugging
+            if pmid and pmc_id:
+                logger.info(f"Converted ID: Original={original_id}, PMC={pmc_id}, PMID={pmid}")
+            elif pmid:
+                logger.info(f"Using PMID: {pmid} (no PMC ID found)")
+            elif pmc_id:
+                logger.info(f"Using PMC ID: {pmc_id} (no PMID found)")
+            else:
+                logger.warning(f"Could not resolve ID: {original_id}")
+        return resolved
+
+    def _lookup_chunk(self, paper_ids: List[str], resolved: Dict[str, Tuple[str, str, str]]
+                      ) -> Tuple[Dict[int, Dict[str, Any]], List[Tuple[int, str, str, str]]]:
+        """
+        Serve what the database already has for a chunk.
+
+        Returns:
+            Tuple of (results by chunk index, pending (index, original_id,
+            pmc_id, pmid) entries that still need to be fetched from PMC)
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+        pending: List[Tuple[int, str, str, str]] = []
+
+        for index, paper_id in enumerate(paper_ids):
+            try:
+                original_id, pmc_id, pmid = resolved[paper_id]
+                result = self._lookup(original_id, pmc_id, pmid)
+                if result is None:
+                    pending.append((index, original_id, pmc_id, pmid))
+                else:
+                    results[index] = result
+            except Exception as e:
+                logger.error(f"Error processing paper {paper_id}: {e}")
+                results[index] = self._error_result(paper_id, str(e))
+
+        return results, pending
+
+    def _finish_chunk(self, paper_ids: List[str], results: Dict[int, Dict[str, Any]],
+                      fetched: List[Tuple[int, str, str, str, Paper]],
+                      entities_by_id: Dict[str, List[Entity]]) -> List[Dict[str, Any]]:
+        """Annotate the fetched papers, save them in one batch, then return results in chunk order"""
+        annotated = []
+        for index, original_id, pmc_id, pmid, paper in fetched:
+            try:
+                paper_entities = entities_by_id.get(self._pubtator_id(pmc_id, pmid), [])
+                self._clean_captions(paper)
+                self._annotate(paper, paper_entities)
+                annotated.append((index, original_id, paper))
+            except Exception as e:
+                logger.error(f"Error processing paper {paper_ids[index]}: {e}")
+                results[index] = self._error_result(paper_ids[index], str(e))
+
+        results.update(self._save_many(annotated))
+        return [results[index] for index in range(len(paper_ids))]
+
+    def _process_chunk(self, paper_ids: List[str],
+                       resolved: Dict[str, Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+        """Process one chunk of paper IDs sharing a single PubTator request."""
+        results, pending = self._lookup_chunk(paper_ids, resolved)
+
+        # Fetch the rest from PMC
+        fetched: List[Tuple[int, str, str, str, Paper]] = []
+        for index, original_id, pmc_id, pmid in pending:
+            try:
+                paper = self._fetch_paper(original_id, pmc_id)
+                if isinstance(paper, Paper):
+                    fetched.append((index, original_id, pmc_id, pmid, paper))
+                else:
+                    results[index] = paper
+            except Exception as e:
+                logger.error(f"Error processing paper {paper_ids[index]}: {e}")
+                results[index] = self._error_result(paper_ids[index], str(e))
+
+        # Annotate every fetched paper of the chunk at once
+        entities_by_id = self._fetch_entities_for(fetched) if fetched else {}
+
+        return self._finish_chunk(paper_ids, results, fetched, entities_by_id)
+
+    async def process_many(self, paper_ids: List[str], concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Async counterpart of `process_batch`: PMC downloads of a chunk and its
+        PubTator batches run concurrently over one pooled HTTP client, with at
+        most `concurrency` (default `ncbi.max_concurrent_requests`) requests in
+        flight. Results are returned in the same order as `paper_ids`.
+        """
+        if concurrency is None:
+            concurrency = get_config().ncbi.max_concurrent_requests
+        concurrency = max(1, concurrency)
+        loop = asyncio.get_running_loop()
+
+        try:
+            # ID resolution may hit the network; keep it off the event loop
+            resolved = await loop.run_in_executor(None, self.resolve_ids, paper_ids)
+        except Exception as e:
+            logger.error(f"Error resolving paper IDs: {e}")
+            return [self._error_result(paper_id, str(e)) for paper_id in paper_ids]
+
+        results = []
+        semaphore = asyncio.Semaphore(concurrency)
+        async with create_async_client(concurrency) as client:
+            pmc_ingestor = AsyncPMCIngestor(client, semaphore)
+            pubtator_client = AsyncPubTatorClient(client, semaphore)
+            chunk_size = pubtator_client.batch_size
+            for i in range(0, len(paper_ids), chunk_size):
+                results.extend(await self._process_chunk_async(
+                    paper_ids[i:i + chunk_size], resolved, pmc_ingestor, pubtator_client
+                ))
+        return results
+
+    async def _process_chunk_async(self, paper_ids: List[str], resolved: Dict[str, Tuple[str, str, str]],
+                                   pmc_ingestor: AsyncPMCIngestor,
+                                   pubtator_client: AsyncPubTatorClient) -> List[Dict[str, Any]]:
+        """
+        Process one chunk, overlapping the network waits of its papers. The
+        DuckDB reads and the batch save run on the default executor so they
+        don't block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        results, pending = await loop.run_in_executor(None, self._lookup_chunk, paper_ids, resolved)
+
+        # Fetch the rest from PMC concurrently
+        papers = await asyncio.gather(
+            *(pmc_ingestor.fetch(pmc_id) for _, _, pmc_id, _ in pending),
+            return_exceptions=True
+        )
+        fetched: List[Tuple[int, str, str, str, Paper]] = []
+        for (index, original_id, pmc_id, pmid), paper in zip(pending, papers):
+            if isinstance(paper, Exception):
+                logger.error(f"Error processing paper {paper_ids[index]}: {paper}")
+                results[index] = self._error_result(paper_ids[index], str(paper))
+            elif paper:
+                fetched.append((index, original_id, pmc_id, pmid, paper))
+            else:
+                results[index] = self._fetch_failed_result(original_id, pmc_id)
+
+        # Annotate every fetched paper of the chunk at once
+        entities_by_id: Dict[str, List[Entity]] = {}
+        pubtator_ids = self._pubtator_ids_for(fetched)
+        if pubtator_ids:
+            start = time.perf_counter()
+            fetch_stats: Dict[str, Any] = {}
+            entities_by_id = await pubtator_client.fetch_entities_many(pubtator_ids, stats=fetch_stats)
+            self._record_pubtator_stats(fetched, fetch_stats, time.perf_counter() - start)
+
+        return await loop.run_in_executor(
+            None, self._finish_chunk, paper_ids, results, fetched, entities_by_id
+        )
+
     def process_with_details(self, paper_id: str) -> Dict[str, Any]:
         """
         Process a single paper and return detailed results including success/error status
@@ -127,43 +423,7 @@ class PaperProcessor:
                 "figures": List[Dict] (optional)
             }
         """
-        try:
-            # Normalize the paper ID to get both PMC ID and PMID
-            original_id, pmc_id, pmid = normalize_paper_id(paper_id)
-
-            if not pmc_id:
-                return {
-                    "paper_id": original_id,
-                    "source": "PMID" if pmid else "PMC",
-                    "status": "error",
-                    "error": f"Could not resolve a PMC ID for {original_id}"
-                }
-
-            # Check if paper exists in database and is complete
-            is_complete, reason = self.storage.check_paper_completeness(pmc_id)
-            
-            if is_complete:
-                # If paper is complete in database, return it
-                logger.info(f"Found complete paper in database: {pmc_id}")
-                paper = self.storage.get_paper_with_details(pmc_id)
-                if paper:
-                    return self._convert_paper_to_dict(paper)
-                else:
-                    logger.warning(f"Paper marked as complete but retrieval failed: {pmc_id}")
-            else:
-                logger.info(f"Paper {pmc_id} needs to be processed: {reason}")
-
-            # If we get here, we need to process the paper from APIs
-            return self._process_paper_from_api(original_id, pmc_id, pmid)
-
-        except Exception as e:
-            logger.error(f"Error processing paper {paper_id}: {e}")
-            return {
-                "paper_id": paper_id,
-                "source": "PMC" if paper_id.startswith("PMC") else "PMID",
-                "status": "error",
-                "error": str(e)
-            }
+        return self.process_batch([paper_id])[0]
 
     def process(self, paper_id: str) -> bool:
         """
@@ -0,0 +1,431 @@
+# ingestion/pipeline.py
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.config import get_config
+from ingestion.http_client import fetch_text
+from ingestion.pmc_ingestor import PMCIngestor
+from models.paper import Paper
+from processing.caption_cleaner import CaptionCleaner
+from utils.logging import get_logger
+
+logger = get_logger("figurex.pipeline")
+
+# Marks the end of a stage's input
+_DONE = object()
+
+# Per-process helpers for the CPU-bound stages, created on first use in each worker
+_parser: Optional[PMCIngestor] = None
+_cleaner: Optional[CaptionCleaner] = None
+
+
+def _parse_paper(pmc_id: str, xml_text: str) -> Paper:
+    """Parse BioC XML into a Paper (runs in the parse pool)"""
+    global _parser
+    if _parser is None:
+        _parser = PMCIngestor()
+    return _parser.parse(pmc_id, xml_text)
+
+
+def _ready() -> bool:
+    return True
+
+
+def _clean_paper(paper: Paper) -> Paper:
+    """Clean every figure caption of a Paper (runs in the clean pool)"""
+    global _cleaner
+    if _cleaner is None:
+        _cleaner = CaptionCleaner()
+    for fig in paper.figures:
+        _cleaner.process_figure(fig)
+    return paper
+
+
+class _Item:
+    """A paper travelling through the pipeline"""
+    __slots__ = ("index", "original_id", "pmc_id", "pmid", "xml_text", "paper")
+
+    def __init__(self, index: int, original_id: str, pmc_id: str, pmid: str):
+        self.index = index
+        self.original_id = original_id
+        self.pmc_id = pmc_id
+        self.pmid = pmid
+        self.xml_text: Optional[str] = None
+        self.paper: Optional[Paper] = None
+
+
+class Stage:
+    """
+    One pipeline stage: `workers` threads take items from a bounded input
+    queue, run `handler` on a batch of up to `batch_size` items and put the
+    items it returns on the next stage's queue. A full downstream queue blocks
+    the workers, which is what keeps memory flat when a later stage is slow.
+    When the last worker finishes it closes the next stage.
+    """
+
+    def __init__(self, name: str, handler: Callable[[List[_Item]], List[_Item]], workers: int,
+                 queue_size: int, batch_size: int = 1, batch_wait: float = 0.0):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = max(0.0, batch_wait)
+        self.input: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self.next: Optional["Stage"] = None
+        self.on_error: Callable[[_Item, Exception], None] = lambda item, error: None
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._running = 0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def put(self, item: Any) -> None:
+        self.input.put(item)
+        depth = self.input.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def start(self) -> None:
+        self.reset_stats()
+        self.started_at = time.perf_counter()
+        self._running = self.workers
+        self._threads = [
+            threading.Thread(target=self._work, name=f"pipeline-{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self) -> None:
+        """Signal every worker that no more input will arrive"""
+        for _ in range(self.workers):
+            self.input.put(_DONE)
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+
+    def _take_batch(self):
+        """
+        Block for one item, then keep draining up to `batch_size` items,
+        waiting at most `batch_wait` seconds for more to arrive.
+        """
+        first = self.input.get()
+        if first is _DONE:
+            return [], True
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self.input.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _work(self) -> None:
+        done = False
+        while not done:
+            batch, done = self._take_batch()
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                outputs = self.handler(batch)
+            except Exception as e:
+                outputs = []
+                for item in batch:
+                    self.on_error(item, e)
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.busy_seconds += elapsed
+                self.processed += len(outputs)
+                self.failed += len(batch) - len(outputs)
+            if self.next is not None:
+                for item in outputs:
+                    self.next.put(item)
+
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last:
+            self.finished_at = time.perf_counter()
+            if self.next is not None:
+                self.next.close()
+
+    def stats(self) -> Dict[str, Any]:
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "queue_depth": self.input.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "throughput_per_second": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class IngestionPipeline:
+    """
+    Pipelined executor for `PaperProcessor`.
+
+    Papers flow fetch -> parse -> clean -> annotate -> store through bounded
+    queues. Fetch and annotate are I/O-bound and run on threads (annotate
+    collects up to a PubTator batch of papers per request), parse and clean are
+    CPU-bound and run in process pools, and a single store worker owns all
+    DuckDB writes, saving whatever papers have queued up in one batch write.
+    Worker counts and queue sizes come from `config.pipeline`.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.config = get_config().pipeline
+        self._db_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._pools: Dict[str, Executor] = {}
+        self._pools_lock = threading.Lock()
+        self._results: Dict[int, Dict[str, Any]] = {}
+        # Later positions of a PMC ID already in the run, by its first position
+        self._duplicates: Dict[int, List[Tuple[int, str]]] = {}
+        self._results_lock = threading.Lock()
+        self._on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+        self.last_run: Dict[str, Any] = {}
+
+        queue_size = self.config.queue_size
+        self.stages = [
+            Stage("fetch", self._fetch, self.config.fetch_workers, queue_size),
+            Stage("parse", self._parse, self.config.parse_workers, queue_size),
+            Stage("clean", self._clean, self.config.clean_workers, queue_size),
+            Stage("annotate", self._annotate, self.config.annotate_workers, queue_size,
+                  batch_size=processor.pubtator_client.batch_size, batch_wait=self.config.annotate_batch_wait),
+            Stage("store", self._store, 1, queue_size, batch_size=self.config.store_batch_size),
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next = next_stage
+        for stage in self.stages:
+            stage.on_error = self._record_error
+
+    def _pool(self, name: str, workers: int) -> Executor:
+        """
+        CPU pools are created on first use and reused across runs. Worker
+        processes are spawned rather than forked: the pipeline runs inside a
+        multithreaded server, and a forked child could inherit locks held by
+        its other threads.
+        """
+        with self._pools_lock:
+            pool = self._pools.get(name)
+            if pool is None:
+                if self.config.use_process_pool:
+                    try:
+                        pool = ProcessPoolExecutor(
+                            max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn")
+                        )
+                        # Start the workers now, so a pool that cannot run falls back to threads
+                        pool.submit(_ready).result()
+                    except Exception as e:
+                        logger.warning(f"Process pool unavailable for {name}, using threads: {e}")
+                        pool = None
+                if pool is None:
+                    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"pipeline-{name}-pool")
+                self._pools[name] = pool
+            return pool
+
+    def _submit(self, name: str, workers: int, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(*args)` in the named CPU pool and return its result. A pool
+        broken by a dying worker process is replaced and the call retried
+        once, so one crash doesn't fail every later paper and job.
+        """
+        for attempt in range(2):
+            pool = self._pool(name, workers)
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                with self._pools_lock:
+                    if self._pools.get(name) is pool:
+                        del self._pools[name]
+                pool.shutdown(wait=False)
+                logger.warning(f"A {name} worker process died; restarting the {name} pool")
+                if attempt:
+                    raise
+
+    def _record(self, index: int, result: Dict[str, Any]) -> None:
+        with self._results_lock:
+            self._results[index] = result
+            duplicates = self._duplicates.pop(index, [])
+        if self._on_result is not None:
+            try:
+                self._on_result(index, result)
+            except Exception as e:
+                logger.error(f"Error reporting the result for paper #{index}: {e}")
+        for duplicate_index, original_id in duplicates:
+            self._record(duplicate_index, dict(result, paper_id=original_id))
+
+    def _share_result(self, first_index: int, index: int, original_id: str) -> None:
+        """Give paper #index the result of the earlier paper #first_index with the same PMC ID"""
+        with self._results_lock:
+            result = self._results.get(first_index)
+            if result is None:
+                self._duplicates.setdefault(first_index, []).append((index, original_id))
+                return
+        self._record(index, dict(result, paper_id=original_id))
+
+    def _record_error(self, item: _Item, error: Exception) -> None:
+        logger.error(f"Error processing paper {item.original_id}: {error}")
+        self._record(item.index, self.processor._error_result(item.original_id, str(error)))
+
+    def _each(self, batch: List[_Item], step: Callable[[_Item], None]) -> List[_Item]:
+        """Run `step` per item, recording failures so one bad paper doesn't sink its batch"""
+        passed = []
+        for item in batch:
+            try:
+                step(item)
+                passed.append(item)
+            except Exception as e:
+                self._record_error(item, e)
+        return passed
+
+    def _fetch(self, batch: List[_Item]) -> List[_Item]:
+        def step(item: _Item) -> None:
+            url = self.processor.pmc_ingestor.build_url(item.pmc_id)
+            logger.info(f"Fetching paper with PMC ID: {item.pmc_id}")
+            item.xml_text = fetch_text(url, endpoint="pmc",
+                                       validate=self.processor.pmc_ingestor.is_valid_response)
+        return self._each(batch, step)
+
+    def _parse(self, batch: List[_Item]) -> List[_Item]:
+        def step(item: _Item) -> None:
+            item.paper = self._submit("parse", self.config.parse_workers, _parse_paper, item.pmc_id, item.xml_text)
+            item.xml_text = None
+        return self._each(batch, step)
+
+    def _clean(self, batch: List[_Item]) -> List[_Item]:
+        def step(item: _Item) -> None:
+            item.paper = self._submit("clean", self.config.clean_workers, _clean_paper, item.paper)
+        return self._each(batch, step)
+
+    def _annotate(self, batch: List[_Item]) -> List[_Item]:
+        fetched = [(item.index, item.original_id, item.pmc_id, item.pmid, item.paper) for item in batch]
+        entities_by_id = self.processor._fetch_entities_for(fetched)
+
+        def step(item: _Item) -> None:
+            paper_entities = entities_by_id.get(self.processor._pubtator_id(item.pmc_id, item.pmid), [])
+            self.processor._annotate(item.paper, paper_entities)
+        return self._each(batch, step)
+
+    def _store(self, batch: List[_Item]) -> List[_Item]:
+        with self._db_lock:
+            results = self.processor._save_many([(item.index, item.original_id, item.paper) for item in batch])
+        for index, result in results.items():
+            self._record(index, result)
+        return [item for item in batch if results[item.index]["status"] == "success"]
+
+    def run(self, paper_ids: List[str],
+            on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Process papers through the pipeline and return one result per ID in
+        the same order as `paper_ids` (see `PaperProcessor.process_with_details`).
+        `on_result(index, result)` is called as each paper finishes, from
+        whichever pipeline thread finished it. A repeated PMC ID is processed
+        once and its result reported for each of its positions.
+
+        Runs are serialized: the stages are shared, so a second caller waits
+        until the current run has finished.
+        """
+        with self._run_lock:
+            self._on_result = on_result
+            try:
+                return self._run(paper_ids)
+            finally:
+                self._on_result = None
+
+    def _run(self, paper_ids: List[str]) -> List[Dict[str, Any]]:
+        try:
+            resolved = self.processor.resolve_ids(paper_ids)
+        except Exception as e:
+            logger.error(f"Error resolving paper IDs: {e}")
+            results = [self.processor._error_result(paper_id, str(e)) for paper_id in paper_ids]
+            for index, result in enumerate(results):
+                self._record(index, result)
+            return results
+
+        self._results = {}
+        self._duplicates = {}
+        self._pool("parse", self.config.parse_workers)
+        self._pool("clean", self.config.clean_workers)
+        start = time.perf_counter()
+        for stage in self.stages:
+            stage.start()
+
+        # Serve stored papers directly and feed the rest into the first stage,
+        # each PMC ID once; put() blocks while the fetch queue is full
+        first_index: Dict[str, int] = {}
+        try:
+            for index, paper_id in enumerate(paper_ids):
+                try:
+                    original_id, pmc_id, pmid = resolved[paper_id]
+                    if pmc_id and first_index.setdefault(pmc_id, index) != index:
+                        self._share_result(first_index[pmc_id], index, original_id)
+                        continue
+                    with self._db_lock:
+                        result = self.processor._lookup(original_id, pmc_id, pmid)
+                    if result is None:
+                        self.stages[0].put(_Item(index, original_id, pmc_id, pmid))
+                    else:
+                        self._record(index, result)
+                except Exception as e:
+                    logger.error(f"Error processing paper {paper_id}: {e}")
+                    self._record(index, self.processor._error_result(paper_id, str(e)))
+        finally:
+            self.stages[0].close()
+            for stage in self.stages:
+                stage.join()
+
+        elapsed = time.perf_counter() - start
+        self.last_run = {
+            "papers": len(paper_ids),
+            "elapsed_seconds": round(elapsed, 3),
+            "stages": {stage.name: stage.stats() for stage in self.stages},
+        }
+        logger.info(f"Pipeline processed {len(paper_ids)} paper(s) in {elapsed:.2f}s")
+        for name, stats in self.last_run["stages"].items():
+            logger.info(
+                f"  {name}: {stats['processed']} ok, {stats['failed']} failed, "
+                f"{stats['throughput_per_second']}/s, max queue depth {stats['max_queue_depth']}"
+            )
+
+        return [self._results[index] for index in range(len(paper_ids))]
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-stage throughput and queue depth, live while a run is in progress"""
+        return {
+            "running": self._run_lock.locked(),
+            "stages": {stage.name: stage.stats() for stage in self.stages},
+            "last_run": self.last_run,
+            "pubtator": dict(self.processor.stats),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the CPU worker pools"""
+        with self._pools_lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.shutdown()
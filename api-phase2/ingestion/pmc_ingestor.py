@@ -1,11 +1,13 @@
 # pmc_ingestor.py
-import requests
+import asyncio
+import httpx
 import yaml
 import xml.etree.ElementTree as ET
 from models.paper import Paper, Figure
 from ingestion.base import BaseIngestor
 from utils.logging import get_logger
 from config.config import get_config
+from ingestion.http_client import fetch_text, fetch_text_async
 from collections import defaultdict
 import re
 
@@ -17,7 +19,7 @@ class PMCIngestor(BaseIngestor):
         """Initialize the PMC ingestor with API key from settings"""
         config = get_config()
         self.base_url = config.ncbi.pmc_base_url
-        self.api_key = config.ncbi.api_key
+        self.api_key = config.ncbi.usable_api_key()
         if self.api_key:
             logger.info("PMC ingestor initialized with NCBI API key")
         else:
@@ -29,19 +31,36 @@ class PMCIngestor(BaseIngestor):
         """
         return self.fetch(paper_id)
 
-    def fetch(self, pmc_id: str) -> Paper:
-        # Ensure pmc_id has 'PMC' prefix
+    @staticmethod
+    def normalize_id(pmc_id: str) -> str:
+        """Ensure pmc_id has 'PMC' prefix"""
         if not pmc_id.startswith("PMC"):
             pmc_id = f"PMC{pmc_id}"
+        return pmc_id
+
+    def build_url(self, pmc_id: str) -> str:
+        """Build the BioC XML URL for a PMC ID"""
+        return f"{self.base_url}/BioC_xml/{self.normalize_id(pmc_id)}/unicode"
 
-        url = f"{self.base_url}/BioC_xml/{pmc_id}/unicode"
+    @staticmethod
+    def is_valid_response(xml_text: str) -> bool:
+        """Whether a PMC response is a document; unknown IDs get an "[Error]" message with a 200"""
+        return "[Error]" not in xml_text
+
+    def fetch(self, pmc_id: str) -> Paper:
+        pmc_id = self.normalize_id(pmc_id)
+
+        url = self.build_url(pmc_id)
         logger.info(f"Fetching from URL: {url}")
 
-        response = requests.get(url)
-        response.raise_for_status()
-        xml_text = response.text
+        xml_text = fetch_text(url, endpoint="pmc", validate=self.is_valid_response)
+        return self.parse(pmc_id, xml_text)
+
+    def parse(self, pmc_id: str, xml_text: str) -> Paper:
+        """Parse a BioC XML document into a Paper"""
+        pmc_id = self.normalize_id(pmc_id)
 
-        if "[Error]" in xml_text:
+        if not self.is_valid_response(xml_text):
             raise ValueError(f"PMC returned error: {xml_text.strip()}")
 
         root = ET.fromstring(xml_text)
@@ -119,4 +138,29 @@ class PMCIngestor(BaseIngestor):
             title=title or f"PMC{pmc_id}",
             abstract=abstract or "",
             figures=figures
-        )
\ No newline at end of file
+        )
+
+
+class AsyncPMCIngestor(PMCIngestor):
+    """
+    Async variant of PMCIngestor that fetches over a shared pooled
+    httpx.AsyncClient, with at most `semaphore` requests in flight.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore):
+        super().__init__()
+        self.client = client
+        self.semaphore = semaphore
+
+    async def ingest(self, paper_id: str) -> Paper:
+        return await self.fetch(paper_id)
+
+    async def fetch(self, pmc_id: str) -> Paper:
+        pmc_id = self.normalize_id(pmc_id)
+
+        url = self.build_url(pmc_id)
+        logger.info(f"Fetching from URL: {url}")
+
+        async with self.semaphore:
+            xml_text = await fetch_text_async(self.client, url, endpoint="pmc", validate=self.is_valid_response)
+        return self.parse(pmc_id, xml_text)
@@ -1,11 +1,14 @@
 # pubtator_client.py
-import requests
-from typing import List, Optional
+import asyncio
+import httpx
+from typing import Any, Dict, List, Optional
 import os
 import yaml
 from models.paper import Entity
 from utils.logging import get_logger
 from config.config import get_config
+from ingestion.http_client import fetch_text, fetch_text_async
+from storage.response_cache import get_response_cache
 
 logger = get_logger("figurex.pubtator")
 
@@ -15,47 +18,170 @@ class PubTatorClient:
         """Initialize the PubTator client with API key from settings"""
         config = get_config()
         self.base_url = config.ncbi.pubtator_base_url
-        self.api_key = config.ncbi.api_key
+        self.api_key = config.ncbi.usable_api_key()
+        self.batch_size = max(1, config.ncbi.pubtator_batch_size)
         if self.api_key:
             logger.info("PubTator client initialized with NCBI API key")
         else:
             logger.warning("No NCBI API key found - rate limiting will be strict")
 
+    @staticmethod
+    def _to_pubtator_id(pmid_or_pmcid: str) -> str:
+        """Strip the PMC prefix, PubTator's pmids= parameter expects numeric IDs"""
+        if pmid_or_pmcid.startswith("PMC"):
+            return pmid_or_pmcid.replace("PMC", "")
+        return pmid_or_pmcid
+
+    def _group_requested(self, ids: List[str]) -> Dict[str, List[str]]:
+        """Map the numeric ID PubTator will echo back to the IDs the caller used"""
+        requested: Dict[str, List[str]] = {}
+        for original_id in ids:
+            requested.setdefault(self._to_pubtator_id(original_id), []).append(original_id)
+        return requested
+
     def fetch_entities(self, pmid_or_pmcid: str) -> List[Entity]:
         """
         Fetch entities from PubTator for a given PMID or PMCID
         """
-        # If it's a PMC ID, try to process it properly
-        original_id = pmid_or_pmcid
-        if pmid_or_pmcid.startswith("PMC"):
-            pmid_or_pmcid = pmid_or_pmcid.replace("PMC", "")
-            logger.info(f"Modified PMC ID to numeric format: {pmid_or_pmcid}")
+        return self.fetch_entities_many([pmid_or_pmcid]).get(pmid_or_pmcid, [])
 
-        # PubTator endpoint expects comma-separated IDs
-        url = f"{self.base_url}?pmids={pmid_or_pmcid}"
-        logger.info(f"Fetching entities from PubTator URL: {url}")
+    def fetch_entities_many(self, ids: List[str], stats: Optional[Dict[str, Any]] = None) -> Dict[str, List[Entity]]:
+        """
+        Fetch entities for several PMIDs/PMCIDs, grouping up to `batch_size`
+        IDs per PubTator request.
 
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            pubtator_text = response.text
-            logger.info(f"PubTator response length: {len(pubtator_text)} characters")
+        Args:
+            ids: PMIDs/PMCIDs to annotate
+            stats: Optional dict filled with the number of PubTator
+                `requests` actually sent and the `cached` PubTator IDs
+                served from the response cache
 
-            if not pubtator_text.strip():
-                logger.warning(f"Empty response from PubTator for ID: {original_id}")
-                return []
+        Returns:
+            Dict mapping each requested ID to its entities. IDs that PubTator
+            returned nothing for (or whose request failed) map to an empty list.
+        """
+        requested = self._group_requested(ids)
+        results: Dict[str, List[Entity]] = {original_id: [] for original_id in ids}
+        cached, missing = self._cached_documents(list(requested.keys()))
+        self._merge_documents(results, requested, cached)
+        chunks = self._chunks(missing)
+        for chunk in chunks:
+            self._merge_documents(results, requested, self._fetch_documents(chunk))
+        self._fill_stats(stats, cached, chunks)
+        return results
+
+    @staticmethod
+    def _fill_stats(stats: Optional[Dict[str, Any]], cached: Dict[str, List[Entity]],
+                    chunks: List[List[str]]) -> None:
+        if stats is not None:
+            stats["requests"] = len(chunks)
+            stats["cached"] = set(cached)
+
+    def _chunks(self, pubtator_ids: List[str]) -> List[List[str]]:
+        """Split IDs into groups of at most `batch_size`"""
+        return [pubtator_ids[i:i + self.batch_size] for i in range(0, len(pubtator_ids), self.batch_size)]
 
+    @staticmethod
+    def _merge_documents(results: Dict[str, List[Entity]], requested: Dict[str, List[str]],
+                         documents: Dict[str, List[Entity]]) -> None:
+        """Assign per-document entities back to the IDs the caller asked for"""
+        for doc_id, entities in documents.items():
+            for original_id in requested.get(doc_id, []):
+                results[original_id] = entities
+
+    def _cached_documents(self, pubtator_ids: List[str]):
+        """
+        Look up documents in the response cache. Documents are cached one per
+        entry (keyed by their single-ID URL) so a cached document is reused
+        whatever batch it is requested in.
+
+        Returns:
+            Tuple of (documents found in the cache, IDs still to fetch)
+        """
+        cache = get_response_cache()
+        if cache is None:
+            return {}, pubtator_ids
+
+        documents: Dict[str, List[Entity]] = {}
+        missing = []
+        for doc_id in pubtator_ids:
+            text = cache.get(self.build_url([doc_id]))
+            if text is None:
+                missing.append(doc_id)
+            else:
+                documents[doc_id] = self.parse_pubtator(text).get(doc_id, [])
+        if documents:
+            logger.info(f"Using cached PubTator annotations for {len(documents)} document(s)")
+        return documents, missing
+
+    def _cache_documents(self, pubtator_ids: List[str], pubtator_text: str) -> None:
+        """Store each document of a batched response under its own cache entry"""
+        cache = get_response_cache()
+        if cache is None:
+            return
+
+        lines: Dict[str, List[str]] = {doc_id: [] for doc_id in pubtator_ids}
+        for line in pubtator_text.strip().split("\n"):
+            separator = "|" if "|" in line else "\t"
+            doc_id = line.split(separator, 1)[0].strip()
+            if doc_id in lines:
+                lines[doc_id].append(line)
+        # A document missing from the response may just not be annotated yet,
+        # so only documents PubTator actually returned are cached
+        for doc_id, doc_lines in lines.items():
+            if doc_lines:
+                cache.put(self.build_url([doc_id]), "\n".join(doc_lines))
+
+    def build_url(self, pubtator_ids: List[str]) -> str:
+        """PubTator endpoint expects comma-separated IDs"""
+        return f"{self.base_url}?pmids={','.join(pubtator_ids)}"
+
+    def _fetch_documents(self, pubtator_ids: List[str]) -> Dict[str, List[Entity]]:
+        """Issue a single PubTator export request and split the response per document"""
+        url = self.build_url(pubtator_ids)
+        logger.info(f"Fetching entities for {len(pubtator_ids)} document(s) from PubTator URL: {url}")
+
+        try:
+            pubtator_text = fetch_text(url, endpoint="pubtator", cache=False)
         except Exception as e:
             logger.error(f"PubTator request failed: {e}")
-            return []
+            return {}
 
-        entities = []
+        self._cache_documents(pubtator_ids, pubtator_text)
+
+        return self._split_response(pubtator_ids, pubtator_text)
+
+    def _split_response(self, pubtator_ids: List[str], pubtator_text: str) -> Dict[str, List[Entity]]:
+        """Parse a PubTator export response for the given IDs"""
+        logger.info(f"PubTator response length: {len(pubtator_text)} characters")
+
+        if not pubtator_text.strip():
+            logger.warning(f"Empty response from PubTator for IDs: {', '.join(pubtator_ids)}")
+            return {}
+
+        documents = self.parse_pubtator(pubtator_text)
+        for doc_id in pubtator_ids:
+            logger.info(f"Retrieved {len(documents.get(doc_id, []))} entities from PubTator for {doc_id}")
+        return documents
+
+    @staticmethod
+    def parse_pubtator(pubtator_text: str) -> Dict[str, List[Entity]]:
+        """
+        Parse a (possibly multi-document) PubTator response.
+
+        Documents are identified by the first column of each line, so the
+        result maps every document ID to the entities annotated in it.
+        """
+        documents: Dict[str, List[Entity]] = {}
         for line in pubtator_text.strip().split("\n"):
             # Debug raw line
             logger.debug(f"Processing line: {line}")
 
-            # Skip title and abstract lines which contain | character
+            # Title and abstract lines (ID|t|..., ID|a|...) only register the document
             if "|" in line:
+                doc_id = line.split("|", 1)[0].strip()
+                if doc_id:
+                    documents.setdefault(doc_id, [])
                 continue
 
             # Skip comment lines
@@ -68,13 +194,15 @@ class PubTatorClient:
                 continue  # skip malformed lines
 
             try:
-                entity_id = parts[0].strip()
+                doc_id = parts[0].strip()
                 start, end = int(parts[1]), int(parts[2])
                 mention = parts[3]
                 entity_type = parts[4]
 
                 logger.debug(f"Found entity: {mention} ({entity_type})")
-                entities.append(Entity(text=mention, type=entity_type, start=start, end=end))
+                documents.setdefault(doc_id, []).append(
+                    Entity(text=mention, type=entity_type, start=start, end=end)
+                )
             except ValueError:
                 logger.warning(f"Skipping line with invalid integers: {line}")
                 continue
@@ -82,5 +210,48 @@ class PubTatorClient:
                 logger.warning(f"Error processing entity line: {e}")
                 continue
 
-        logger.info(f"Retrieved {len(entities)} entities from PubTator")
-        return entities
\ No newline at end of file
+        return documents
+
+
+class AsyncPubTatorClient(PubTatorClient):
+    """
+    Async variant of PubTatorClient that sends its batched export requests
+    concurrently over a shared pooled httpx.AsyncClient, with at most
+    `semaphore` requests in flight.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore):
+        super().__init__()
+        self.client = client
+        self.semaphore = semaphore
+
+    async def fetch_entities(self, pmid_or_pmcid: str) -> List[Entity]:
+        return (await self.fetch_entities_many([pmid_or_pmcid])).get(pmid_or_pmcid, [])
+
+    async def fetch_entities_many(self, ids: List[str], stats: Optional[Dict[str, Any]] = None) -> Dict[str, List[Entity]]:
+        requested = self._group_requested(ids)
+        results: Dict[str, List[Entity]] = {original_id: [] for original_id in ids}
+        cached, missing = self._cached_documents(list(requested.keys()))
+        self._merge_documents(results, requested, cached)
+
+        chunks = self._chunks(missing)
+        documents = await asyncio.gather(*(self._fetch_documents(chunk) for chunk in chunks))
+        for chunk_documents in documents:
+            self._merge_documents(results, requested, chunk_documents)
+        self._fill_stats(stats, cached, chunks)
+        return results
+
+    async def _fetch_documents(self, pubtator_ids: List[str]) -> Dict[str, List[Entity]]:
+        url = self.build_url(pubtator_ids)
+        logger.info(f"Fetching entities for {len(pubtator_ids)} document(s) from PubTator URL: {url}")
+
+        try:
+            async with self.semaphore:
+                pubtator_text = await fetch_text_async(self.client, url, endpoint="pubtator", cache=False)
+        except Exception as e:
+            logger.error(f"PubTator request failed: {e}")
+            return {}
+
+        self._cache_documents(pubtator_ids, pubtator_text)
+
+        return self._split_response(pubtator_ids, pubtator_text)
@@ -0,0 +1,153 @@
+# ingestion/rate_limiter.py
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+from config.config import get_config
+from utils.logging import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process bucket
+    fcntl = None
+
+logger = get_logger("figurex.ratelimit")
+
+# NCBI allows 10 requests/second with an API key and 3 without
+RATE_WITH_API_KEY = 10.0
+RATE_WITHOUT_API_KEY = 3.0
+
+# NCBI counts every request made without a key from a host against one
+# limit, so all endpoints share this bucket unless they have their own rate
+SHARED_BUCKET = "ncbi"
+
+# Requests sent with `ncbi.api_key` count against the key's own, higher
+# limit instead. Only these endpoints put the key in their URLs
+KEYED_ENDPOINTS = ("idconv",)
+KEYED_BUCKET = "ncbi-keyed"
+
+
+class TokenBucket:
+    """
+    Token bucket limiting requests to `rate` per second.
+
+    The bucket state lives in a small file guarded by an exclusive lock, so
+    every process on the host (API workers, watcher, CLI) draws from the same
+    bucket. Callers reserve a token and then sleep until it becomes valid,
+    which keeps the lock held only for the read-modify-write of the state.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float = 1.0, state_dir: Optional[str] = None):
+        self.name = name
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self.state_path = None
+        if state_dir and fcntl is not None:
+            os.makedirs(state_dir, exist_ok=True)
+            self.state_path = os.path.join(state_dir, f"{name}.bucket")
+
+    def _refill(self, tokens: float, updated: float, now: float) -> float:
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def _reserve_local(self) -> float:
+        with self._lock:
+            now = time.time()
+            self._tokens = self._refill(self._tokens, self._updated, now) - 1
+            self._updated = now
+            return max(0.0, -self._tokens / self.rate)
+
+    def _reserve_shared(self) -> float:
+        with self._lock, open(self.state_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                state = f.read().split()
+                now = time.time()
+                if len(state) == 2:
+                    tokens = self._refill(float(state[0]), float(state[1]), now)
+                else:
+                    tokens = self.capacity
+                tokens -= 1
+                f.seek(0)
+                f.truncate()
+                f.write(f"{tokens} {now}")
+                f.flush()
+                return max(0.0, -tokens / self.rate)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it"""
+        if self.rate <= 0:
+            return 0.0  # Unlimited
+        if self.state_path:
+            try:
+                return self._reserve_shared()
+            except OSError as e:
+                logger.warning(f"Shared rate limit state unavailable for {self.name}, limiting per process: {e}")
+                self.state_path = None
+        return self._reserve_local()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _is_keyed(endpoint: str) -> bool:
+    """Whether the endpoint's requests carry a usable API key"""
+    return endpoint in KEYED_ENDPOINTS and get_config().ncbi.usable_api_key() is not None
+
+
+def _bucket_name(endpoint: str) -> str:
+    """
+    Endpoints with a rate in `ncbi.endpoint_rate_limits` get their own
+    bucket; the rest share one per limit they count against
+    """
+    if endpoint in get_config().ncbi.endpoint_rate_limits:
+        return endpoint
+    return KEYED_BUCKET if _is_keyed(endpoint) else SHARED_BUCKET
+
+
+def get_rate_limit(endpoint: str) -> float:
+    """Requests/second allowed for an endpoint, honoring the API key tier of its requests"""
+    ncbi = get_config().ncbi
+    if endpoint in ncbi.endpoint_rate_limits:
+        return ncbi.endpoint_rate_limits[endpoint]
+    if ncbi.rate_limit:
+        return ncbi.rate_limit
+    return RATE_WITH_API_KEY if _is_keyed(endpoint) else RATE_WITHOUT_API_KEY
+
+
+def get_rate_limiter(endpoint: str) -> TokenBucket:
+    """
+    Get the process-wide (and host-wide) token bucket for an endpoint: the
+    one shared by the NCBI endpoints in the same API key tier, or its own
+    if it has an override
+    """
+    name = _bucket_name(endpoint)
+    bucket = _buckets.get(name)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(name)
+            if bucket is None:
+                rate = get_rate_limit(endpoint)
+                bucket = TokenBucket(name, rate, state_dir=get_config().ncbi.rate_limit_dir)
+                logger.info(f"Rate limiting {name} requests to {rate:g}/s")
+                _buckets[name] = bucket
+    return bucket
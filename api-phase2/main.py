@@ -3,7 +3,7 @@ from typing import List, Optional
 from models.paper import Paper
 from ingestion.pmc_ingestor import PMCIngestor
 from ingestion.pubtator_client import PubTatorClient
-from storage.duckdb_backend import DuckDBStorage
+from storage.duckdb_backend import get_storage
 from ingestion.watcher import FolderWatcher
 from utils.logging import get_logger
 
@@ -22,7 +22,7 @@ class FigureX:
         Args:
             db_path: Path to the database file
         """
-        self.storage = DuckDBStorage(db_path)
+        self.storage = get_storage(db_path)
         self.pmc_ingestor = PMCIngestor()
         self.pubtator_client = PubTatorClient()
 
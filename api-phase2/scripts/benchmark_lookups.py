@@ -0,0 +1,119 @@
+"""
+Benchmark the storage lookup paths with and without the secondary indexes.
+
+For each database size a synthetic database is generated (every paper gets
+`--figures` figures with `--links` entity links each), then the point
+lookups used by the read and write paths are timed before and after
+`DuckDBStorage.create_indexes()`.
+
+Usage (from the api-phase2 directory):
+    PYTHONPATH=. python scripts/benchmark_lookups.py --sizes 1000,10000,100000,1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from config.config import get_config
+from storage.duckdb_backend import DuckDBStorage
+
+
+def populate(storage: DuckDBStorage, papers: int, figures: int, links: int) -> int:
+    """Fill an empty database with synthetic rows; returns the number of entities"""
+    entities = max(1000, papers // 10)
+    conn = storage.conn
+    conn.execute("""
+        INSERT INTO papers (paper_id, title, abstract, source)
+        SELECT 'PMC' || i, 'Title ' || i, 'Abstract ' || i, 'PMC' FROM range(?) t(i)
+    """, (papers,))
+    conn.execute("""
+        INSERT INTO figures (paper_id, label, caption, figure_url)
+        SELECT 'PMC' || (i // ?), 'Figure ' || (i % ? + 1), 'Caption ' || i, NULL FROM range(?) t(i)
+    """, (figures, figures, papers * figures))
+    conn.execute("""
+        INSERT INTO entities (name, type)
+        SELECT 'Entity ' || i, ['Gene', 'Disease', 'Chemical', 'Species', 'Mutation'][i % 5 + 1]
+        FROM range(?) t(i)
+    """, (entities,))
+    conn.execute("""
+        INSERT INTO figure_entities (figure_id, entity_id)
+        SELECT DISTINCT f.id, 1 + (f.id::BIGINT * 7919 + k * 104729) % ?
+        FROM figures f, range(?) r(k)
+    """, (entities, links))
+    return entities
+
+
+def time_lookups(storage: DuckDBStorage, papers: int, figures: int, entities: int, queries: int) -> dict:
+    """Median and p95 latency in milliseconds per access path"""
+    rng = random.Random(42)
+    paper_ids = [f"PMC{rng.randrange(papers)}" for _ in range(queries)]
+    figure_ids = [rng.randrange(1, papers * figures + 1) for _ in range(queries)]
+    entity_names = [f"Entity {rng.randrange(entities)}" for _ in range(queries)]
+    entity_ids = [rng.randrange(1, entities) for _ in range(queries)]
+    conn = storage.conn
+
+    paths = {
+        "paper by paper_id": (paper_ids, lambda v: conn.execute(
+            "SELECT id FROM papers WHERE paper_id = ?", (v,)).fetchall()),
+        "figures by paper_id": (paper_ids, lambda v: conn.execute(
+            "SELECT id FROM figures WHERE paper_id = ?", (v,)).fetchall()),
+        "links by figure_id": (figure_ids, lambda v: conn.execute(
+            "SELECT entity_id FROM figure_entities WHERE figure_id = ?", (v,)).fetchall()),
+        "links by entity_id": (entity_ids, lambda v: conn.execute(
+            "SELECT figure_id FROM figure_entities WHERE entity_id = ?", (v,)).fetchall()),
+        "entity by name": (entity_names, lambda v: conn.execute(
+            "SELECT id FROM entities WHERE name = ?", (v,)).fetchall()),
+        "check_paper_completeness": (paper_ids, storage.check_paper_completeness),
+        "get_paper_with_details": (paper_ids, storage.get_paper_with_details),
+    }
+
+    results = {}
+    for name, (values, lookup) in paths.items():
+        lookup(values[0])  # Warm up
+        timings = []
+        for value in values:
+            start = time.perf_counter()
+            lookup(value)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        results[name] = (statistics.median(timings), timings[int(len(timings) * 0.95) - 1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated paper counts")
+    parser.add_argument("--figures", type=int, default=3, help="Figures per paper")
+    parser.add_argument("--links", type=int, default=4, help="Entity links per figure")
+    parser.add_argument("--queries", type=int, default=200, help="Lookups timed per access path")
+    args = parser.parse_args()
+    # Time DuckDB itself, not the in-process cache of hydrated papers
+    get_config().storage.paper_cache_mb = 0
+
+    print(f"{'papers':>9}  {'access path':<26} {'no index (median/p95 ms)':>26} {'indexed (median/p95 ms)':>25}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = DuckDBStorage(os.path.join(tmp, "bench.db"))
+            storage.drop_indexes()
+
+            start = time.perf_counter()
+            entities = populate(storage, size, args.figures, args.links)
+            load_seconds = time.perf_counter() - start
+
+            before = time_lookups(storage, size, args.figures, entities, args.queries)
+            start = time.perf_counter()
+            storage.create_indexes()
+            index_seconds = time.perf_counter() - start
+            after = time_lookups(storage, size, args.figures, entities, args.queries)
+            storage.close()
+
+        for name in before:
+            print(f"{size:>9}  {name:<26} {before[name][0]:>12.3f} / {before[name][1]:<11.3f}"
+                  f" {after[name][0]:>11.3f} / {after[name][1]:<11.3f}")
+        print(f"{size:>9}  (load {load_seconds:.1f}s, index build {index_seconds:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 import duckdb
-from storage.duckdb_backend import DuckDBStorage
+from storage.duckdb_backend import get_storage
 
 conn = duckdb.connect("data/figurex.db")
 
-db = DuckDBStorage()
+db = get_storage()
 
 print("Papers:")
 for row in db.conn.execute("SELECT * FROM papers").fetchall():
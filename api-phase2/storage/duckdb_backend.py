@@ -1,29 +1,309 @@
 # storage/duckdb_backend.py
+import base64
 import duckdb
+import functools
+import json
 import os
+import re
+import threading
 from models.paper import Paper, Figure, Entity
-from typing import List, Optional, Tuple, Dict, Any
+from storage.entity_index import EntityNameIndex
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config.config import get_config
+from utils.cache import LRUCache
 from utils.logging import get_logger
 
 logger = get_logger("figurex.storage")
 
+# Tables whose integer row IDs are allocated from a `<table>_id_seq` sequence
+ID_TABLES = ("papers", "figures", "entities", "figure_entities")
+
+# Secondary indexes created when `storage.auto_update_schema` is set. Only
+# lookups that scripts/benchmark_lookups.py shows an index actually speeds up
+# are listed: figures and links are stored clustered by paper, so zonemaps
+# already prune their paper_id/figure_id/entity_id lookups as well as an index
+SECONDARY_INDEXES = {
+    # Entities are matched by name alone when saving; UNIQUE(name, type) doesn't serve that
+    "idx_entities_name": "entities(name)",
+}
+
+# Indexes earlier versions created, dropped from existing databases
+RETIRED_INDEXES = ("idx_figures_paper_id", "idx_figure_entities_figure_id", "idx_figure_entities_entity_id")
+
+# Full-text search: documents are split on anything but ASCII letters and
+# digits after lowercasing, the same way in SQL (indexing) and Python
+# (queries), and ranked with Okapi BM25
+SEARCH_TOKEN_SPLIT = "[^a-z0-9]+"
+SEARCH_STOPWORDS = (
+    "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "was", "were", "with",
+)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Postings are kept sorted by term so a term lookup only reads the row groups
+# whose zone maps contain it (DuckDB's ART indexes don't help once other
+# predicates are involved). Saves append sorted batches; the table is re-sorted
+# once the appended tail exceeds this share of all postings.
+SEARCH_COMPACT_FRACTION = 0.2
+SEARCH_COMPACT_MIN_ROWS = 100_000
+
+# Write generation per database file, shared by every DuckDBStorage opened on
+# it in this process and bumped whenever stored papers change, so readers can
+# tell whether results they cached are still current
+_write_generations: Dict[str, int] = {}
+_write_generations_lock = threading.Lock()
+
+# Hydrated papers shared by every DuckDBStorage in this process, keyed by
+# (database file, paper_id) and bounded by `storage.paper_cache_mb`
+_paper_cache: Optional[LRUCache] = None
+_paper_cache_lock = threading.Lock()
+
+
+def _paper_size(paper: Paper) -> int:
+    """Rough memory footprint of a hydrated paper in bytes"""
+    size = 600 + len(paper.paper_id) + len(paper.title or "") + len(paper.abstract or "")
+    for fig in paper.figures:
+        size += 400 + len(fig.label) + len(fig.caption or "") + len(fig.url or "")
+        size += sum(250 + len(entity.text) + len(entity.type) for entity in fig.entities)
+    return size
+
+
+def get_paper_cache() -> Optional[LRUCache]:
+    """The process-wide hydrated paper cache, or None if it is disabled"""
+    global _paper_cache
+    max_mb = get_config().storage.paper_cache_mb
+    if max_mb <= 0:
+        return None
+    if _paper_cache is None:
+        with _paper_cache_lock:
+            if _paper_cache is None:
+                _paper_cache = LRUCache(
+                    max_entries=10_000_000, ttl=None, max_bytes=max_mb * 1024 * 1024, sizer=_paper_size
+                )
+    return _paper_cache
+
+# Fields GET /api/papers can project papers onto
+PAPER_FIELDS = ("paper_id", "title", "abstract", "figure_count", "figures")
+
+# Entity name trigram indexes for up to this many entities are built inline;
+# larger ones are built in the background while lookups fall back to ILIKE
+ENTITY_INDEX_INLINE_BUILD_MAX = 100_000
+
+
+def search_terms(text: str) -> List[str]:
+    """Split text into the terms stored in the full-text search index"""
+    return [
+        term for term in re.split(SEARCH_TOKEN_SPLIT, (text or "").lower())
+        if len(term) > 1 and term not in SEARCH_STOPWORDS
+    ]
+
+
+def _search_terms_sql(text_expr: str) -> str:
+    """SQL expression for search_terms() of a text column"""
+    stopwords = ", ".join(f"'{word}'" for word in SEARCH_STOPWORDS)
+    return (
+        f"[t FOR t IN regexp_split_to_array(lower(COALESCE({text_expr}, '')), '{SEARCH_TOKEN_SPLIT}') "
+        f"IF length(t) > 1 AND t NOT IN ({stopwords})]"
+    )
+
+
+def _serialized_write(method):
+    """Run a storage method under the storage's write lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DuckDBStorage:
+    """
+    Storage service over one DuckDB database file. Use get_storage() to
+    share a single instance per database across the process.
+
+    Every thread works through its own cursor of the database connection
+    (`conn`), so reads from FastAPI's threadpool, the ingestion pipeline and
+    background jobs run in parallel; writes are serialized by a lock so
+    concurrent saves never conflict.
+    """
+
     def __init__(self, db_path: str = "data/figurex.db"):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.conn = duckdb.connect(db_path)
+        self._connection = duckdb.connect(db_path)
+        self._cursors = threading.local()
+        self._cursor_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._db_key = os.path.abspath(db_path)
+        self._entity_index: Optional[EntityNameIndex] = None
+        self._entity_index_build: Optional[object] = None
+        self._entity_index_lock = threading.Lock()
         self._initialize_schema()
 
+    @property
+    def conn(self) -> duckdb.DuckDBPyConnection:
+        """This thread's cursor of the database connection"""
+        cursor = getattr(self._cursors, "conn", None)
+        if cursor is None:
+            with self._cursor_lock:
+                cursor = self._connection.cursor()
+            self._cursors.conn = cursor
+        return cursor
+
+    def close(self) -> None:
+        """Close the database connection and with it every thread's cursor"""
+        self._connection.close()
+
+    @_serialized_write
     def _initialize_schema(self):
         """Initialize database schema if it doesn't exist"""
         try:
             with open("storage/schema.sql", "r") as f:
                 self.conn.execute(f.read())
+            self._migrate_id_sequences()
+            if not self.conn.execute("SELECT EXISTS (SELECT 1 FROM search_stats)").fetchone()[0]:
+                # New database, or one created before full-text search
+                self.rebuild_search_index()
+            if get_config().storage.auto_update_schema:
+                self.create_indexes()
             logger.info("Database schema initialized")
         except Exception as e:
             logger.error(f"Error initializing schema: {e}")
             raise
 
+    def _migrate_id_sequences(self):
+        """
+        Move databases created before row IDs came from sequences onto them:
+        each sequence is restarted after the table's current MAX(id) and
+        attached as the id column default.
+        """
+        for table in ID_TABLES:
+            default = self.conn.execute(
+                "SELECT column_default FROM duckdb_columns() WHERE table_name = ? AND column_name = 'id'",
+                (table,)
+            ).fetchone()
+            if default is None or default[0]:
+                continue
+
+            next_id = self.conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+            self.conn.execute(f"DROP SEQUENCE IF EXISTS {table}_id_seq")
+            self.conn.execute(f"CREATE SEQUENCE {table}_id_seq START {int(next_id)}")
+            self.conn.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+            logger.info(f"Migrated {table}.id to sequence {table}_id_seq starting at {next_id}")
+
+    @_serialized_write
+    def create_indexes(self):
+        """Create the secondary indexes in SECONDARY_INDEXES that don't exist yet"""
+        for name in RETIRED_INDEXES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+        for name, target in SECONDARY_INDEXES.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+    @_serialized_write
+    def drop_indexes(self):
+        """Drop the secondary indexes (e.g. before a large bulk load)"""
+        for name in SECONDARY_INDEXES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    @_serialized_write
+    def rebuild_search_index(self):
+        """Rebuild the full-text search index from every stored paper and figure"""
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            self.conn.execute("DELETE FROM search_postings")
+            self.conn.execute("DELETE FROM search_stats")
+            self.conn.execute("INSERT INTO search_stats (doc_type) VALUES ('paper'), ('figure')")
+            self._index_documents("paper", "SELECT id AS doc_id, concat_ws(' ', title, abstract) AS text FROM papers")
+            self._index_documents("figure", "SELECT id AS doc_id, caption AS text FROM figures")
+            # Each document type was written as one sorted run
+            self.conn.execute("UPDATE search_stats SET unsorted_postings = 0")
+            self.conn.execute("COMMIT")
+            logger.info("Rebuilt the full-text search index")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        finally:
+            self.conn.execute("DROP TABLE IF EXISTS staged_documents")
+
+    def _index_documents(self, doc_type: str, documents_sql: str) -> None:
+        """
+        Replace the search postings of the documents selected by
+        `documents_sql` (columns doc_id, text) and keep the per-type document
+        count and total length used for BM25 in step. Runs inside the
+        caller's transaction.
+        """
+        self.conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE staged_documents AS
+            SELECT doc_id, {_search_terms_sql('text')} AS terms FROM ({documents_sql})
+        """)
+        removed_docs, removed_length = self.conn.execute("""
+            SELECT COUNT(*), COALESCE(SUM(doc_length), 0) FROM (
+                SELECT DISTINCT doc_id, doc_length FROM search_postings
+                WHERE doc_type = ? AND doc_id IN (SELECT doc_id FROM staged_documents)
+            )
+        """, (doc_type,)).fetchone()
+        self.conn.execute("""
+            DELETE FROM search_postings
+            WHERE doc_type = ? AND doc_id IN (SELECT doc_id FROM staged_documents)
+        """, (doc_type,))
+        added_postings = self.conn.execute("""
+            INSERT INTO search_postings (doc_type, term, doc_id, tf, doc_length)
+            SELECT ?, term, doc_id, COUNT(*), ANY_VALUE(doc_length)
+            FROM (SELECT doc_id, UNNEST(terms) AS term, len(terms) AS doc_length FROM staged_documents)
+            GROUP BY doc_id, term
+            ORDER BY term
+        """, (doc_type,)).fetchone()[0]
+        added_docs, added_length = self.conn.execute("""
+            SELECT COUNT(*), COALESCE(SUM(len(terms)), 0) FROM staged_documents WHERE len(terms) > 0
+        """).fetchone()
+        self.conn.execute("""
+            UPDATE search_stats
+            SET doc_count = doc_count + ?, total_length = total_length + ?,
+                unsorted_postings = unsorted_postings + ?
+            WHERE doc_type = ?
+        """, (added_docs - removed_docs, added_length - removed_length, added_postings, doc_type))
+
+    @_serialized_write
+    def compact_search_index(self, force: bool = False) -> bool:
+        """
+        Re-sort the search postings by term once the batches appended by saves
+        make up more than SEARCH_COMPACT_FRACTION of them (or always with
+        `force`). Returns True if the postings were rewritten.
+        """
+        unsorted, total = self.conn.execute("""
+            SELECT (SELECT SUM(unsorted_postings) FROM search_stats), (SELECT COUNT(*) FROM search_postings)
+        """).fetchone()
+        if not force and (unsorted < SEARCH_COMPACT_MIN_ROWS or unsorted < total * SEARCH_COMPACT_FRACTION):
+            return False
+
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            self.conn.execute("CREATE OR REPLACE TEMP TABLE sorted_postings AS SELECT * FROM search_postings")
+            self.conn.execute("DELETE FROM search_postings")
+            self.conn.execute("INSERT INTO search_postings SELECT * FROM sorted_postings ORDER BY term, doc_type")
+            self.conn.execute("UPDATE search_stats SET unsorted_postings = 0")
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        finally:
+            self.conn.execute("DROP TABLE IF EXISTS sorted_postings")
+
+        # Write out the sorted copy and drop the row groups of the deleted one
+        self.conn.execute("CHECKPOINT")
+        logger.info(f"Compacted {total} search postings")
+        return True
+
+    @property
+    def write_generation(self) -> int:
+        """Counter that changes whenever stored papers change"""
+        return _write_generations.get(self._db_key, 0)
+
+    def _bump_write_generation(self) -> None:
+        with _write_generations_lock:
+            _write_generations[self._db_key] = _write_generations.get(self._db_key, 0) + 1
+
+    @_serialized_write
     def reset_db(self):
         """Reset the database by dropping all tables and recreating them"""
         try:
@@ -32,9 +312,20 @@ class DuckDBStorage:
             self.conn.execute("DROP TABLE IF EXISTS entities")
             self.conn.execute("DROP TABLE IF EXISTS figures")
             self.conn.execute("DROP TABLE IF EXISTS papers")
+            self.conn.execute("DROP TABLE IF EXISTS search_postings")
+            self.conn.execute("DROP TABLE IF EXISTS search_stats")
+            for table in ID_TABLES:
+                self.conn.execute(f"DROP SEQUENCE IF EXISTS {table}_id_seq")
 
             # Reinitialize schema
+            with self._entity_index_lock:
+                self._entity_index = None
+                self._entity_index_build = None
             self._initialize_schema()
+            self._bump_write_generation()
+            cache = get_paper_cache()
+            if cache is not None:
+                cache.clear()
             logger.info("Database has been reset")
         except Exception as e:
             logger.error(f"Error resetting database: {e}")
@@ -45,185 +336,408 @@ class DuckDBStorage:
         Get all papers from the database with their figures and entities
         """
         try:
-            # Get all papers
-            papers_result = self.conn.execute("""
-                SELECT id, paper_id, title, abstract, source 
-                FROM papers
-            """).fetchall()
-
-            papers = []
-            for paper_row in papers_result:
-                paper_id = paper_row[1]
-
-                # Get figures for this paper
-                figures_result = self.conn.execute("""
-                    SELECT id, label, caption, figure_url 
-                    FROM figures 
-                    WHERE paper_id = ?
-                """, (paper_id,)).fetchall()
-
-                figures = []
-                for fig_row in figures_result:
-                    fig_id = fig_row[0]
-
-                    # Get entities for this figure
-                    entities_result = self.conn.execute("""
-                        SELECT e.id, e.name, e.type
-                        FROM entities e
-                        JOIN figure_entities fe ON e.id = fe.entity_id
-                        WHERE fe.figure_id = ?
-                    """, (fig_id,)).fetchall()
-
-                    entities = [
-                        Entity(
-                            text=entity_row[1],
-                            type=entity_row[2],
-                            start=-1,  # Default to -1 as these may not be stored
-                            end=-1  # Default to -1 as these may not be stored
-                        )
-                        for entity_row in entities_result
-                    ]
-
-                    figures.append(Figure(
-                        label=fig_row[1],
-                        caption=fig_row[2],
-                        url=fig_row[3],
-                        entities=entities
-                    ))
-
-                papers.append(Paper(
-                    paper_id=paper_id,
-                    pmc_id=paper_id,  # Add pmc_id for compatibility with test_batch_ingest.py
-                    title=paper_row[2],
-                    abstract=paper_row[3],
-                    figures=figures
-                ))
-
+            papers = list(self._hydrate_papers().values())
+            for paper in papers:
+                paper.pmc_id = paper.paper_id  # Add pmc_id for compatibility with test_batch_ingest.py
             return papers
         except Exception as e:
             logger.error(f"Error getting papers: {e}")
             return []
 
+    def get_papers_page(self, fields: Optional[List[str]] = None, limit: Optional[int] = None,
+                        cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Papers in table order as dicts holding just the requested
+        PAPER_FIELDS (all by default). Only what those fields need is read:
+        title and abstract are separate columns, `figure_count` counts
+        figures without loading them, and only `figures` loads figures and
+        entities.
+
+        Args:
+            fields: Subset of PAPER_FIELDS, in the order wanted
+            limit: Page size; None for every paper after the cursor
+            cursor: next_cursor of the previous page
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: (papers, next_cursor)
+            - next_cursor: Cursor for the following page, None on the last page
+
+        Raises:
+            ValueError: For unknown fields or a cursor not returned by this method
+        """
+        fields = list(dict.fromkeys(fields)) if fields else list(PAPER_FIELDS)
+        unknown = [field for field in fields if field not in PAPER_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}; choose from {', '.join(PAPER_FIELDS)}")
+        after = self._decode_cursor(cursor, int) if cursor else None
+
+        columns = ["id", "paper_id"] + [column for column in ("title", "abstract") if column in fields]
+        where = "WHERE id > ?" if after is not None else ""
+        # One extra row tells whether another page follows
+        limit_clause = f"LIMIT {int(limit) + 1}" if limit is not None else ""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM papers {where} ORDER BY id {limit_clause}",
+            [after] if after is not None else []
+        ).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1][0])
+        records = [dict(zip(columns, row)) for row in rows]
+        if not records:
+            return [], None
+
+        # Whole-table reads skip the ID filter
+        paper_ids = None if limit is None and after is None else [record["paper_id"] for record in records]
+        if "figures" in fields:
+            figures = self._load_figures(paper_ids)
+            for record in records:
+                record["figures"] = figures.get(record["paper_id"], [])
+                record["figure_count"] = len(record["figures"])
+        elif "figure_count" in fields:
+            where, params = self._id_filter("paper_id", paper_ids, "VARCHAR")
+            counts = dict(self.conn.execute(
+                f"SELECT paper_id, COUNT(*) FROM figures {where} GROUP BY paper_id", params
+            ).fetchall())
+            for record in records:
+                record["figure_count"] = counts.get(record["paper_id"], 0)
+
+        return [{field: record[field] for field in fields} for record in records], next_cursor
+
+    def get_papers_by_ids(self, paper_ids: List[str]) -> List[Paper]:
+        """
+        Get several papers with their figures and entities, one query per
+        table for the whole set, in the requested order. IDs that are not
+        stored are skipped.
+        """
+        if not paper_ids:
+            return []
+        try:
+            papers = self._cached_papers(paper_ids)
+            return [papers[paper_id] for paper_id in paper_ids if paper_id in papers]
+        except Exception as e:
+            logger.error(f"Error getting papers {paper_ids}: {e}")
+            return []
+
+    def _cached_papers(self, paper_ids: List[str]) -> Dict[str, Paper]:
+        """
+        Hydrated papers by paper_id, served from the shared paper cache where
+        possible; the rest are loaded in one go and cached. Cached papers are
+        shared between callers and must not be modified.
+        """
+        cache = get_paper_cache()
+        if cache is None:
+            return self._hydrate_papers(paper_ids)
+
+        papers = {}
+        missing = []
+        for paper_id in dict.fromkeys(paper_ids):
+            paper = cache.get((self._db_key, paper_id))
+            if paper is None:
+                missing.append(paper_id)
+            else:
+                papers[paper_id] = paper
+
+        if missing:
+            generation = self.write_generation
+            loaded = self._hydrate_papers(missing)
+            papers.update(loaded)
+            # A save committed while loading may have invalidated what we read
+            if self.write_generation == generation:
+                for paper_id, paper in loaded.items():
+                    cache.put((self._db_key, paper_id), paper)
+        return papers
+
+    def _invalidate_cached_papers(self, paper_ids: List[str]) -> None:
+        cache = get_paper_cache()
+        if cache is not None:
+            for paper_id in paper_ids:
+                cache.invalidate((self._db_key, paper_id))
+
+    def _id_filter(self, column: str, values: Optional[List[Any]], sql_type: str) -> Tuple[str, List[Any]]:
+        """WHERE clause restricting a column to a list of values (none for a full-table read)"""
+        if values is None:
+            return "", []
+        if len(values) == 1:
+            # Plain equality so single-paper reads stay point lookups on the index
+            return f"WHERE {column} = ?", [values[0]]
+        return f"WHERE {column} IN (SELECT UNNEST(from_json(?, '[\"{sql_type}\"]')))", [json.dumps(values)]
+
+    def _hydrate_papers(self, paper_ids: Optional[List[str]] = None) -> Dict[str, Paper]:
+        """
+        Load papers with their figures and entities using three set-based
+        queries (papers, figures, entity links) instead of one query per paper
+        and figure. Pass None to load every paper.
+
+        Returns papers keyed by paper_id, in table order; figures are ordered
+        by label and entities in the order they were linked.
+        """
+        if paper_ids is not None:
+            paper_ids = list(dict.fromkeys(paper_ids))
+            if not paper_ids:
+                return {}
+
+        where, params = self._id_filter("paper_id", paper_ids, "VARCHAR")
+        papers = {
+            row[0]: Paper(paper_id=row[0], title=row[1], abstract=row[2], figures=[])
+            for row in self.conn.execute(f"""
+                SELECT paper_id, title, abstract
+                FROM papers
+                {where}
+                ORDER BY id
+            """, params).fetchall()
+        }
+        if not papers:
+            return {}
+
+        figures = self._load_figures(None if paper_ids is None else list(papers))
+        for paper_id, paper_figures in figures.items():
+            paper = papers.get(paper_id)
+            if paper is not None:
+                paper.figures = paper_figures
+        return papers
+
+    def _load_figures(self, paper_ids: Optional[List[str]] = None) -> Dict[str, List[Figure]]:
+        """
+        Figures of the given papers (None for every paper) with their
+        entities, keyed by paper_id; figures are ordered by label and
+        entities in the order they were linked
+        """
+        if paper_ids is not None and not paper_ids:
+            return {}
+
+        where, params = self._id_filter("paper_id", paper_ids, "VARCHAR")
+        figure_rows = self.conn.execute(f"""
+            SELECT id, paper_id, label, caption, figure_url
+            FROM figures
+            {where}
+            ORDER BY paper_id, label
+        """, params).fetchall()
+        if not figure_rows:
+            return {}
+
+        by_paper: Dict[str, List[Figure]] = {}
+        figures: Dict[int, Figure] = {}
+        for fig_id, paper_id, label, caption, url in figure_rows:
+            figure = Figure(label=label, caption=caption, url=url, entities=[])
+            by_paper.setdefault(paper_id, []).append(figure)
+            figures[fig_id] = figure
+
+        where, params = self._id_filter(
+            "fe.figure_id", None if paper_ids is None else list(figures), "INTEGER"
+        )
+        for fig_id, name, entity_type in self.conn.execute(f"""
+            SELECT fe.figure_id, e.name, e.type
+            FROM figure_entities fe
+            JOIN entities e ON e.id = fe.entity_id
+            {where}
+            ORDER BY fe.figure_id, fe.id
+        """, params).fetchall():
+            figure = figures.get(fig_id)
+            if figure is not None:
+                # Positions are not stored, so start/end keep their -1 defaults
+                figure.entities.append(Entity(text=name, type=entity_type))
+
+        return by_paper
+
     def save_paper(self, paper: Paper):
         """
         Save paper and its figures/entities to database, avoiding duplicates
         """
+        self.save_papers([paper])
+
+    @staticmethod
+    def _figure_label(fig: Figure, fig_index: int) -> str:
+        """Use figure label if available, otherwise create a unique label"""
+        return fig.label if fig.label and fig.label != "Unknown Figure" else f"Figure {fig_index + 1}"
+
+    def _stage(self, table: str, columns: Dict[str, Tuple[str, List[Any]]]) -> None:
+        """
+        Load equally long column lists into a temporary staging table in one
+        statement. Columns are passed as JSON arrays, which DuckDB decodes far
+        faster than it converts Python list parameters.
+        """
+        select = ", ".join(
+            f"UNNEST(from_json(?, '[\"{sql_type}\"]')) AS {name}" for name, (sql_type, _) in columns.items()
+        )
+        self.conn.execute(
+            f"CREATE OR REPLACE TEMP TABLE {table} AS SELECT {select}",
+            [json.dumps(values) for _, values in columns.values()]
+        )
+
+    @_serialized_write
+    def save_papers(self, papers: List[Paper]):
+        """
+        Save many papers with their figures/entities in one transaction.
+
+        Papers, figures, entities and figure-entity links are staged in
+        columnar temporary tables and merged into the real tables with a few
+        set-based upserts (row IDs come from sequences), so the cost no
+        longer depends on issuing queries per row. Existing papers and
+        figures are updated (a figure's entity links are replaced), entities
+        are matched by name, and when the batch repeats a paper or figure the
+        last occurrence wins. Entity links keep the order of fig.entities.
+        """
+        # Same outcome as saving the papers one after another: the last
+        # occurrence of a paper or figure wins, figures are never dropped and
+        # entities keep the type they were first seen with
+        unique_papers = list({paper.paper_id: paper for paper in papers}.values())
+        if not unique_papers:
+            return
+
+        paper_cols = {"pos": [], "paper_id": [], "title": [], "abstract": []}
+        for pos, paper in enumerate(unique_papers):
+            paper_cols["pos"].append(pos)
+            paper_cols["paper_id"].append(paper.paper_id)
+            paper_cols["title"].append(paper.title)
+            paper_cols["abstract"].append(paper.abstract)
+
+        figures: Dict[Tuple[str, str], Figure] = {}
+        entity_cols = {"pos": [], "name": [], "type": []}
+        for paper in papers:
+            for fig_index, fig in enumerate(paper.figures):
+                key = (paper.paper_id, self._figure_label(fig, fig_index))
+                figures.pop(key, None)
+                figures[key] = fig
+                for entity in fig.entities:
+                    # Skip empty entities
+                    if entity.text:
+                        entity_cols["pos"].append(len(entity_cols["pos"]))
+                        entity_cols["name"].append(entity.text)
+                        entity_cols["type"].append(entity.type if entity.type else "UNKNOWN")
+
+        figure_cols = {"pos": [], "paper_id": [], "label": [], "caption": [], "figure_url": []}
+        link_cols = {"pos": [], "paper_id": [], "label": [], "name": []}
+        for pos, ((paper_id, label), fig) in enumerate(figures.items()):
+            figure_cols["pos"].append(pos)
+            figure_cols["paper_id"].append(paper_id)
+            figure_cols["label"].append(label)
+            figure_cols["caption"].append(fig.caption)
+            figure_cols["figure_url"].append(fig.url)
+            for entity in fig.entities:
+                if entity.text:
+                    link_cols["pos"].append(len(link_cols["pos"]))
+                    link_cols["paper_id"].append(paper_id)
+                    link_cols["label"].append(label)
+                    link_cols["name"].append(entity.text)
+
         try:
             # Begin transaction
             self.conn.execute("BEGIN TRANSACTION")
 
-            # Check if paper_id already exists
-            existing = self.conn.execute(
-                "SELECT id FROM papers WHERE paper_id = ?", (paper.paper_id,)
-            ).fetchone()
+            self._stage("staged_papers", {
+                "pos": ("INTEGER", paper_cols["pos"]),
+                "paper_id": ("VARCHAR", paper_cols["paper_id"]),
+                "title": ("VARCHAR", paper_cols["title"]),
+                "abstract": ("VARCHAR", paper_cols["abstract"]),
+            })
+            self._stage("staged_figures", {
+                "pos": ("INTEGER", figure_cols["pos"]),
+                "paper_id": ("VARCHAR", figure_cols["paper_id"]),
+                "label": ("VARCHAR", figure_cols["label"]),
+                "caption": ("VARCHAR", figure_cols["caption"]),
+                "figure_url": ("VARCHAR", figure_cols["figure_url"]),
+            })
+            self._stage("staged_entities", {
+                "pos": ("INTEGER", entity_cols["pos"]),
+                "name": ("VARCHAR", entity_cols["name"]),
+                "type": ("VARCHAR", entity_cols["type"]),
+            })
+            self._stage("staged_links", {
+                "pos": ("INTEGER", link_cols["pos"]),
+                "paper_id": ("VARCHAR", link_cols["paper_id"]),
+                "label": ("VARCHAR", link_cols["label"]),
+                "name": ("VARCHAR", link_cols["name"]),
+            })
 
-            if existing:
-                paper_row_id = existing[0]
-                # Update paper info
-                self.conn.execute(
-                    "UPDATE papers SET title = ?, abstract = ?, source = ? WHERE id = ?",
-                    (paper.title, paper.abstract, "PMC", paper_row_id)
-                )
-                logger.info(f"Updated existing paper: {paper.paper_id}")
-            else:
-                # Insert new paper
-                paper_row_id = self.get_next_id("papers")
-                self.conn.execute(
-                    "INSERT INTO papers (id, paper_id, title, abstract, source) VALUES (?, ?, ?, ?, ?)",
-                    (paper_row_id, paper.paper_id, paper.title, paper.abstract, "PMC")
+            # Papers: insert new ones, update the ones we have
+            self.conn.execute("""
+                INSERT INTO papers (paper_id, title, abstract, source)
+                SELECT paper_id, title, abstract, 'PMC' FROM staged_papers ORDER BY pos
+                ON CONFLICT (paper_id) DO UPDATE
+                SET title = excluded.title, abstract = excluded.abstract, source = excluded.source
+            """)
+
+            # Figures: existing ones lose their old entity links and are updated
+            self.conn.execute("""
+                DELETE FROM figure_entities
+                WHERE figure_id IN (
+                    SELECT f.id FROM figures f
+                    JOIN staged_figures s ON f.paper_id = s.paper_id AND f.label = s.label
                 )
-                logger.info(f"Inserted new paper: {paper.paper_id}")
+            """)
+            self.conn.execute("""
+                INSERT INTO figures (paper_id, label, caption, figure_url)
+                SELECT paper_id, label, caption, figure_url FROM staged_figures ORDER BY pos
+                ON CONFLICT (paper_id, label) DO UPDATE
+                SET caption = excluded.caption, figure_url = excluded.figure_url
+            """)
 
-            # Save figures without duplication
-            for fig_index, fig in enumerate(paper.figures):
-                # Use figure label if available, otherwise create a unique label
-                fig_label = fig.label if fig.label and fig.label != "Unknown Figure" else f"Figure {fig_index + 1}"
-
-                # Check if this figure already exists for this paper
-                existing_fig = self.conn.execute(
-                    "SELECT id FROM figures WHERE paper_id = ? AND label = ?",
-                    (paper.paper_id, fig_label)
-                ).fetchone()
-
-                if existing_fig:
-                    fig_row_id = existing_fig[0]
-                    # Update the existing figure
-                    self.conn.execute(
-                        "UPDATE figures SET caption = ?, figure_url = ? WHERE id = ?",
-                        (fig.caption, fig.url, fig_row_id)
-                    )
-                    logger.info(f"Updated existing figure: {fig_label} for paper {paper.paper_id}")
-
-                    # Clear existing entity links for this figure before adding new ones
-                    self.conn.execute(
-                        "DELETE FROM figure_entities WHERE figure_id = ?",
-                        (fig_row_id,)
-                    )
-                else:
-                    # Create new figure
-                    fig_row_id = self.get_next_id("figures")
-                    self.conn.execute(
-                        "INSERT INTO figures (id, paper_id, label, caption, figure_url) VALUES (?, ?, ?, ?, ?)",
-                        (fig_row_id, paper.paper_id, fig_label, fig.caption, fig.url)
-                    )
-                    logger.info(f"Inserted new figure: {fig_label} for paper {paper.paper_id}")
-
-                # Process entities for this figure
-                entity_count = 0
-                for entity in fig.entities:
-                    # Skip empty entities
-                    if not entity.text:
-                        continue
-
-                    # Use type if available
-                    entity_type = entity.type if entity.type else "UNKNOWN"
-
-                    # Check if entity already exists
-                    entity_row = self.conn.execute(
-                        "SELECT id FROM entities WHERE name = ?",
-                        (entity.text,)
-                    ).fetchone()
-
-                    if entity_row is None:
-                        entity_row_id = self.get_next_id("entities")
-                        self.conn.execute(
-                            "INSERT INTO entities (id, name, type) VALUES (?, ?, ?)",
-                            (entity_row_id, entity.text, entity_type)
-                        )
-                    else:
-                        entity_row_id = entity_row[0]
-
-                    # Check if this figure-entity link already exists
-                    existing_link = self.conn.execute(
-                        "SELECT id FROM figure_entities WHERE figure_id = ? AND entity_id = ?",
-                        (fig_row_id, entity_row_id)
-                    ).fetchone()
-
-                    if existing_link is None:
-                        # Link entity to figure
-                        fe_id = self.get_next_id("figure_entities")
-                        self.conn.execute(
-                            "INSERT INTO figure_entities (id, figure_id, entity_id) VALUES (?, ?, ?)",
-                            (fe_id, fig_row_id, entity_row_id)
-                        )
-                        entity_count += 1
-
-                logger.info(f"Added {entity_count} entities to figure {fig_label}")
+            # Keep the full-text search index in step with the saved text
+            self._index_documents("paper", """
+                SELECT p.id AS doc_id, concat_ws(' ', p.title, p.abstract) AS text
+                FROM papers p JOIN staged_papers s ON s.paper_id = p.paper_id
+            """)
+            self._index_documents("figure", """
+                SELECT f.id AS doc_id, f.caption AS text
+                FROM figures f JOIN staged_figures s ON f.paper_id = s.paper_id AND f.label = s.label
+            """)
+
+            # Entities are matched by name; a new name keeps the type it first appeared with
+            self.conn.execute("""
+                INSERT INTO entities (name, type)
+                SELECT s.name, s.type
+                FROM (
+                    SELECT name, ARG_MIN(type, pos) AS type
+                    FROM staged_entities
+                    GROUP BY name
+                ) s
+                WHERE NOT EXISTS (SELECT 1 FROM entities e WHERE e.name = s.name)
+                ON CONFLICT DO NOTHING
+            """)
+
+            # Staged figures are new or just had their links removed, so the links
+            # cannot conflict (DuckDB's ON CONFLICT path is much slower on large batches).
+            # Link IDs follow each entity's first mention, which is the order they are loaded in
+            self.conn.execute("""
+                INSERT INTO figure_entities (figure_id, entity_id)
+                SELECT f.id, e.entity_id
+                FROM staged_links s
+                JOIN figures f ON f.paper_id = s.paper_id AND f.label = s.label
+                JOIN (
+                    SELECT name, MIN(id) AS entity_id
+                    FROM entities
+                    WHERE name IN (SELECT name FROM staged_links)
+                    GROUP BY name
+                ) e ON e.name = s.name
+                GROUP BY f.id, e.entity_id
+                ORDER BY MIN(s.pos)
+            """)
 
             # Commit transaction
             self.conn.execute("COMMIT")
-            logger.info(f"Successfully saved paper {paper.paper_id} with {len(paper.figures)} figures")
+            self._bump_write_generation()
+            self._invalidate_cached_papers(paper_cols["paper_id"])
+            logger.info(
+                f"Successfully saved {len(unique_papers)} paper(s) with {len(figures)} figures "
+                f"and {len(link_cols['name'])} entity mentions"
+            )
 
         except Exception as e:
             # Rollback on error
             self.conn.execute("ROLLBACK")
-            logger.error(f"Error saving paper {paper.paper_id}: {e}")
+            logger.error(f"Error saving papers {', '.join(paper_cols['paper_id'])}: {e}")
             raise
+        finally:
+            for table in ("staged_papers", "staged_figures", "staged_entities", "staged_links", "staged_documents"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
 
-    def get_next_id(self, table_name: str) -> int:
-        """Get the next available ID for a table"""
-        result = self.conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table_name}").fetchone()
-        return result[0]
+        try:
+            self.compact_search_index()
+        except Exception as e:
+            # The papers are saved; search just stays slower until the next compaction
+            logger.warning(f"Error compacting the search index: {e}")
 
     def get_paper_with_details(self, paper_id: str) -> Optional[Paper]:
         """
@@ -231,60 +745,7 @@ class DuckDBStorage:
         Returns None if the paper doesn't exist.
         """
         try:
-            # Get paper details
-            paper_result = self.conn.execute("""
-                SELECT id, paper_id, title, abstract, source 
-                FROM papers 
-                WHERE paper_id = ?
-            """, (paper_id,)).fetchone()
-
-            if not paper_result:
-                return None
-
-            # Get figures for this paper
-            figures_result = self.conn.execute("""
-                SELECT id, label, caption, figure_url 
-                FROM figures 
-                WHERE paper_id = ?
-                ORDER BY label  -- Ensure figures are in order
-            """, (paper_id,)).fetchall()
-
-            figures = []
-            for fig_row in figures_result:
-                fig_id = fig_row[0]
-
-                # Get entities for this figure
-                entities_result = self.conn.execute("""
-                    SELECT e.id, e.name, e.type
-                    FROM entities e
-                    JOIN figure_entities fe ON e.id = fe.entity_id
-                    WHERE fe.figure_id = ?
-                """, (fig_id,)).fetchall()
-
-                entities = [
-                    Entity(
-                        text=entity_row[1],
-                        type=entity_row[2],
-                        start=-1,  # Default to -1 as these may not be stored
-                        end=-1  # Default to -1 as these may not be stored
-                    )
-                    for entity_row in entities_result
-                ]
-
-                figures.append(Figure(
-                    label=fig_row[1],
-                    caption=fig_row[2],
-                    url=fig_row[3],
-                    entities=entities
-                ))
-
-            return Paper(
-                paper_id=paper_id,
-                title=paper_result[2],
-                abstract=paper_result[3],
-                figures=figures
-            )
-
+            return self._cached_papers([paper_id]).get(paper_id)
         except Exception as e:
             logger.error(f"Error retrieving paper {paper_id}: {e}")
             return None
@@ -298,23 +759,38 @@ class DuckDBStorage:
             - is_complete: True if paper exists and has all required data
             - reason: Description of why the paper is incomplete or "complete"
         """
+        cache = get_paper_cache()
+        paper = cache.get((self._db_key, paper_id)) if cache is not None else None
+        if paper is not None:
+            # Hot paper: decide from the cached copy without touching DuckDB
+            if not paper.title or not paper.abstract:
+                return False, "Missing title or abstract"
+            if not paper.figures:
+                return False, "No figures found"
+            if not any(fig.entities for fig in paper.figures):
+                return False, "No entities found"
+            return True, "complete"
+
         try:
-            # Check if paper exists
+            # Check if paper exists. Point lookups on paper_id and figure_id
+            # rather than joining the whole link table; these rely on DuckDB's
+            # zonemaps over the paper-clustered figures and links, not on
+            # secondary indexes
             paper_result = self.conn.execute("""
-                SELECT p.id, p.title, p.abstract,
-                       COUNT(DISTINCT f.id) as figure_count,
-                       COUNT(DISTINCT fe.id) as entity_count
+                SELECT p.title, p.abstract,
+                       (SELECT COUNT(*) FROM figures WHERE paper_id = $1) AS figure_count,
+                       EXISTS (
+                           SELECT 1 FROM figure_entities
+                           WHERE figure_id IN (SELECT id FROM figures WHERE paper_id = $1)
+                       ) AS has_entities
                 FROM papers p
-                LEFT JOIN figures f ON p.paper_id = f.paper_id
-                LEFT JOIN figure_entities fe ON f.id = fe.figure_id
-                WHERE p.paper_id = ?
-                GROUP BY p.id, p.title, p.abstract
+                WHERE p.paper_id = $1
             """, (paper_id,)).fetchone()
 
             if not paper_result:
                 return False, "Paper not found in database"
 
-            paper_id, title, abstract, figure_count, entity_count = paper_result
+            title, abstract, figure_count, has_entities = paper_result
 
             if not title or not abstract:
                 return False, "Missing title or abstract"
@@ -322,7 +798,7 @@ class DuckDBStorage:
             if figure_count == 0:
                 return False, "No figures found"
 
-            if entity_count == 0:
+            if not has_entities:
                 return False, "No entities found"
 
             return True, "complete"
@@ -335,6 +811,21 @@ class DuckDBStorage:
         """
         Search papers based on query parameters
         
+        Args:
+            query_params: Dictionary of query parameters (see search_papers_page)
+                
+        Returns:
+            Tuple[int, List[Paper]]: (total_count, papers)
+            - total_count: Total number of papers matching the query
+            - papers: List of papers matching the query
+        """
+        total_count, papers, _ = self.search_papers_page(query_params)
+        return total_count, papers
+
+    def search_papers_page(self, query_params: Dict[str, Any]) -> Tuple[int, List[Paper], Optional[str]]:
+        """
+        Search papers based on query parameters, ordered by paper ID
+
         Args:
             query_params: Dictionary of query parameters
                 - paper_ids: List of paper IDs to filter by
@@ -342,94 +833,539 @@ class DuckDBStorage:
                 - abstract_contains: Filter by abstract containing text
                 - caption_contains: Filter by caption containing text
                 - entity_text: Filter by entity text
+                - entity_similarity: Also match entity names at least this similar
+                  (normalized Levenshtein) to entity_text
                 - entity_type: Filter by entity type
                 - limit: Maximum number of results to return
                 - offset: Number of results to skip
-                
+                - cursor: Continue after the page that returned this next_cursor
+                  (keyset pagination, takes the place of offset)
+
         Returns:
-            Tuple[int, List[Paper]]: (total_count, papers)
-            - total_count: Total number of papers matching the query
-            - papers: List of papers matching the query
+            Tuple[int, List[Paper], Optional[str]]: (total_count, papers, next_cursor)
+            - next_cursor: Opaque cursor for the following page, None on the last page
+
+        Raises:
+            ValueError: If the cursor is not one returned by this method
         """
+        after = self._decode_cursor(query_params['cursor']) if query_params.get('cursor') else None
+
         try:
-            # Start building the query
-            query = """
-                SELECT DISTINCT p.paper_id
-                FROM papers p
+            where_clauses, params = self._search_filter(query_params)
+            where = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+            limit = int(query_params.get('limit', 10))
+            offset = int(query_params.get('offset', 0))
+
+            # The total is counted over every match in the same pass; the
+            # cursor is applied afterwards so it doesn't change the total
+            query = f"""
+                SELECT paper_id, total FROM (
+                    SELECT p.paper_id, COUNT(*) OVER () AS total
+                    FROM papers p
+                    {where}
+                )
             """
-            
-            # Add joins based on query parameters
-            joins = []
-            where_clauses = []
-            params = []
-            
-            # If we need to search in figures or entities, add the appropriate joins
-            if query_params.get('caption_contains') or query_params.get('entity_text') or query_params.get('entity_type'):
-                joins.append("LEFT JOIN figures f ON p.paper_id = f.paper_id")
-                
-            if query_params.get('entity_text') or query_params.get('entity_type'):
-                joins.append("LEFT JOIN figure_entities fe ON f.id = fe.figure_id")
-                joins.append("LEFT JOIN entities e ON fe.entity_id = e.id")
-            
-            # Add where clauses based on query parameters
-            if query_params.get('paper_ids'):
-                placeholders = ", ".join(["?" for _ in query_params['paper_ids']])
-                where_clauses.append(f"p.paper_id IN ({placeholders})")
-                params.extend(query_params['paper_ids'])
-                
-            if query_params.get('title_contains'):
-                where_clauses.append("p.title ILIKE ?")
-                params.append(f"%{query_params['title_contains']}%")
-                
-            if query_params.get('abstract_contains'):
-                where_clauses.append("p.abstract ILIKE ?")
-                params.append(f"%{query_params['abstract_contains']}%")
-                
-            if query_params.get('caption_contains'):
-                where_clauses.append("f.caption ILIKE ?")
-                params.append(f"%{query_params['caption_contains']}%")
-                
-            if query_params.get('entity_text'):
-                where_clauses.append("e.name ILIKE ?")
-                params.append(f"%{query_params['entity_text']}%")
-                
-            if query_params.get('entity_type'):
-                where_clauses.append("e.type ILIKE ?")
-                params.append(f"%{query_params['entity_type']}%")
-            
-            # Add joins to query
-            for join in joins:
-                query += f" {join}"
-                
-            # Add where clauses to query
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-            
-            # Count total results
-            count_query = f"SELECT COUNT(*) FROM ({query}) as subquery"
-            total_count = self.conn.execute(count_query, params).fetchone()[0]
-            
-            # Add limit and offset
-            limit = query_params.get('limit', 10)
-            offset = query_params.get('offset', 0)
-            query += f" ORDER BY p.paper_id LIMIT {limit} OFFSET {offset}"
-            
-            # Execute query to get paper IDs
-            paper_ids = [row[0] for row in self.conn.execute(query, params).fetchall()]
-            
-            # Get full paper details for each ID
-            papers = []
-            for paper_id in paper_ids:
-                paper = self.get_paper_with_details(paper_id)
-                if paper:
-                    papers.append(paper)
-            
-            return total_count, papers
-            
+            # One extra row tells whether another page follows
+            if after is not None:
+                query += f" WHERE paper_id > ? ORDER BY paper_id LIMIT {limit + 1}"
+                page_params = params + [after]
+            else:
+                query += f" ORDER BY paper_id LIMIT {limit + 1} OFFSET {offset}"
+                page_params = params
+
+            rows = self.conn.execute(query, page_params).fetchall()
+            if rows:
+                total_count = rows[0][1]
+            elif after is not None or offset:
+                # Past the last match: count separately
+                total_count = self.conn.execute(f"SELECT COUNT(*) FROM papers p {where}", params).fetchone()[0]
+            else:
+                total_count = 0
+
+            paper_ids = [row[0] for row in rows[:limit]]
+            next_cursor = self._encode_cursor(paper_ids[-1]) if len(rows) > limit else None
+
+            # Get full paper details for the whole page at once
+            return total_count, self.get_papers_by_ids(paper_ids), next_cursor
+
         except Exception as e:
             logger.error(f"Error searching papers: {e}")
+            return 0, [], None
+
+    def _search_filter(self, query_params: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+        """WHERE clauses over papers `p` (and their parameters) for the search filters"""
+        where_clauses = []
+        params = []
+
+        if query_params.get('paper_ids'):
+            where_clauses.append("p.paper_id IN (SELECT UNNEST(from_json(?, '[\"VARCHAR\"]')))")
+            params.append(json.dumps(query_params['paper_ids']))
+
+        if query_params.get('title_contains'):
+            where_clauses.append("p.title ILIKE ?")
+            params.append(f"%{query_params['title_contains']}%")
+
+        if query_params.get('abstract_contains'):
+            where_clauses.append("p.abstract ILIKE ?")
+            params.append(f"%{query_params['abstract_contains']}%")
+
+        # Caption and entity predicates must hold for the same figure (and
+        # entity), checked with one semi-join per paper instead of joining
+        # every figure and entity row and de-duplicating afterwards
+        figure_clauses = []
+        if query_params.get('caption_contains'):
+            figure_clauses.append("f.caption ILIKE ?")
+            params.append(f"%{query_params['caption_contains']}%")
+
+        needs_entities = bool(query_params.get('entity_text') or query_params.get('entity_type'))
+        if query_params.get('entity_text'):
+            entity_ids = self.find_entity_ids(query_params['entity_text'], query_params.get('entity_similarity'))
+            if entity_ids is None:
+                # Shorter than a trigram: fall back to scanning the names
+                figure_clauses.append("e.name ILIKE ?")
+                params.append(f"%{query_params['entity_text']}%")
+            else:
+                figure_clauses.append("fe.entity_id IN (SELECT UNNEST(from_json(?, '[\"INTEGER\"]')))")
+                params.append(json.dumps(entity_ids))
+
+        if query_params.get('entity_type'):
+            figure_clauses.append("e.type ILIKE ?")
+            params.append(f"%{query_params['entity_type']}%")
+
+        if figure_clauses:
+            joins = """
+                JOIN figure_entities fe ON fe.figure_id = f.id
+                JOIN entities e ON e.id = fe.entity_id
+            """ if needs_entities else ""
+            where_clauses.append(f"""
+                EXISTS (
+                    SELECT 1 FROM figures f {joins}
+                    WHERE f.paper_id = p.paper_id AND {" AND ".join(figure_clauses)}
+                )
+            """)
+
+        return where_clauses, params
+
+    def iter_search_papers(self, query_params: Dict[str, Any], chunk_size: int = 500) -> Iterator[List[Paper]]:
+        """
+        Every paper matching the search_papers_page filters, ordered by paper
+        ID, in chunks of at most `chunk_size` hydrated papers. Starts after
+        `cursor` or skips `offset` matches and stops after `limit` papers if
+        given. Each chunk is its own keyset query, so memory use depends on
+        the chunk size, not on the number of matches, and streamed papers
+        don't displace hot ones from the paper cache.
+
+        Raises:
+            ValueError: If the cursor is not one returned by search_papers_page
+        """
+        after = self._decode_cursor(query_params['cursor']) if query_params.get('cursor') else None
+        where_clauses, params = self._search_filter(query_params)
+        remaining = query_params.get('limit')
+        offset = 0 if after is not None else int(query_params.get('offset', 0))
+
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            clauses = where_clauses + (["p.paper_id > ?"] if after is not None else [])
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            paper_ids = [row[0] for row in self.conn.execute(f"""
+                SELECT p.paper_id FROM papers p
+                {where}
+                ORDER BY p.paper_id
+                LIMIT {int(size)} OFFSET {offset}
+            """, params + ([after] if after is not None else [])).fetchall()]
+            if not paper_ids:
+                return
+
+            papers = self._hydrate_papers(paper_ids)
+            yield [papers[paper_id] for paper_id in paper_ids if paper_id in papers]
+            if len(paper_ids) < size:
+                return
+            after, offset = paper_ids[-1], 0
+            if remaining is not None:
+                remaining -= len(paper_ids)
+
+    @staticmethod
+    def _encode_cursor(after: Any) -> str:
+        """Opaque keyset cursor pointing after a sort key (paper_id or row id)"""
+        return base64.urlsafe_b64encode(json.dumps({"after": after}).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, key_type: type = str) -> Any:
+        """Sort key of type `key_type` a cursor from _encode_cursor points after"""
+        try:
+            after = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["after"]
+        except (ValueError, TypeError, KeyError, UnicodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        if not isinstance(after, key_type) or isinstance(after, bool):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return after
+
+    def search_text(self, query: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """
+        Full-text search: rank papers (title and abstract) and figures
+        (caption) matching any term of `query` by BM25 score.
+
+        Returns:
+            Dict with
+            - total_papers / total_figures: number of matching papers / figures
+            - papers: list of (Paper, score) for the requested page
+            - figures: list of dicts (paper_id, label, caption, url, score) for the requested page
+        """
+        result = {"total_papers": 0, "papers": [], "total_figures": 0, "figures": []}
+        terms = list(dict.fromkeys(search_terms(query)))
+        if not terms:
+            return result
+
+        try:
+            result["total_papers"], paper_scores = self._bm25("paper", terms, limit, offset)
+            if paper_scores:
+                paper_ids = dict(self.conn.execute(
+                    "SELECT id, paper_id FROM papers WHERE id IN (SELECT UNNEST(from_json(?, '[\"INTEGER\"]')))",
+                    [json.dumps([doc_id for doc_id, _ in paper_scores])]
+                ).fetchall())
+                papers = {
+                    paper.paper_id: paper
+                    for paper in self.get_papers_by_ids([paper_ids[doc_id] for doc_id, _ in paper_scores])
+                }
+                result["papers"] = [
+                    (papers[paper_ids[doc_id]], score) for doc_id, score in paper_scores
+                    if paper_ids.get(doc_id) in papers
+                ]
+
+            result["total_figures"], figure_scores = self._bm25("figure", terms, limit, offset)
+            if figure_scores:
+                figures = {
+                    row[0]: row[1:] for row in self.conn.execute("""
+                        SELECT id, paper_id, label, caption, figure_url FROM figures
+                        WHERE id IN (SELECT UNNEST(from_json(?, '["INTEGER"]')))
+                    """, [json.dumps([doc_id for doc_id, _ in figure_scores])]).fetchall()
+                }
+                result["figures"] = [
+                    {
+                        "paper_id": figures[doc_id][0],
+                        "label": figures[doc_id][1],
+                        "caption": figures[doc_id][2],
+                        "url": figures[doc_id][3],
+                        "score": score
+                    }
+                    for doc_id, score in figure_scores if doc_id in figures
+                ]
+
+            return result
+        except Exception as e:
+            logger.error(f"Error running full-text search for {query!r}: {e}")
+            return {"total_papers": 0, "papers": [], "total_figures": 0, "figures": []}
+
+    def _bm25(self, doc_type: str, terms: List[str], limit: int, offset: int) -> Tuple[int, List[Tuple[int, float]]]:
+        """
+        BM25-ranked (doc_id, score) page of the documents of one type that
+        contain any of `terms`, plus the total number of matching documents
+        """
+        doc_count, total_length = self.conn.execute(
+            "SELECT doc_count, total_length FROM search_stats WHERE doc_type = ?", (doc_type,)
+        ).fetchone()
+        if not doc_count:
             return 0, []
-            
+
+        # Terms are a constant IN list so zone maps skip the row groups without
+        # them; the corpus statistics are plain numbers and inlined
+        placeholders = ", ".join("?" for _ in terms)
+        matches = f"""
+            SELECT term, doc_id, tf, doc_length FROM search_postings
+            WHERE term IN ({placeholders}) AND doc_type = ?
+        """
+        avg_length = total_length / doc_count
+        rows = self.conn.execute(f"""
+            WITH matches AS (
+                SELECT doc_id, tf, doc_length, COUNT(*) OVER (PARTITION BY term) AS df
+                FROM ({matches})
+            ),
+            scores AS (
+                SELECT doc_id,
+                       SUM(
+                           ln(1 + ({int(doc_count)} - df + 0.5) / (df + 0.5))
+                           * tf * ({BM25_K1} + 1)
+                           / (tf + {BM25_K1} * (1 - {BM25_B} + {BM25_B} * doc_length / {float(avg_length)}))
+                       ) AS score
+                FROM matches
+                GROUP BY doc_id
+            )
+            SELECT doc_id, score, COUNT(*) OVER () AS total
+            FROM scores
+            ORDER BY score DESC, doc_id
+            LIMIT {int(limit)} OFFSET {int(offset)}
+        """, [*terms, doc_type]).fetchall()
+        if rows:
+            return rows[0][2], [(row[0], row[1]) for row in rows]
+        if offset:
+            # Page past the end: still report how many documents matched
+            total = self.conn.execute(
+                f"SELECT COUNT(DISTINCT doc_id) FROM ({matches})", [*terms, doc_type]
+            ).fetchone()[0]
+            return total, []
+        return 0, []
+
+    def get_id_aliases(self, pmids: List[str], pmc_ids: List[str],
+                       negative_ttl: Optional[float] = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Look up stored PMID <-> PMC ID mappings.
+
+        Args:
+            pmids: PMIDs to look up
+            pmc_ids: PMC IDs to look up
+            negative_ttl: Seconds for which an entry recording that an ID has
+                no counterpart is trusted; older ones are treated as missing.
+                None keeps them forever, as are imported entries
+
+        Returns:
+            Tuple[Dict[str, str], Dict[str, str]]: (pmid_to_pmc, pmc_to_pmid)
+            Only IDs with a stored mapping are present; the value is an empty
+            string when the ID is known to have no counterpart.
+        """
+        pmid_to_pmc: Dict[str, str] = {}
+        pmc_to_pmid: Dict[str, str] = {}
+        expired = ("NOT imported AND resolved_at < CURRENT_TIMESTAMP - to_seconds(?)"
+                   if negative_ttl is not None else "false")
+        ttl_params = [float(negative_ttl)] if negative_ttl is not None else []
+        try:
+            if pmids:
+                rows = self.conn.execute(f"""
+                    SELECT pmid, pmc_id FROM id_aliases
+                    WHERE pmid IN (SELECT UNNEST(?::VARCHAR[]))
+                      AND NOT (pmc_id = '' AND {expired})
+                    ORDER BY pmc_id DESC  -- Prefer a real mapping over a negative entry
+                """, [pmids] + ttl_params).fetchall()
+                for pmid, pmc_id in rows:
+                    pmid_to_pmc.setdefault(pmid, pmc_id)
+            if pmc_ids:
+                rows = self.conn.execute(f"""
+                    SELECT pmc_id, pmid FROM id_aliases
+                    WHERE pmc_id IN (SELECT UNNEST(?::VARCHAR[]))
+                      AND NOT (pmid = '' AND {expired})
+                    ORDER BY pmid DESC  -- Prefer a real mapping over a negative entry
+                """, [pmc_ids] + ttl_params).fetchall()
+                for pmc_id, pmid in rows:
+                    pmc_to_pmid.setdefault(pmc_id, pmid)
+        except Exception as e:
+            logger.error(f"Error looking up ID aliases: {e}")
+        return pmid_to_pmc, pmc_to_pmid
+
+    @_serialized_write
+    def save_id_aliases(self, aliases: List[Tuple[str, str]]) -> None:
+        """
+        Store (pmid, pmc_id) mappings; ones already known are marked as
+        resolved now, which restarts the expiry of negative entries
+        """
+        if not aliases:
+            return
+        try:
+            self.conn.execute("""
+                INSERT INTO id_aliases (pmid, pmc_id)
+                SELECT DISTINCT pmid, pmc_id
+                FROM (SELECT UNNEST(?::VARCHAR[]) AS pmid, UNNEST(?::VARCHAR[]) AS pmc_id)
+                ON CONFLICT (pmid, pmc_id) DO UPDATE SET resolved_at = excluded.resolved_at
+            """, ([pmid for pmid, _ in aliases], [pmc_id for _, pmc_id in aliases]))
+        except Exception as e:
+            logger.error(f"Error saving ID aliases: {e}")
+
+    @_serialized_write
+    def import_id_aliases_csv(self, csv_path: str) -> int:
+        """
+        Bulk-load PMID <-> PMC ID mappings from the NCBI PMC-ids.csv(.gz) dump.
+
+        The file is streamed by DuckDB's CSV reader (gzip is handled
+        transparently), so it is never held in Python memory. The secondary
+        indexes are rebuilt once after the load instead of row by row.
+
+        Returns:
+            int: Number of new mappings added
+        """
+        before = self.conn.execute("SELECT COUNT(*) FROM id_aliases").fetchone()[0]
+
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            self.conn.execute("DROP INDEX IF EXISTS idx_id_aliases_pmid")
+            self.conn.execute("DROP INDEX IF EXISTS idx_id_aliases_pmc_id")
+            # PMC IDs without a PMID are kept as authoritative negative entries
+            self.conn.execute("""
+                INSERT INTO id_aliases (pmid, pmc_id, imported)
+                SELECT DISTINCT COALESCE(PMID, ''), PMCID, true
+                FROM read_csv(?, header = true, all_varchar = true)
+                WHERE PMCID IS NOT NULL
+                ON CONFLICT (pmid, pmc_id) DO UPDATE SET imported = true
+            """, (csv_path,))
+            self.conn.execute("CREATE INDEX idx_id_aliases_pmid ON id_aliases(pmid)")
+            self.conn.execute("CREATE INDEX idx_id_aliases_pmc_id ON id_aliases(pmc_id)")
+            self.conn.execute("COMMIT")
+        except Exception as e:
+            self.conn.execute("ROLLBACK")
+            logger.error(f"Error importing ID mappings from {csv_path}: {e}")
+            raise
+
+        after = self.conn.execute("SELECT COUNT(*) FROM id_aliases").fetchone()[0]
+        logger.info(f"Imported {after - before} ID mappings from {csv_path}")
+        return after - before
+
+    @_serialized_write
+    def create_job(self, job_id: str, paper_ids: List[str]) -> None:
+        """Record a newly queued processing job"""
+        self.conn.execute(
+            "INSERT INTO jobs (job_id, status, paper_ids) VALUES (?, 'queued', ?)",
+            (job_id, json.dumps(paper_ids))
+        )
+
+    @_serialized_write
+    def update_job_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """
+        Move a job to `status`, stamping when it first started running and
+        when it completed or failed
+        """
+        self.conn.execute("""
+            UPDATE jobs
+            SET status = ?, error = ?,
+                started_at = CASE WHEN ? = 'running' THEN COALESCE(started_at, now()) ELSE started_at END,
+                finished_at = CASE WHEN ? IN ('completed', 'failed') THEN now() END
+            WHERE job_id = ?
+        """, (status, error, status, status, job_id))
+
+    @_serialized_write
+    def save_job_results(self, job_id: str, results: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Store the results of a job by position in its paper_ids list"""
+        if not results:
+            return
+        self.conn.execute("""
+            INSERT OR REPLACE INTO job_results (job_id, position, status, result)
+            SELECT ?, UNNEST(from_json(?, '["INTEGER"]')), UNNEST(from_json(?, '["VARCHAR"]')),
+                   UNNEST(from_json(?, '["VARCHAR"]'))
+        """, (
+            job_id,
+            json.dumps([position for position, _ in results]),
+            json.dumps([result.get("status", "error") for _, result in results]),
+            json.dumps([json.dumps(result, default=str) for _, result in results]),
+        ))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        A job with its requested paper_ids and the results stored so far
+        (`results`, by position), or None if there is no such job
+        """
+        row = self.conn.execute("""
+            SELECT job_id, status, paper_ids, error, created_at, started_at, finished_at
+            FROM jobs WHERE job_id = ?
+        """, (job_id,)).fetchone()
+        if row is None:
+            return None
+        results = self.conn.execute(
+            "SELECT position, result FROM job_results WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "paper_ids": json.loads(row[2]),
+            "error": row[3],
+            "created_at": row[4],
+            "started_at": row[5],
+            "finished_at": row[6],
+            "results": {position: json.loads(result) for position, result in results},
+        }
+
+    def get_job_summary(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        A job's status, number of requested IDs (`total`) and counts of the
+        results stored so far, without loading them; None if there is no
+        such job
+        """
+        row = self.conn.execute("""
+            SELECT j.job_id, j.status, json_array_length(j.paper_ids), j.error,
+                   COUNT(r.position), COUNT(r.position) FILTER (WHERE r.status = 'success')
+            FROM jobs j LEFT JOIN job_results r ON r.job_id = j.job_id
+            WHERE j.job_id = ?
+            GROUP BY ALL
+        """, (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "total": row[2],
+            "error": row[3],
+            "processed": row[4],
+            "success_count": row[5],
+        }
+
+    def get_unfinished_job_ids(self) -> List[str]:
+        """IDs of jobs still queued or running, oldest first"""
+        rows = self.conn.execute(
+            "SELECT job_id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def find_entity_ids(self, text: str, similarity: Optional[float] = None) -> Optional[List[int]]:
+        """
+        IDs of entities whose name contains `text` (case-insensitive) and,
+        with `similarity`, of those whose name is at least that similar to it,
+        looked up in the in-memory trigram index. Returns None if `text` is
+        too short for the index (even with `similarity`) or the index is still
+        being built, for the caller to fall back to a substring scan.
+        """
+        index = self._entity_name_index()
+        if index is None:
+            return None
+        entity_ids = index.substring(text)
+        if entity_ids is None:
+            return None
+        if similarity is not None:
+            fuzzy_ids = [entity_id for entity_id, _ in index.similar(text, similarity)]
+            entity_ids = list(dict.fromkeys(entity_ids + fuzzy_ids))
+        return entity_ids
+
+    def _entity_name_index(self) -> Optional[EntityNameIndex]:
+        """
+        The trigram index over entity names, topped up with the entities added
+        since the last lookup (entities are never renamed or removed). It is
+        built on first use, in a background thread for large tables, in which
+        case None is returned until it is ready.
+        """
+        with self._entity_index_lock:
+            index = self._entity_index
+            if index is None:
+                if self._entity_index_build is not None:
+                    return None
+                count = self.conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+                if count > ENTITY_INDEX_INLINE_BUILD_MAX:
+                    build = self._entity_index_build = object()
+                    threading.Thread(
+                        target=self._build_entity_name_index, args=(build,), daemon=True
+                    ).start()
+                    logger.info(f"Building the entity name index for {count} entities in the background")
+                    return None
+                index = self._entity_index = EntityNameIndex()
+
+        rows = self.conn.execute(
+            "SELECT id, name FROM entities WHERE id > ? ORDER BY id", (index.max_id,)
+        ).fetchall()
+        if rows:
+            index.add(rows)
+            logger.debug(f"Indexed {len(rows)} entity name(s), {len(index)} in total")
+        return index
+
+    def _build_entity_name_index(self, build: object) -> None:
+        """Background build of the entity name index; a reset in between discards it"""
+        try:
+            rows = self.conn.execute("SELECT id, name FROM entities ORDER BY id").fetchall()
+            index = EntityNameIndex()
+            index.add(rows)
+            with self._entity_index_lock:
+                if self._entity_index_build is build:
+                    self._entity_index = index
+                    logger.info(f"Entity name index ready with {len(index)} entities")
+        except Exception as e:
+            logger.error(f"Error building the entity name index: {e}")
+            with self._entity_index_lock:
+                if self._entity_index_build is build:
+                    # Let the next lookup try again
+                    self._entity_index_build = None
+
     def get_entity_types(self) -> List[str]:
         """Get all unique entity types in the database"""
         try:
@@ -451,4 +1387,23 @@ class DuckDBStorage:
             return {row[0]: row[1] for row in result}
         except Exception as e:
             logger.error(f"Error getting entity counts: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+
+# One storage service per database file in this process
+_storages: Dict[str, DuckDBStorage] = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(db_path: Optional[str] = None) -> DuckDBStorage:
+    """
+    The process-wide storage service for a database file
+    (`storage.db_path` by default), opened on first use
+    """
+    db_path = db_path or get_config().storage.db_path
+    key = os.path.abspath(db_path)
+    with _storages_lock:
+        storage = _storages.get(key)
+        if storage is None:
+            storage = _storages[key] = DuckDBStorage(db_path)
+    return storage
@@ -0,0 +1,113 @@
+# storage/entity_index.py
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from processing.entity_mapper import EntityMapper
+
+
+def trigrams(text: str, padded: bool = True) -> Set[str]:
+    """
+    Character trigrams of a (lowercased) string. Padding adds the trigrams
+    at the start and end of the string, which makes short names comparable.
+    """
+    if padded:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class EntityNameIndex:
+    """
+    In-memory trigram index over entity names for case-insensitive substring
+    and typo-tolerant lookups.
+
+    Every name is stored lowercased with the list of names (by position)
+    containing each of its padded trigrams. A substring lookup only verifies
+    the names holding the query's rarest trigram; a fuzzy lookup only scores
+    names that share one of the query's rarest trigrams (enough of them that
+    any name within the allowed edit distance must contain one, or all of
+    them for short queries) with `EntityMapper.calculate_similarity`.
+    """
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._ids = array("q")
+        self._postings: Dict[str, array] = {}
+        self._mapper = EntityMapper()
+        self._lock = threading.Lock()
+        self.max_id = 0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """Add (entity_id, name) rows"""
+        with self._lock:
+            for entity_id, name in rows:
+                position = len(self._names)
+                name = name.lower()
+                self._names.append(name)
+                self._ids.append(entity_id)
+                for gram in trigrams(name):
+                    postings = self._postings.get(gram)
+                    if postings is None:
+                        postings = self._postings[gram] = array("i")
+                    postings.append(position)
+                self.max_id = max(self.max_id, entity_id)
+
+    def substring(self, text: str) -> Optional[List[int]]:
+        """
+        IDs of entities whose name contains `text` (case-insensitive).
+        Returns None for queries shorter than a trigram.
+        """
+        text = text.lower()
+        if len(text) < 3:
+            return None
+
+        with self._lock:
+            postings = [self._postings.get(gram) for gram in trigrams(text, padded=False)]
+            if any(p is None for p in postings):
+                return []
+            rarest = min(postings, key=len)
+            return [self._ids[pos] for pos in rarest if text in self._names[pos]]
+
+    def similar(self, text: str, threshold: float) -> List[Tuple[int, float]]:
+        """
+        (entity_id, similarity) of entities whose name is at least `threshold`
+        similar to `text` by normalized Levenshtein distance, best first.
+        The threshold must be above 0. Matches share at least one padded
+        trigram with `text`, which only drops candidates for queries too
+        short to allow that many edits.
+        """
+        if threshold <= 0:
+            raise ValueError("Similarity threshold must be greater than 0")
+        text = text.lower()
+        if not text:
+            return []
+
+        # A name within the threshold is at most max_distance edits away, and
+        # each edit removes at most 3 of the query's trigrams, so it shares at
+        # least one of the query's (3 * max_distance + 1) rarest trigrams. A
+        # query too short for that guarantee only scores names sharing any of
+        # its trigrams, so it never scans every name
+        max_distance = math.floor((1 - threshold) * len(text) / threshold + 1e-9)
+        grams = trigrams(text)
+        needed = 3 * max_distance + 1
+
+        with self._lock:
+            ranked = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+            candidates: Set[int] = set()
+            for gram in ranked[:needed]:
+                candidates.update(self._postings.get(gram, ()))
+
+            matches = []
+            for pos in candidates:
+                name = self._names[pos]
+                if abs(len(name) - len(text)) > max_distance:
+                    continue
+                score = self._mapper.calculate_similarity(text, name)
+                if score >= threshold:
+                    matches.append((self._ids[pos], score))
+
+        matches.sort(key=lambda match: -match[1])
+        return matches
@@ -0,0 +1,144 @@
+# storage/response_cache.py
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from config.config import get_config
+from utils.logging import get_logger
+
+logger = get_logger("figurex.cache")
+
+# Query parameters that do not change the response and must not split the cache
+IGNORED_PARAMS = {"api_key", "tool", "email"}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so equivalent requests share one cache entry"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in IGNORED_PARAMS)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw HTTP response bodies.
+
+    Entries are gzip-compressed files named by the SHA-256 of the normalized
+    URL, written atomically so several processes can share the directory.
+    Entries older than `ttl` seconds are treated as missing, and the oldest
+    entries are evicted once the directory grows past `max_size_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, ttl: int, max_size_bytes: int):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.gz")
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the cached body for a URL, or None if missing or expired"""
+        path = self._path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                self._remove(path)
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError) as e:
+            logger.warning(f"Discarding unreadable cache entry for {normalize_url(url)}: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, url: str, body: str) -> None:
+        """Store a response body for a URL"""
+        path = self._path(url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(body.encode("utf-8")))
+            os.replace(tmp_path, path)
+            self._track(os.path.getsize(path))
+        except OSError as e:
+            logger.warning(f"Could not cache response for {normalize_url(url)}: {e}")
+
+    def _remove(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._track(-size)
+        except OSError:
+            pass
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".gz"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _track(self, delta: int) -> None:
+        """Keep a running size total and evict the oldest entries past the cap"""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += delta
+            if self._size <= self.max_size_bytes:
+                return
+
+            # Evict down to 90% of the cap so we don't rescan on every write
+            target = int(self.max_size_bytes * 0.9)
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            self._size = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if self._size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self._size -= size
+                except OSError:
+                    pass
+            logger.info(f"Evicted response cache entries, size now {self._size} bytes")
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        for path, _, _ in list(self._entries()):
+            self._remove(path)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the process-wide response cache, or None if caching is disabled"""
+    global _cache
+    storage = get_config().storage
+    if not storage.cache_enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    storage.cache_dir,
+                    storage.cache_ttl,
+                    storage.cache_max_size_mb * 1024 * 1024
+                )
+    return _cache
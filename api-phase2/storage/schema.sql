@@ -1,6 +1,12 @@
 -- schema.sql with updated entities table to include type
+-- Row IDs come from sequences; existing databases are migrated in DuckDBStorage
+CREATE SEQUENCE IF NOT EXISTS papers_id_seq;
+CREATE SEQUENCE IF NOT EXISTS figures_id_seq;
+CREATE SEQUENCE IF NOT EXISTS entities_id_seq;
+CREATE SEQUENCE IF NOT EXISTS figure_entities_id_seq;
+
 CREATE TABLE IF NOT EXISTS papers (
-    id INTEGER PRIMARY KEY,
+    id INTEGER PRIMARY KEY DEFAULT nextval('papers_id_seq'),
     paper_id TEXT UNIQUE NOT NULL,
     title TEXT,
     abstract TEXT,
@@ -8,7 +14,7 @@ CREATE TABLE IF NOT EXISTS papers (
 );
 
 CREATE TABLE IF NOT EXISTS figures (
-    id INTEGER PRIMARY KEY,
+    id INTEGER PRIMARY KEY DEFAULT nextval('figures_id_seq'),
     paper_id TEXT NOT NULL,
     label TEXT NOT NULL,
     caption TEXT,
@@ -16,18 +22,81 @@ CREATE TABLE IF NOT EXISTS figures (
     FOREIGN KEY(paper_id) REFERENCES papers(paper_id)
 );
 
+-- Conflict target for figure upserts
+CREATE UNIQUE INDEX IF NOT EXISTS idx_figures_paper_label ON figures(paper_id, label);
+
 CREATE TABLE IF NOT EXISTS entities (
-    id INTEGER PRIMARY KEY,
+    id INTEGER PRIMARY KEY DEFAULT nextval('entities_id_seq'),
     name TEXT NOT NULL,
     type TEXT,
     UNIQUE(name, type)
 );
 
 CREATE TABLE IF NOT EXISTS figure_entities (
-    id INTEGER PRIMARY KEY,
+    id INTEGER PRIMARY KEY DEFAULT nextval('figure_entities_id_seq'),
     figure_id INTEGER NOT NULL,
     entity_id INTEGER NOT NULL,
     FOREIGN KEY(figure_id) REFERENCES figures(id),
     FOREIGN KEY(entity_id) REFERENCES entities(id),
     UNIQUE(figure_id, entity_id)
-);
\ No newline at end of file
+);
+
+-- PMID <-> PMCID mappings resolved via the NCBI ID converter. An empty string
+-- records that the ID has no counterpart, so it is not looked up again until
+-- the entry is older than ncbi.id_alias_negative_ttl. Rows imported from the
+-- PMC-ids.csv dump are authoritative and never expire.
+CREATE TABLE IF NOT EXISTS id_aliases (
+    pmid TEXT NOT NULL,
+    pmc_id TEXT NOT NULL,
+    resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    imported BOOLEAN DEFAULT false,
+    UNIQUE(pmid, pmc_id)
+);
+
+-- Databases created before imported rows were flagged
+ALTER TABLE id_aliases ADD COLUMN IF NOT EXISTS imported BOOLEAN DEFAULT false;
+
+CREATE INDEX IF NOT EXISTS idx_id_aliases_pmid ON id_aliases(pmid);
+CREATE INDEX IF NOT EXISTS idx_id_aliases_pmc_id ON id_aliases(pmc_id);
+
+-- Full-text search index over paper titles/abstracts ('paper' documents,
+-- keyed by papers.id) and figure captions ('figure' documents, keyed by
+-- figures.id), maintained by DuckDBStorage.save_papers
+CREATE TABLE IF NOT EXISTS search_postings (
+    doc_type TEXT NOT NULL,
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,        -- occurrences of the term in the document
+    doc_length INTEGER NOT NULL -- number of terms in the document
+);
+
+-- Per document type totals for BM25 length normalization, and the number of
+-- postings appended since the table was last sorted by term. Filled in by
+-- DuckDBStorage.rebuild_search_index when the database is first opened
+CREATE TABLE IF NOT EXISTS search_stats (
+    doc_type TEXT PRIMARY KEY,
+    doc_count BIGINT NOT NULL DEFAULT 0,
+    total_length BIGINT NOT NULL DEFAULT 0,
+    unsorted_postings BIGINT NOT NULL DEFAULT 0
+);
+
+-- Background processing jobs submitted through /api/process and /api/upload;
+-- paper_ids is the JSON list of requested IDs
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,       -- queued, running, completed or failed
+    paper_ids TEXT NOT NULL,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Per-ID results of a job, by position in its paper_ids list
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT NOT NULL,       -- JSON processing result
+    UNIQUE(job_id, position)
+);
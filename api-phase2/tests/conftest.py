@@ -0,0 +1,43 @@
+# tests/conftest.py
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# api.routes opens the configured database when imported, so point it at a
+# scratch directory (and keep ID conversion offline) before anything loads it
+_DATA_DIR = tempfile.mkdtemp(prefix="figurex-tests-")
+os.environ["DB_PATH"] = os.path.join(_DATA_DIR, "figurex.db")
+os.environ["OFFLINE_ID_CONVERSION"] = "true"
+
+from storage.duckdb_backend import DuckDBStorage  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    db = DuckDBStorage(str(tmp_path / "test.db"))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def client(storage, monkeypatch):
+    """API test client serving from the `storage` database"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api import routes
+    from utils.cache import LRUCache
+
+    monkeypatch.setattr(routes, "storage", storage)
+    monkeypatch.setattr(routes, "recently_processed_ids", [])
+    monkeypatch.setattr(routes, "search_cache", LRUCache(16, 60))
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    with TestClient(app, headers={"X-API-Key": routes.config.api.api_key}) as test_client:
+        yield test_client
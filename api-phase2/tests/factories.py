@@ -0,0 +1,37 @@
+# tests/factories.py
+from models.paper import Entity, Figure, Paper
+
+
+def make_paper(paper_id, figures=1, entities=("BRCA1",), title=None, abstract="An abstract."):
+    """A paper with `figures` figures, each mentioning `entities` (as Gene) in order"""
+    return Paper(
+        paper_id=paper_id,
+        title=title if title is not None else f"Title of {paper_id}",
+        abstract=abstract,
+        figures=[
+            Figure(
+                label=f"Figure {number + 1}",
+                caption=f"Caption {number + 1} of {paper_id}",
+                url=f"https://example.org/{paper_id}/{number + 1}",
+                entities=[Entity(text=text, type="Gene") for text in entities],
+            )
+            for number in range(figures)
+        ],
+    )
+
+
+def bioc_xml(pmc_id):
+    """A PMC BioC document with a title, an abstract and one figure mentioning BRCA1"""
+    return (
+        "<collection><document>"
+        f'<passage><infon key="section_type">TITLE</infon><text>Title of {pmc_id}</text></passage>'
+        f'<passage><infon key="section_type">ABSTRACT</infon><text>Abstract of {pmc_id}.</text></passage>'
+        '<passage><infon key="section_type">FIG</infon><infon key="id">fig1</infon>'
+        f"<text>BRCA1 staining in {pmc_id}.</text></passage>"
+        "</document></collection>"
+    )
+
+
+def pubtator_text(ids):
+    """A PubTator export tagging BRCA1 in each of the documents `ids`"""
+    return "\n".join(f"{doc_id}|t|Title\n{doc_id}\t0\t5\tBRCA1\tGene\t672" for doc_id in ids)
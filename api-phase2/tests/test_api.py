@@ -0,0 +1,249 @@
+# tests/test_api.py
+import json
+import threading
+import time
+
+import pytest
+
+from api import routes
+from ingestion.jobs import JobQueue
+from tests.factories import make_paper
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+class _Pipeline:
+    """Stands in for IngestionPipeline: fails IDs starting with "bad" once `release` is set"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def run(self, paper_ids, on_result=None):
+        self.release.wait(10)
+        results = []
+        for index, paper_id in enumerate(paper_ids):
+            if paper_id.startswith("bad"):
+                result = {"paper_id": paper_id, "source": "PMC", "status": "error", "error": "not found"}
+            else:
+                result = {"paper_id": paper_id, "source": "PMC", "status": "success", "figures": []}
+            results.append(result)
+            on_result(index, result)
+        return results
+
+
+@pytest.fixture
+def pipeline(storage, monkeypatch):
+    pipeline = _Pipeline()
+    jobs = JobQueue(pipeline, storage, on_complete=routes._remember_processed)
+    monkeypatch.setattr(routes, "jobs", jobs)
+    yield pipeline
+    # Let the workers finish before `storage` is closed
+    pipeline.release.set()
+    jobs._queue.join()
+
+
+def _wait_for_job(client, job_id):
+    for _ in range(200):
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_search_ranks_papers_by_bm25(client, storage):
+    storage.save_papers([
+        make_paper("PMC1", title="Kinase signalling", abstract="A kinase kinase cascade."),
+        make_paper("PMC2", title="Tumour growth", abstract="Growth depends on a kinase."),
+        make_paper("PMC3", title="Unrelated", abstract="Nothing to see."),
+    ])
+
+    response = client.get("/api/search", params={"q": "kinase"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [paper["paper_id"] for paper in body["papers"]] == ["PMC1", "PMC2"]
+    assert body["papers"][0]["score"] > body["papers"][1]["score"]
+    assert body["total_papers"] == 2
+
+
+def test_search_text_streams_ndjson(client, storage):
+    storage.save_papers([make_paper("PMC1", title="Kinase signalling")])
+
+    response = client.get("/api/search", params={"q": "kinase", "stream": True})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [(record["type"], record["paper_id"]) for record in _ndjson(response)] == [("paper", "PMC1")]
+
+
+def test_search_pages_with_cursors(client, storage):
+    storage.save_papers([make_paper(f"PMC{n}", entities=("BRCA1",)) for n in range(5)])
+
+    seen, cursor = [], None
+    while True:
+        params = {"entity_text": "BRCA1", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/search", params=params).json()
+        assert body["total_results"] == 5
+        seen += [paper["paper_id"] for paper in body["results"]]
+        cursor = body["page_info"]["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == [f"PMC{n}" for n in range(5)]
+    assert len(seen) == 5
+
+
+def test_search_results_are_cached_until_the_next_write(client, storage):
+    storage.save_papers([make_paper("PMC1")])
+    assert client.get("/api/search", params={"entity_text": "BRCA1"}).json()["total_results"] == 1
+    # Same query with a differently cased filter is served from the cache
+    assert client.get("/api/search", params={"entity_text": "brca1"}).json()["total_results"] == 1
+    assert routes.search_cache.hits == 1
+
+    storage.save_papers([make_paper("PMC2")])
+    assert client.get("/api/search", params={"entity_text": "BRCA1"}).json()["total_results"] == 2
+
+
+def test_search_rejects_a_bad_cursor(client):
+    assert client.get("/api/search", params={"entity_text": "BRCA1", "cursor": "garbage"}).status_code == 400
+
+
+def test_papers_pages_with_cursors_and_projects_fields(client, storage):
+    storage.save_papers([make_paper(f"PMC{n}", figures=2) for n in range(5)])
+
+    seen, cursor = [], None
+    while True:
+        params = {"fields": "paper_id,figure_count", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/papers", params=params)
+        assert response.status_code == 200
+        assert all(set(paper) == {"paper_id", "figure_count"} for paper in response.json())
+        seen += [paper["paper_id"] for paper in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == [f"PMC{n}" for n in range(5)]
+
+
+def test_papers_stream_ndjson(client, storage):
+    storage.save_papers([make_paper(f"PMC{n}") for n in range(3)])
+
+    response = client.get("/api/papers", params={"fields": "paper_id,figures"},
+                          headers={"Accept": "application/x-ndjson"})
+
+    records = _ndjson(response)
+    assert [record["paper_id"] for record in records] == ["PMC0", "PMC1", "PMC2"]
+    assert records[0]["figures"][0]["label"] == "Figure 1"
+
+
+def test_papers_reject_unknown_fields_and_bad_cursors(client):
+    assert client.get("/api/papers", params={"fields": "paper_id,secret"}).status_code == 400
+    assert client.get("/api/papers", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_papers_schema_allows_projected_records(client):
+    schema = client.get("/openapi.json").json()["components"]["schemas"]["PaperRecordResponse"]
+    assert not schema.get("required")
+
+
+def test_export_streams_json_and_csv(client, storage):
+    storage.save_papers([make_paper(f"PMC{n}", figures=2) for n in range(3)])
+
+    response = client.get("/api/export", params={"format": "json"})
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    body = json.loads(response.text)
+    assert [result["paper_id"] for result in body["results"]] == ["PMC0", "PMC1", "PMC2"]
+    assert body["summary"]["total_requested"] == 3
+
+    response = client.get("/api/export", params={"format": "CSV", "paper_ids": ["PMC2", "PMC0"]})
+    assert response.status_code == 200
+    rows = response.text.splitlines()
+    assert rows[0].startswith("Paper ID")
+    assert [row.split(",")[0] for row in rows[1:5]] == ["PMC2", "PMC2", "PMC0", "PMC0"]
+
+
+def test_export_without_papers_is_404(client):
+    assert client.get("/api/export").status_code == 404
+
+
+def test_export_checks_the_format_before_reading(client, monkeypatch):
+    def read(paper_ids):
+        raise AssertionError("papers read before the format was checked")
+
+    monkeypatch.setattr(routes, "_iter_export_results", read)
+    assert client.get("/api/export", params={"format": "xml"}).status_code == 400
+
+
+def test_process_runs_as_a_background_job(client, pipeline):
+    response = client.post("/api/process", json={"ids": ["PMC1", "bad1"]})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert client.get(f"/api/jobs/{job_id}").json()["status"] in ("queued", "running")
+
+    pipeline.release.set()
+    job = _wait_for_job(client, job_id)
+
+    assert job["status"] == "completed"
+    assert (job["total"], job["processed"], job["success_count"], job["failed_count"]) == (2, 2, 1, 1)
+    assert [result["paper_id"] for result in job["processed_ids"]] == ["PMC1", "bad1"]
+    # The finished job's successes become the default export set
+    routes.jobs._queue.join()
+    assert routes.recently_processed_ids == ["PMC1"]
+
+
+def test_jobs_reject_empty_requests_and_unknown_ids(client, pipeline):
+    assert client.post("/api/process", json={"ids": []}).status_code == 400
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+
+def _sse_events(lines):
+    events, name = [], None
+    for line in lines:
+        if line.startswith("event: "):
+            name = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((name, json.loads(line[len("data: "):])))
+    return events
+
+
+def test_job_events_stream_progress_until_done(client, pipeline):
+    job_id = client.post("/api/process", json={"ids": ["PMC1", "bad1", "PMC2"]}).json()["job_id"]
+
+    def release_once_subscribed():
+        while job_id not in routes.jobs._subscribers:
+            time.sleep(0.01)
+        pipeline.release.set()
+
+    threading.Thread(target=release_once_subscribed, daemon=True).start()
+    with client.stream("GET", f"/api/jobs/{job_id}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(response.iter_lines())
+
+    names = [name for name, _ in events]
+    assert names[0] == "progress"
+    assert names[-1] == "done"
+    papers = [data for name, data in events if name == "paper"]
+    assert [(data["paper_id"], data["paper_status"]) for data in papers] == [
+        ("PMC1", "success"), ("bad1", "error"), ("PMC2", "success")
+    ]
+    assert [data["processed"] for data in papers] == [1, 2, 3]
+    assert events[-1][1]["status"] == "completed"
+
+
+def test_job_events_of_a_finished_job_end_after_the_snapshot(client, pipeline):
+    pipeline.release.set()
+    job_id = client.post("/api/process", json={"ids": ["PMC1"]}).json()["job_id"]
+    _wait_for_job(client, job_id)
+
+    events = _sse_events(client.get(f"/api/jobs/{job_id}/events").text.splitlines())
+
+    assert [name for name, _ in events] == ["progress"]
+    assert events[0][1]["status"] == "completed"
+    assert client.get("/api/jobs/unknown/events").status_code == 404
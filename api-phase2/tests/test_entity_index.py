@@ -0,0 +1,56 @@
+# tests/test_entity_index.py
+import pytest
+
+from storage.entity_index import EntityNameIndex
+from tests.factories import make_paper
+
+
+@pytest.fixture
+def index():
+    index = EntityNameIndex()
+    index.add([(1, "BRCA1"), (2, "BRCA2"), (3, "TP53"), (4, "SARS-CoV-2")])
+    return index
+
+
+def test_substring_is_case_insensitive(index):
+    assert sorted(index.substring("brca")) == [1, 2]
+    assert index.substring("cov-2") == [4]
+    assert index.substring("EGFR") == []
+
+
+def test_substring_needs_a_trigram(index):
+    assert index.substring("p5") is None
+
+
+def test_similar_tolerates_typos(index):
+    assert [entity_id for entity_id, _ in index.similar("BRCA11", 0.8)] == [1]
+    assert index.similar("BRAC1", 0.8) == []
+    assert [entity_id for entity_id, _ in index.similar("BRAC1", 0.6)] == [1]
+
+
+def test_similar_rejects_non_positive_threshold(index):
+    with pytest.raises(ValueError):
+        index.similar("BRCA1", 0)
+
+
+def test_short_entity_text_falls_back_to_substring_scan(storage):
+    storage.save_papers([make_paper("PMC1", entities=("TP53",)), make_paper("PMC2", entities=("EGFR",))])
+
+    for similarity in (None, 0.8):
+        total, papers = storage.search_papers({"entity_text": "p5", "entity_similarity": similarity})
+        assert [paper.paper_id for paper in papers] == ["PMC1"]
+
+
+def test_short_fuzzy_queries_only_score_names_sharing_a_trigram(index, monkeypatch):
+    index.add((10 + n, f"XYZ{n}") for n in range(1000))
+    scored = []
+    score = index._mapper.calculate_similarity
+
+    def counting_score(text, name):
+        scored.append(name)
+        return score(text, name)
+
+    monkeypatch.setattr(index._mapper, "calculate_similarity", counting_score)
+
+    assert [entity_id for entity_id, _ in index.similar("BRCA1", 0.6)] == [1, 2]
+    assert len(scored) < 10
@@ -0,0 +1,86 @@
+# tests/test_http_client.py
+import logging
+
+import pytest
+
+from config.config import get_config
+from ingestion import http_client
+from ingestion.pmc_ingestor import PMCIngestor
+from storage import response_cache
+from storage.response_cache import ResponseCache
+
+
+class _Response:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class _Session:
+    """Answers each GET with the next of `responses`"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_client.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_redact_url_masks_the_api_key():
+    url = "https://example.org/idconv?ids=1,2&format=json&api_key=secret123&tool=figurex"
+    assert http_client.redact_url(url) == "https://example.org/idconv?ids=1,2&format=json&api_key=***&tool=figurex"
+    assert "secret123" not in http_client.redact_url(f"404 Client Error for url: {url}")
+
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(get_config().ncbi, "max_retry_delay", 5.0)
+
+    assert http_client._backoff(attempt=20) <= 5.0
+    assert http_client._backoff(attempt=0, retry_after=86400) == 5.0
+    assert http_client._backoff(attempt=0, retry_after=2.0) >= 2.0
+
+
+def test_retries_transient_failures_without_logging_the_key(monkeypatch, sleeps, caplog):
+    session = _Session([_Response(503, headers={"Retry-After": "3600"}), _Response(200, "ok")])
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+    monkeypatch.setattr(get_config().ncbi, "max_retry_delay", 5.0)
+
+    with caplog.at_level(logging.WARNING, logger="figurex.http"):
+        body = http_client.fetch_text("https://example.org/idconv?ids=1&api_key=secret123", cache=False)
+
+    assert body == "ok"
+    assert len(session.urls) == 2
+    assert sleeps == [5.0]
+    assert "retry 1/" in caplog.text
+    assert "secret123" not in caplog.text
+
+
+def test_rejected_bodies_are_fetched_again(monkeypatch, tmp_path):
+    monkeypatch.setattr(response_cache, "_cache", ResponseCache(str(tmp_path), ttl=3600, max_size_bytes=1 << 20))
+    error = "[Error] : No result can be found."
+    session = _Session([_Response(200, error), _Response(200, error), _Response(200, "<collection/>")])
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+    url = "https://example.org/BioC_xml/PMC1/unicode"
+
+    for _ in range(2):
+        assert http_client.fetch_text(url, validate=PMCIngestor.is_valid_response) == error
+    assert http_client.fetch_text(url, validate=PMCIngestor.is_valid_response) == "<collection/>"
+    assert len(session.urls) == 3
+
+    # The valid document is cached
+    assert http_client.fetch_text(url, validate=PMCIngestor.is_valid_response) == "<collection/>"
+    assert len(session.urls) == 3
@@ -0,0 +1,95 @@
+# tests/test_id_converter.py
+import pytest
+
+from config.config import get_config
+from ingestion import id_converter
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Record ID converter calls, answering PMID 111 with PMC111 and nothing else"""
+    calls = []
+
+    def fetch(ids):
+        calls.append(list(ids))
+        pmid_to_pmc = {pid: ("PMC111" if pid == "111" else "") for pid in ids if pid.isdigit()}
+        pmc_to_pmid = {pid: ("111" if pid == "PMC111" else "") for pid in ids if not pid.isdigit()}
+        return pmid_to_pmc, pmc_to_pmid
+
+    monkeypatch.setattr(id_converter, "_fetch_id_conversions", fetch)
+    monkeypatch.setattr(get_config().ncbi, "offline_id_conversion", False)
+    return calls
+
+
+def _age_aliases(storage, seconds):
+    storage.conn.execute(
+        "UPDATE id_aliases SET resolved_at = CURRENT_TIMESTAMP - to_seconds(?)", (float(seconds),)
+    )
+
+
+def test_resolved_ids_are_stored(storage, lookups):
+    assert id_converter.resolve_paper_ids(["111", "PMC111"], storage) == {
+        "111": ("111", "PMC111", "111"),
+        "PMC111": ("PMC111", "PMC111", "111"),
+    }
+    id_converter.resolve_paper_ids(["111", "PMC111"], storage)
+    assert len(lookups) == 1
+
+
+def test_negative_aliases_expire(storage, lookups, monkeypatch):
+    monkeypatch.setattr(get_config().ncbi, "id_alias_negative_ttl", 3600)
+
+    assert id_converter.resolve_paper_ids(["222"], storage)["222"] == ("222", "", "222")
+    id_converter.resolve_paper_ids(["222"], storage)
+    assert lookups == [["222"]]
+
+    # Past the TTL the miss is looked up again, and the refreshed entry trusted anew
+    _age_aliases(storage, 7200)
+    id_converter.resolve_paper_ids(["222"], storage)
+    id_converter.resolve_paper_ids(["222"], storage)
+    assert lookups == [["222"], ["222"]]
+
+
+def test_real_mappings_never_expire(storage, lookups):
+    id_converter.resolve_paper_ids(["111"], storage)
+    _age_aliases(storage, 10 * 365 * 86400)
+
+    assert storage.get_id_aliases(["111"], [], negative_ttl=60) == ({"111": "PMC111"}, {})
+    assert id_converter.resolve_paper_ids(["111"], storage)["111"][1] == "PMC111"
+    assert len(lookups) == 1
+
+
+def test_normalize_paper_id_uses_the_shared_storage(storage, lookups, monkeypatch):
+    monkeypatch.setattr(id_converter, "get_storage", lambda: storage)
+
+    assert id_converter.normalize_paper_id("111") == ("111", "PMC111", "111")
+    assert id_converter.normalize_paper_id("111") == ("111", "PMC111", "111")
+    assert len(lookups) == 1
+
+
+def test_imported_aliases_never_expire(storage, lookups, monkeypatch, tmp_path):
+    monkeypatch.setattr(get_config().ncbi, "id_alias_negative_ttl", 3600)
+    csv_path = tmp_path / "PMC-ids.csv"
+    csv_path.write_text(
+        "Journal Title,PMCID,PMID,DOI\n"
+        "Journal,PMC222,222,10.1/a\n"
+        "Journal,PMC333,,10.1/b\n"
+    )
+
+    assert storage.import_id_aliases_csv(str(csv_path)) == 2
+    _age_aliases(storage, 7200)
+
+    assert id_converter.resolve_paper_ids(["222", "PMC222", "PMC333"], storage) == {
+        "222": ("222", "PMC222", "222"),
+        "PMC222": ("PMC222", "PMC222", "222"),
+        "PMC333": ("PMC333", "PMC333", ""),
+    }
+    assert lookups == []
+
+
+def test_failed_import_reports_its_own_error(storage, tmp_path):
+    with pytest.raises(Exception, match="No files found|does not exist"):
+        storage.import_id_aliases_csv(str(tmp_path / "missing.csv"))
+
+    # The connection is usable again after the rollback
+    assert storage.conn.execute("SELECT COUNT(*) FROM id_aliases").fetchone()[0] == 0
@@ -0,0 +1,35 @@
+# tests/test_paper_processor.py
+import asyncio
+import threading
+
+from config.config import get_config
+from ingestion import pmc_ingestor, pubtator_client
+from ingestion.paper_processor import PaperProcessor
+from tests.factories import bioc_xml, pubtator_text
+
+
+def test_process_many_keeps_storage_work_off_the_event_loop(storage, monkeypatch):
+    async def fetch_pmc(client, url, endpoint=None, cache=True, validate=None):
+        return bioc_xml(url.rsplit("/", 2)[-2])
+
+    async def fetch_pubtator(client, url, endpoint=None, cache=True):
+        return pubtator_text(url.split("pmids=", 1)[1].split(","))
+
+    monkeypatch.setattr(get_config().storage, "cache_enabled", False)
+    monkeypatch.setattr(pmc_ingestor, "fetch_text_async", fetch_pmc)
+    monkeypatch.setattr(pubtator_client, "fetch_text_async", fetch_pubtator)
+    processor = PaperProcessor(storage)
+
+    threads = {}
+    for name in ("_lookup_chunk", "_finish_chunk"):
+        def record(*args, _name=name, _method=getattr(processor, name)):
+            threads[_name] = threading.current_thread()
+            return _method(*args)
+        monkeypatch.setattr(processor, name, record)
+
+    results = asyncio.run(processor.process_many(["PMC1", "PMC2"]))
+
+    assert [(result["paper_id"], result["status"]) for result in results] == [("PMC1", "success"), ("PMC2", "success")]
+    assert storage.get_paper_with_details("PMC2").figures[0].entities[0].text == "BRCA1"
+    assert threads.keys() == {"_lookup_chunk", "_finish_chunk"}
+    assert threading.main_thread() not in threads.values()
@@ -0,0 +1,92 @@
+# tests/test_pipeline.py
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from config.config import get_config
+from ingestion import pipeline as pipeline_module
+from ingestion import pubtator_client
+from ingestion.paper_processor import PaperProcessor
+from ingestion.pipeline import IngestionPipeline
+from tests.factories import bioc_xml, pubtator_text
+
+ERROR_BODY = "[Error] : No result can be found."
+
+
+@pytest.fixture
+def stubbed_ncbi(monkeypatch):
+    """PMC answers every ID but PMC404 with a document; PubTator tags BRCA1 in each"""
+    fetched = []
+
+    def fetch_pmc(url, endpoint=None, cache=True, validate=None):
+        pmc_id = url.rsplit("/", 2)[-2]
+        fetched.append(pmc_id)
+        return ERROR_BODY if pmc_id == "PMC404" else bioc_xml(pmc_id)
+
+    def fetch_pubtator(url, endpoint=None, cache=True):
+        return pubtator_text(url.split("pmids=", 1)[1].split(","))
+
+    monkeypatch.setattr(get_config().storage, "cache_enabled", False)
+    monkeypatch.setattr(pipeline_module, "fetch_text", fetch_pmc)
+    monkeypatch.setattr(pubtator_client, "fetch_text", fetch_pubtator)
+    return fetched
+
+
+@pytest.fixture
+def pipeline(storage):
+    pipeline = IngestionPipeline(PaperProcessor(storage))
+    yield pipeline
+    pipeline.shutdown()
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    monkeypatch.setattr(get_config().pipeline, "use_process_pool", True)
+
+
+def test_run_processes_papers_through_every_stage(pipeline, storage, stubbed_ncbi):
+    paper_ids = ["PMC1", "PMC404", "PMC2", "PMC1", "PMC3"]
+    reported = []
+
+    results = pipeline.run(paper_ids, on_result=lambda index, result: reported.append((index, result)))
+
+    assert [result["paper_id"] for result in results] == paper_ids
+    assert [result["status"] for result in results] == ["success", "error", "success", "success", "success"]
+    assert "PMC returned error" in results[1]["error"]
+    assert sorted(index for index, _ in reported) == list(range(len(paper_ids)))
+    assert all(results[index] is result for index, result in reported)
+
+    paper = storage.get_paper_with_details("PMC2")
+    assert [fig.caption for fig in paper.figures] == ["BRCA1 staining in PMC2."]
+    assert [entity.text for entity in paper.figures[0].entities] == ["BRCA1"]
+    assert pipeline.last_run["stages"]["parse"]["failed"] == 1
+
+    # The duplicate ID is fetched and stored once
+    assert stubbed_ncbi.count("PMC1") == 1
+    count = storage.conn.execute("SELECT COUNT(*) FROM papers WHERE paper_id = 'PMC1'").fetchone()[0]
+    assert count == 1
+    assert storage.conn.execute("SELECT COUNT(*) FROM figures WHERE paper_id = 'PMC1'").fetchone()[0] == 1
+
+
+def test_run_serves_stored_papers_without_fetching(pipeline, stubbed_ncbi):
+    pipeline.run(["PMC1"])
+    stubbed_ncbi.clear()
+
+    results = pipeline.run(["PMC1", "PMC2"])
+
+    assert [result["status"] for result in results] == ["success", "success"]
+    assert stubbed_ncbi == ["PMC2"]
+
+
+def test_pool_workers_are_spawned(pipeline, process_pool):
+    pool = pipeline._pool("parse", 1)
+    assert pool._mp_context.get_start_method() == "spawn"
+
+
+def test_broken_pool_is_replaced(pipeline, process_pool):
+    # Every attempt kills its worker process
+    with pytest.raises(BrokenProcessPool):
+        pipeline._submit("parse", 1, os._exit, 1)
+
+    assert pipeline._submit("parse", 1, abs, -3) == 3
@@ -0,0 +1,94 @@
+# tests/test_pubtator_client.py
+import pytest
+
+from config.config import get_config
+from ingestion import pubtator_client
+from ingestion.paper_processor import PaperProcessor
+from ingestion.pubtator_client import PubTatorClient
+from storage import response_cache
+from storage.response_cache import ResponseCache
+from tests.factories import make_paper
+
+
+def _document(doc_id, mention):
+    return f"{doc_id}|t|Title\n{doc_id}|a|Abstract\n{doc_id}\t0\t5\t{mention}\tGene\t672"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache"), ttl=3600, max_size_bytes=1024 * 1024)
+    monkeypatch.setattr(response_cache, "_cache", cache)
+    return cache
+
+
+class _PubTator:
+    """Answers PubTator export URLs with the known `documents` and records them"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.urls = []
+
+    def fetch_text(self, url, endpoint=None, cache=True):
+        self.urls.append(url)
+        ids = url.split("pmids=", 1)[1].split(",")
+        return "\n".join(self.documents[doc_id] for doc_id in ids if doc_id in self.documents)
+
+
+@pytest.fixture
+def pubtator(monkeypatch):
+    pubtator = _PubTator({})
+    monkeypatch.setattr(pubtator_client, "fetch_text", pubtator.fetch_text)
+    return pubtator
+
+
+def test_fetch_entities_many_batches_and_counts_requests(cache, pubtator, monkeypatch):
+    monkeypatch.setattr(get_config().ncbi, "pubtator_batch_size", 2)
+    pubtator.documents = {"1": _document("1", "BRCA1"), "2": _document("2", "TP53"), "3": _document("3", "EGFR")}
+    client = PubTatorClient()
+
+    stats = {}
+    results = client.fetch_entities_many(["1", "PMC2", "3"], stats=stats)
+
+    assert [e.text for e in results["1"]] == ["BRCA1"]
+    assert [e.text for e in results["PMC2"]] == ["TP53"]
+    assert [e.text for e in results["3"]] == ["EGFR"]
+    assert len(pubtator.urls) == 2
+    assert stats == {"requests": 2, "cached": set()}
+
+    # Every document is now served from the cache, whatever batch asks for it
+    stats = {}
+    results = client.fetch_entities_many(["3", "1"], stats=stats)
+    assert [e.text for e in results["3"]] == ["EGFR"]
+    assert len(pubtator.urls) == 2
+    assert stats == {"requests": 0, "cached": {"1", "3"}}
+
+
+def test_documents_missing_from_a_response_are_not_cached(cache, pubtator):
+    pubtator.documents = {"1": _document("1", "BRCA1")}
+    client = PubTatorClient()
+
+    assert client.fetch_entities_many(["1", "2"])["2"] == []
+    assert cache.get(client.build_url(["2"])) is None
+
+    # Once PubTator has annotated the document it is picked up
+    pubtator.documents["2"] = _document("2", "TP53")
+    stats = {}
+    results = client.fetch_entities_many(["1", "2"], stats=stats)
+    assert [e.text for e in results["2"]] == ["TP53"]
+    assert stats == {"requests": 1, "cached": {"1"}}
+    assert pubtator.urls[-1].endswith("pmids=2")
+
+
+def test_processor_counts_only_requests_actually_sent(storage, cache, pubtator):
+    pubtator.documents = {"1": _document("1", "BRCA1"), "2": _document("2", "TP53")}
+    processor = PaperProcessor(storage=storage)
+    fetched = [(0, "PMC1", "PMC1", "1", make_paper("PMC1", figures=3)),
+               (1, "PMC2", "PMC2", "2", make_paper("PMC2", figures=2))]
+
+    processor._fetch_entities_for(fetched)
+    assert processor.stats == {"pubtator_calls": 1, "pubtator_calls_saved": 4}
+
+    # Served from the response cache: no request, every figure's call saved
+    processor._fetch_entities_for(fetched)
+    assert processor.stats == {"pubtator_calls": 1, "pubtator_calls_saved": 9}
+    assert len(pubtator.urls) == 1
@@ -0,0 +1,58 @@
+# tests/test_rate_limiter.py
+import pytest
+
+from config.config import get_config
+from ingestion import rate_limiter
+
+
+@pytest.fixture
+def ncbi(tmp_path, monkeypatch):
+    ncbi = get_config().ncbi
+    monkeypatch.setattr(ncbi, "rate_limit", 20.0)
+    monkeypatch.setattr(ncbi, "api_key", None)
+    monkeypatch.setattr(ncbi, "endpoint_rate_limits", {})
+    monkeypatch.setattr(ncbi, "rate_limit_dir", str(tmp_path))
+    monkeypatch.setattr(rate_limiter, "_buckets", {})
+    return ncbi
+
+
+def test_endpoints_share_one_bucket(ncbi):
+    buckets = {rate_limiter.get_rate_limiter(endpoint) for endpoint in ("pmc", "pubtator", "idconv")}
+    assert len(buckets) == 1
+
+    # One token per request, whichever client takes it
+    waits = [rate_limiter.get_rate_limiter(endpoint).reserve() for endpoint in ("pmc", "pubtator", "idconv")]
+    assert waits[0] == 0
+    assert waits[1] == pytest.approx(0.05, abs=0.02)
+    assert waits[2] == pytest.approx(0.10, abs=0.02)
+
+
+def test_endpoint_override_gets_its_own_bucket(ncbi, monkeypatch):
+    monkeypatch.setattr(ncbi, "endpoint_rate_limits", {"pubtator": 3.0})
+
+    pubtator = rate_limiter.get_rate_limiter("pubtator")
+    assert pubtator.rate == 3.0
+    assert pubtator is not rate_limiter.get_rate_limiter("pmc")
+    assert rate_limiter.get_rate_limiter("pmc") is rate_limiter.get_rate_limiter("idconv")
+    assert rate_limiter.get_rate_limiter("pmc").rate == 20.0
+
+
+def test_only_keyed_endpoints_get_the_api_key_rate(ncbi, monkeypatch):
+    monkeypatch.setattr(ncbi, "rate_limit", None)
+    monkeypatch.setattr(ncbi, "api_key", "real-key")
+
+    idconv = rate_limiter.get_rate_limiter("idconv")
+    pmc = rate_limiter.get_rate_limiter("pmc")
+    assert idconv.rate == rate_limiter.RATE_WITH_API_KEY
+    assert pmc.rate == rate_limiter.RATE_WITHOUT_API_KEY
+    assert pmc is rate_limiter.get_rate_limiter("pubtator")
+    assert idconv is not pmc
+
+
+def test_placeholder_api_key_is_ignored(ncbi, monkeypatch):
+    monkeypatch.setattr(ncbi, "rate_limit", None)
+    monkeypatch.setattr(ncbi, "api_key", "your_ncbi_api_key_here")
+
+    assert ncbi.usable_api_key() is None
+    assert rate_limiter.get_rate_limiter("idconv").rate == rate_limiter.RATE_WITHOUT_API_KEY
+    assert rate_limiter.get_rate_limiter("idconv") is rate_limiter.get_rate_limiter("pmc")
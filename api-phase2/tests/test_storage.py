@@ -0,0 +1,55 @@
+# tests/test_storage.py
+from tests.factories import make_paper
+
+
+def test_save_and_load_round_trip(storage):
+    paper = make_paper("PMC1", figures=2, entities=("TP53", "BRCA1"))
+    storage.save_papers([paper])
+
+    loaded = storage.get_paper_with_details("PMC1")
+    assert loaded.title == paper.title
+    assert loaded.abstract == paper.abstract
+    assert [fig.label for fig in loaded.figures] == ["Figure 1", "Figure 2"]
+    assert [fig.caption for fig in loaded.figures] == [fig.caption for fig in paper.figures]
+    assert [fig.url for fig in loaded.figures] == [fig.url for fig in paper.figures]
+    assert [(e.text, e.type) for e in loaded.figures[0].entities] == [("TP53", "Gene"), ("BRCA1", "Gene")]
+
+
+def test_save_keeps_entity_order(storage):
+    names = [f"GENE{(n * 7) % 30}" for n in range(30)]
+    papers = [make_paper(f"PMC{n}", figures=2, entities=names[n % 30:] + names[:n % 30]) for n in range(20)]
+
+    # Saving twice replaces the links, which must still follow caption order
+    for _ in range(2):
+        storage.save_papers(papers)
+        loaded = storage.get_papers_by_ids([paper.paper_id for paper in papers])
+        for paper, stored in zip(papers, loaded):
+            for fig, stored_fig in zip(paper.figures, stored.figures):
+                assert [e.text for e in stored_fig.entities] == [e.text for e in fig.entities]
+
+
+def test_save_drops_repeated_entities_keeping_first_mention(storage):
+    storage.save_papers([make_paper("PMC1", entities=("B", "A", "B", "C"))])
+
+    figure = storage.get_paper_with_details("PMC1").figures[0]
+    assert [e.text for e in figure.entities] == ["B", "A", "C"]
+
+
+def test_resave_updates_paper_and_replaces_links(storage):
+    storage.save_papers([make_paper("PMC1", entities=("TP53",))])
+    storage.save_papers([make_paper("PMC1", title="New title", entities=("EGFR",))])
+
+    loaded = storage.get_paper_with_details("PMC1")
+    assert loaded.title == "New title"
+    assert [e.text for e in loaded.figures[0].entities] == ["EGFR"]
+    assert len(storage.get_papers()) == 1
+
+
+def test_create_indexes_drops_retired_indexes(storage):
+    storage.conn.execute("CREATE INDEX idx_figures_paper_id ON figures(paper_id)")
+
+    storage.create_indexes()
+
+    names = {row[0] for row in storage.conn.execute("SELECT index_name FROM duckdb_indexes()").fetchall()}
+    assert "idx_entities_name" in names
+    assert "idx_figures_paper_id" not in names
@@ -2,7 +2,7 @@ import json
 import csv
 import io
 import time
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List
 from datetime import datetime
 from config.config import get_config
 
@@ -30,77 +30,152 @@ class ResultFormatter:
 
         return json.dumps(output, indent=2 if self.config.output.pretty_print_json else None)
 
+    def iter_json(self, results: Iterable[Dict[str, Any]], start_time: float) -> Iterator[str]:
+        """
+        Format results as format_json does, yielding the JSON text one result
+        at a time so it never has to be held in memory. The summary is
+        counted while streaming and timed from `start_time` to the end.
+        """
+        pretty = self.config.output.pretty_print_json
+        include_summary = self.config.output.include_summary
+        total = successful = failed = 0
+
+        yield '{\n  "results": [' if pretty else '{"results": ['
+        for result in results:
+            text = json.dumps(result, indent=2 if pretty else None)
+            if pretty:
+                text = "\n" + "\n".join("    " + line for line in text.splitlines())
+            if total:
+                yield "," if pretty else ", "
+            yield text
+            total += 1
+            successful += result.get("status") == "success"
+            failed += result.get("status") == "error"
+        if pretty:
+            yield "\n  ]" if total else "]"
+        else:
+            yield "]"
+
+        if include_summary:
+            summary = {
+                "total_requested": total,
+                "successful": successful,
+                "failed": failed,
+                "processing_time": round(time.time() - start_time, 2)
+            }
+            if pretty:
+                text = json.dumps(summary, indent=2).replace("\n", "\n  ")
+                yield f',\n  "summary": {text}'
+            else:
+                yield f', "summary": {json.dumps(summary)}'
+        yield "\n}" if pretty else "}"
+
     def format_csv(self, results: List[Dict[str, Any]], processing_time: float) -> str:
         """Format results as a CSV string with Excel-friendly formatting."""
         output = io.StringIO()
         writer = csv.writer(output, delimiter=self.config.output.csv_delimiter)
 
-        # Write header with separate columns for entity information
-        header = [
-            "Paper ID", "Source", "Status", "Title", "Abstract",
-            "Figure ID", "Caption", "Figure URL"
-        ]
+        writer.writerow(self._csv_header())
+        for result in results:
+            writer.writerows(self._csv_rows(result))
 
-        # Add entity columns based on configuration
-        max_entities = self.config.output.max_entities_in_csv
-        for i in range(1, max_entities + 1):
-            header.extend([f"Entity {i}", f"Entity {i} Type"])
+        # Write summary if enabled
+        if self.config.output.include_summary:
+            self._write_csv_summary(
+                writer,
+                len(results),
+                sum(1 for r in results if r.get("status") == "success"),
+                sum(1 for r in results if r.get("status") == "error"),
+                processing_time
+            )
 
-        writer.writerow(header)
+        return output.getvalue()
+
+    def iter_csv(self, results: Iterable[Dict[str, Any]], start_time: float) -> Iterator[str]:
+        """
+        Format results as format_csv does, yielding the rows of one result at
+        a time so the CSV never has to be held in memory
+        """
+        output = io.StringIO()
+        writer = csv.writer(output, delimiter=self.config.output.csv_delimiter)
+        total = successful = failed = 0
 
-        # Write data
+        writer.writerow(self._csv_header())
         for result in results:
-            if not result.get("figures"):
-                # Write paper with no figures
-                writer.writerow([
-                    result.get("paper_id", ""),
-                    result.get("source", ""),
-                    result.get("status", ""),
-                    result.get("title", ""),
-                    result.get("abstract", ""),
-                    "", "", "",  # Figure ID, Caption, URL
-                    *["" for _ in range(max_entities * 2)]  # Empty entity columns
-                ])
-            else:
-                # Write each figure as a separate row
-                for figure in result["figures"]:
-                    # Prepare base row data
-                    row_data = [
-                        result.get("paper_id", ""),
-                        result.get("source", ""),
-                        result.get("status", ""),
-                        result.get("title", ""),
-                        result.get("abstract", ""),
-                        figure.get("figure_id", ""),
-                        figure.get("caption", ""),
-                        figure.get("figure_url", "")
-                    ]
-
-                    # Add entity information (up to max_entities)
-                    entities = figure.get("entities", [])
-                    for i in range(max_entities):
-                        if i < len(entities):
-                            entity = entities[i]
-                            row_data.extend([
-                                entity.get("entity", ""),
-                                entity.get("type", "")
-                            ])
-                        else:
-                            row_data.extend(["", ""])  # Empty entity slot
-
-                    writer.writerow(row_data)
+            writer.writerows(self._csv_rows(result))
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+            total += 1
+            successful += result.get("status") == "success"
+            failed += result.get("status") == "error"
 
-        # Write summary if enabled
         if self.config.output.include_summary:
-            writer.writerow([])
-            writer.writerow([])
-            writer.writerow(["Processing Summary"])
-            writer.writerow(["Total Papers Requested", len(results)])
-            writer.writerow(["Successfully Processed", sum(1 for r in results if r.get("status") == "success")])
-            writer.writerow(["Failed to Process", sum(1 for r in results if r.get("status") == "error")])
-            writer.writerow(["Total Processing Time (seconds)", round(processing_time, 2)])
+            self._write_csv_summary(writer, total, successful, failed, time.time() - start_time)
+        yield output.getvalue()
 
-        return output.getvalue()
+    def _csv_header(self) -> List[str]:
+        # Separate columns for entity information
+        header = [
+            "Paper ID", "Source", "Status", "Title", "Abstract",
+            "Figure ID", "Caption", "Figure URL"
+        ]
+
+        # Add entity columns based on configuration
+        for i in range(1, self.config.output.max_entities_in_csv + 1):
+            header.extend([f"Entity {i}", f"Entity {i} Type"])
+        return header
+
+    def _csv_rows(self, result: Dict[str, Any]) -> List[List[Any]]:
+        """
+        CSV rows of one result: one per figure, or a single row for a paper
+        without figures. Figures and entities may use the processing result
+        keys (figure_id, figure_url, entity) or the stored paper ones (label,
+        url, text).
+        """
+        max_entities = self.config.output.max_entities_in_csv
+        paper_columns = [
+            result.get("paper_id", ""),
+            result.get("source", ""),
+            result.get("status", ""),
+            result.get("title", ""),
+            result.get("abstract", ""),
+        ]
+        if not result.get("figures"):
+            # Empty figure ID, caption, URL and entity columns
+            return [paper_columns + ["", "", ""] + ["" for _ in range(max_entities * 2)]]
+
+        rows = []
+        for figure in result["figures"]:
+            row_data = paper_columns + [
+                figure.get("figure_id", figure.get("label", "")),
+                figure.get("caption", ""),
+                figure.get("figure_url", figure.get("url", ""))
+            ]
+
+            # Add entity information (up to max_entities)
+            entities = figure.get("entities", [])
+            for i in range(max_entities):
+                if i < len(entities):
+                    entity = entities[i]
+                    row_data.extend([
+                        entity.get("entity", entity.get("text", "")),
+                        entity.get("type", "")
+                    ])
+                else:
+                    row_data.extend(["", ""])  # Empty entity slot
+            rows.append(row_data)
+        return rows
+
+    @staticmethod
+    def _write_csv_summary(writer, total: int, successful: int, failed: int, processing_time: float) -> None:
+        writer.writerow([])
+        writer.writerow([])
+        writer.writerow(["Processing Summary"])
+        writer.writerow(["Total Papers Requested", total])
+        writer.writerow(["Successfully Processed", successful])
+        writer.writerow(["Failed to Process", failed])
+        writer.writerow(["Total Processing Time (seconds)", round(processing_time, 2)])
 
 
 class BatchResultExporter:
@@ -131,4 +206,25 @@ class BatchResultExporter:
         elif format_type == "csv":
             return self.formatter.format_csv(results, processing_time)
         else:
-            raise ValueError(f"Unsupported format type: {format_type}") 
\ No newline at end of file
+            raise ValueError(f"Unsupported format type: {format_type}")
+
+    def check_stream_format(self, format_type: str) -> str:
+        """Normalize a format for iter_results, raising ValueError if it can't be streamed"""
+        format_type = format_type.lower()
+        if format_type not in self.config.output.formats or format_type not in ("json", "csv"):
+            raise ValueError(f"Unsupported format type: {format_type}. Allowed formats: {self.config.output.formats}")
+        return format_type
+
+    def iter_results(self, results: Iterable[Dict[str, Any]], format_type: str = "json") -> Iterator[str]:
+        """
+        Format results in the specified format as a stream of text chunks,
+        consuming `results` lazily. The format is checked before anything
+        is yielded.
+        """
+        if not self.start_time:
+            raise ValueError("Timer not started. Call start_timing() before processing.")
+
+        format_type = self.check_stream_format(format_type)
+        if format_type == "json":
+            return self.formatter.iter_json(results, self.start_time)
+        return self.formatter.iter_csv(results, self.start_time) 
\ No newline at end of file
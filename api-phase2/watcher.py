@@ -9,8 +9,8 @@ from watchdog.events import FileSystemEventHandler
 
 # Import required modules for paper processing
 from ingestion.paper_processor import PaperProcessor
-from ingestion.id_converter import normalize_paper_id
-from storage.duckdb_backend import DuckDBStorage
+from ingestion.pipeline import IngestionPipeline
+from storage.duckdb_backend import get_storage
 from config.config import get_config
 
 # Configure logging
@@ -31,48 +31,34 @@ PROCESSED_DIR = WATCHED_DIR / "processed"
 for directory in [UNPROCESSED_DIR, UNDERPROCESS_DIR, PROCESSED_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
-# Initialize processor and storage
-processor = PaperProcessor()
 config = get_config()
-storage = DuckDBStorage(config.storage.db_path)
+
+# The pipeline is created on first use rather than on import: its worker
+# processes are spawned and re-import this module, and must not open the
+# database this process holds
+_pipeline = None
+
+
+def get_pipeline():
+    """The shared ingestion pipeline, with its processor on the process-wide storage service"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = IngestionPipeline(PaperProcessor(get_storage()))
+    return _pipeline
 
 def process_paper_ids(paper_ids):
     """
     Process a list of paper IDs (PMC IDs or PMIDs)
     This replicates the functionality from api/routes.py
     """
-    results = []
-    
-    for paper_id in paper_ids:
-        try:
-            # Normalize the paper ID to get both PMC ID and PMID
-            original_id, pmc_id, pmid = normalize_paper_id(paper_id)
-            
-            # Log the ID conversion for debugging
-            if pmid and pmc_id:
-                logger.info(f"Converted ID: Original={original_id}, PMC={pmc_id}, PMID={pmid}")
-            elif pmid:
-                logger.info(f"Using PMID: {pmid} (no PMC ID found)")
-            elif pmc_id:
-                logger.info(f"Using PMC ID: {pmc_id} (no PMC ID found)")
-            else:
-                logger.warning(f"Could not resolve ID: {original_id}")
-            
-            # Use the process_with_details method which handles both PMC IDs and PMIDs
-            result = processor.process_with_details(paper_id)
-            results.append(result)
-            
-            if result["status"] == "success":
-                logger.info(f"Successfully processed paper: {paper_id}")
-            else:
-                logger.error(f"Failed to process paper: {paper_id}, Error: {result.get('error', 'Unknown error')}")
-        except Exception as e:
-            logger.error(f"Error processing paper {paper_id}: {e}")
-            results.append({
-                "paper_id": paper_id,
-                "status": "error",
-                "message": str(e)
-            })
+    # Run through the pipeline so fetching, parsing, annotating and storing overlap
+    results = get_pipeline().run(paper_ids)
+
+    for paper_id, result in zip(paper_ids, results):
+        if result["status"] == "success":
+            logger.info(f"Successfully processed paper: {paper_id}")
+        else:
+            logger.error(f"Failed to process paper: {paper_id}, Error: {result.get('error', 'Unknown error')}")
     
     return results
 